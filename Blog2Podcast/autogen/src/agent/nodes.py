@@ -1,58 +1,201 @@
-import uuid
 from loguru import logger
-import opik
-from src.observability.opik_utils import configure
-from src.clients.firecrawl import get_firecrawl_client
-from src.clients.grok import get_groq_client
-from src.clients.elevenlabs import get_elevenlabs_client
-from src.agent.prompt import get_summarization_prompt
-
-configure()
+from src.observability.opik_utils import track
+from src.clients.firecrawl import get_async_firecrawl_client, get_firecrawl_client
+from src.clients.ratelimit import get_rate_limiter
+from src.clients.resilience import acall_provider, call_provider
+from src.clients.grok import get_async_groq_client, get_groq_client
+from src.clients.elevenlabs import get_async_elevenlabs_client, get_elevenlabs_client
+from src.agent.limits import get_stage_limiter
+from src.agent.preprocess import preprocess
+from src.agent.singleflight import acoalesce, coalesce
+from src.agent.streaming import astream_podcast, stream_podcast
+from src.agent.summarize import asummarize, summarize, summary_cache_key
+from src.audio.tts import asynthesize_script, synthesize_script
+from src.cache.scrape_cache import get_scrape_cache, normalize_url
+from src.cache.script_cache import get_script_cache
+from src.cache.tts_cache import tts_cache_key
+from src.config import settings
+from src.observability.metrics import AUDIO_BYTES_WRITTEN
+from src.storage.artifacts import get_artifact_store
 
 log = logger.bind(tags=["blog2podcast-agent"])
 
-@opik.track(name="scraping-url", capture_input=False, capture_output=False)
+@track(name="scraping-url", capture_input=False, capture_output=False)
 def scrape_blog_content_with_firecrawl(state):
     url = state.url if hasattr(state, "url") else state.get("url", "")
+
+    def scrape():
+        if settings.cache.enabled:
+            return get_scrape_cache().get_or_scrape(url, _scrape)
+        return _scrape(url)
+
+    return {"blog_content": coalesce(("scrape", normalize_url(url)), scrape)}
+
+
+@track(name="scraping-url", capture_input=False, capture_output=False)
+async def ascrape_blog_content_with_firecrawl(state):
+    url = state.url if hasattr(state, "url") else state.get("url", "")
+
+    async def scrape():
+        if settings.cache.enabled:
+            return await get_scrape_cache().aget_or_scrape(url, _ascrape)
+        return await _ascrape(url)
+
+    return {"blog_content": await acoalesce(("scrape", normalize_url(url)), scrape)}
+
+
+def _scrape(url):
     client = get_firecrawl_client()
-    response = client.scrape(url, formats=["markdown"], only_main_content=True)
-    return {"blog_content": response.markdown}
+    with get_stage_limiter().slot("scrape"):
+        # The Firecrawl SDK has its own HTTP session, so its quota is applied around the call.
+        response = call_provider(
+            "firecrawl",
+            lambda: get_rate_limiter("firecrawl").call(
+                lambda: client.scrape(url, formats=["markdown"], only_main_content=True), requests=1
+            ),
+            timeout=settings.resilience.scrape_timeout_seconds,
+            hedge=True,
+        )
+    return response.markdown
+
+
+async def _ascrape(url):
+    client = get_async_firecrawl_client()
+    async with get_stage_limiter().aslot("scrape"):
+        response = await acall_provider(
+            "firecrawl",
+            lambda: get_rate_limiter("firecrawl").acall(
+                lambda: client.scrape(url, formats=["markdown"], only_main_content=True), requests=1
+            ),
+            timeout=settings.resilience.scrape_timeout_seconds,
+            hedge=True,
+        )
+    return response.markdown
+
 
+@track(name="preprocessing-content", capture_input=False, capture_output=False)
+def preprocess_blog_content(state):
+    return _preprocess(state)
 
-@opik.track(name="summarizing-content", capture_input=False, capture_output=False)
+
+@track(name="preprocessing-content", capture_input=False, capture_output=False)
+async def apreprocess_blog_content(state):
+    # A few milliseconds of CPU work; cheaper inline than on a worker thread.
+    return _preprocess(state)
+
+
+def _preprocess(state):
+    blog_content = state.blog_content if hasattr(state, "blog_content") else state.get("blog_content", "")
+    if not blog_content or not settings.preprocess.enabled:
+        return {}
+    blog_content, stats = preprocess(blog_content)
+    return {"blog_content": blog_content, "preprocess_stats": stats}
+
+
+@track(name="summarizing-content", capture_input=False, capture_output=False)
 def summarize_blog_content(state):
     blog_content = state.blog_content if hasattr(state, "blog_content") else state.get("blog_content", "")
     if not blog_content:
         return {}
+    def generate():
+        with get_stage_limiter().slot("summarize"):
+            return call_provider(
+                "groq",
+                lambda: summarize(blog_content, get_groq_client()),
+                timeout=settings.resilience.summarize_timeout_seconds,
+            )
+
+    key = summary_cache_key(blog_content)
     try:
-        model = get_groq_client()
-        prompt = get_summarization_prompt().prompt.format(blog_content=blog_content)
-        response = model.invoke(prompt)
-        return {"podcast_script": response.content.strip()}
+        if settings.cache.enabled:
+            return {"podcast_script": coalesce(("summarize", key), lambda: get_script_cache().get_or_generate(key, generate))}
+        return {"podcast_script": coalesce(("summarize", key), generate)}
     except Exception as e:
+        # Fail the run, so it can be resumed from this stage, rather than voicing an empty script.
         log.error(f"Error during summarization: {e}")
+        raise
+
+
+@track(name="summarizing-content", capture_input=False, capture_output=False)
+async def asummarize_blog_content(state):
+    blog_content = state.blog_content if hasattr(state, "blog_content") else state.get("blog_content", "")
+    if not blog_content:
         return {}
+    async def generate():
+        async with get_stage_limiter().aslot("summarize"):
+            return await acall_provider(
+                "groq",
+                lambda: asummarize(blog_content, get_async_groq_client()),
+                timeout=settings.resilience.summarize_timeout_seconds,
+            )
+
+    key = summary_cache_key(blog_content)
+    try:
+        if settings.cache.enabled:
+            return {"podcast_script": await acoalesce(("summarize", key), lambda: get_script_cache().aget_or_generate(key, generate))}
+        return {"podcast_script": await acoalesce(("summarize", key), generate)}
+    except Exception as e:
+        log.error(f"Error during summarization: {e}")
+        raise
 
 
-@opik.track(name="generating-audio", capture_input=False, capture_output=False)
+@track(name="generating-audio", capture_input=False, capture_output=False)
 def generate_audio(state):
     summary = state.podcast_script if hasattr(state, "podcast_script") else state.get("podcast_script", "")
     if not summary:
         return {}
-    client = get_elevenlabs_client()
-    audio = client.text_to_speech.convert(
-        voice_id="pNInz6obpgDQGcFmaJgB",  # Adam pre-made voice
-        optimize_streaming_latency="0",
-        output_format="mp3_22050_32",
-        text=summary,
-        model_id="eleven_multilingual_v2",
+
+    def write():
+        client = get_elevenlabs_client()
+        audio = synthesize_script(client, summary)
+        # Stored under the hash of its content, so identical audio is kept once.
+        with get_stage_limiter().slot("tts"), get_artifact_store().writer(".mp3") as f:
+            for chunk in audio:
+                if chunk:
+                    f.write(chunk)
+                    AUDIO_BYTES_WRITTEN.inc(len(chunk))
+        return f.path
+
+    # Runs generating audio for the same script at the same time share one file.
+    return {"audio_file": coalesce(("tts", _audio_key(summary)), write)}
+
+
+@track(name="generating-audio", capture_input=False, capture_output=False)
+async def agenerate_audio(state):
+    summary = state.podcast_script if hasattr(state, "podcast_script") else state.get("podcast_script", "")
+    if not summary:
+        return {}
+
+    async def write():
+        client = get_async_elevenlabs_client()
+        async with get_stage_limiter().aslot("tts"):
+            with get_artifact_store().writer(".mp3") as f:
+                async for chunk in asynthesize_script(client, summary):
+                    if chunk:
+                        f.write(chunk)
+                        AUDIO_BYTES_WRITTEN.inc(len(chunk))
+        return f.path
+
+    return {"audio_file": await acoalesce(("tts", _audio_key(summary)), write)}
+
+
+def _audio_key(script):
+    return tts_cache_key(
+        script, settings.eleven_labs.voice_id, settings.eleven_labs.model_id, settings.eleven_labs.output_format
     )
-    # Generating a unique file name for the output MP3 file
-    save_file_path = f"{uuid.uuid4()}.mp3"
-    # Writing the audio stream to the file
-
-    with open(save_file_path, "wb") as f:
-        for chunk in audio:
-            if chunk:
-                f.write(chunk)
-    return {"audio_file": save_file_path}
+
+
+@track(name="streaming-script-to-audio", capture_input=False, capture_output=False)
+def stream_script_to_audio(state):
+    blog_content = state.blog_content if hasattr(state, "blog_content") else state.get("blog_content", "")
+    if not blog_content:
+        return {}
+    return coalesce(("stream", summary_cache_key(blog_content)), lambda: stream_podcast(blog_content))
+
+
+@track(name="streaming-script-to-audio", capture_input=False, capture_output=False)
+async def astream_script_to_audio(state):
+    blog_content = state.blog_content if hasattr(state, "blog_content") else state.get("blog_content", "")
+    if not blog_content:
+        return {}
+    return await acoalesce(("stream", summary_cache_key(blog_content)), lambda: astream_podcast(blog_content))
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from loguru import logger
+
+from src.config import settings
+
+T = TypeVar("T")
+
+
+class _LeaderCancelled(Exception):
+    """The leader was cancelled; its followers start the work again themselves."""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that do the same work.
+
+    The first caller for a key (the leader) runs the work; callers arriving
+    with the same key while it is in flight (the followers) wait for the
+    leader's result, or its exception, instead of repeating the provider
+    calls. Threads and event loops share the same calls: the result is
+    handed over through a ``concurrent.futures.Future``. Nothing is kept
+    once the leader finishes; caching results is left to ``src.cache``.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+        self._leaders = 0
+        self._followers = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    return future.result()
+                except _LeaderCancelled:
+                    continue
+            try:
+                result = fn()
+            except BaseException as e:
+                self._finish(key, future, error=e)
+                raise
+            self._finish(key, future, result=result)
+            return result
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    # shield: a cancelled follower must not cancel the leader's future.
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except _LeaderCancelled:
+                    continue
+            try:
+                result = await fn()
+            except BaseException as e:
+                self._finish(key, future, error=e)
+                raise
+            self._finish(key, future, result=result)
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"leaders": self._leaders, "coalesced": self._followers, "in_flight": len(self._calls)}
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._followers += 1
+                logger.debug(f"Waiting on the in-flight call for {key!r}")
+                return future, False
+            future = self._calls[key] = Future()
+            self._leaders += 1
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future, result=None, error: BaseException = None) -> None:
+        with self._lock:
+            del self._calls[key]
+        if error is None:
+            future.set_result(result)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+        else:
+            # Cancellation, KeyboardInterrupt or SystemExit belong to the leader alone.
+            future.set_exception(_LeaderCancelled())
+
+
+@lru_cache(maxsize=1)
+def get_single_flight() -> SingleFlight:
+    return SingleFlight()
+
+
+def coalesce(key: Hashable, fn: Callable[[], T]) -> T:
+    """Run ``fn`` once for concurrent callers with the same ``key``, when coalescing is enabled."""
+    if not settings.pipeline.coalesce:
+        return fn()
+    return get_single_flight().do(key, fn)
+
+
+async def acoalesce(key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+    if not settings.pipeline.coalesce:
+        return await fn()
+    return await get_single_flight().ado(key, fn)
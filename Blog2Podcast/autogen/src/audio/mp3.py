@@ -0,0 +1,65 @@
+from typing import Iterable, Iterator
+
+# Bitrates in kbit/s indexed by [MPEG-1 or not][bitrate index] for Layer III.
+BITRATES = {
+    True: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    False: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def strip_id3(data: bytes) -> bytes:
+    """Remove a leading ID3v2 tag and a trailing ID3v1 tag, leaving only MPEG frames."""
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | (data[9] & 0x7F)
+        footer = 10 if data[5] & 0x10 else 0
+        data = data[10 + size + footer:]
+    if len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+
+def _frame_length(header: bytes) -> int:
+    """Length in bytes of the Layer III frame starting with ``header``, or 0 if it is not one."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return 0
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return 0
+    mpeg1 = version == 3
+    bitrate = BITRATES[mpeg1][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][sample_rate_index]
+    padding = (header[2] >> 1) & 0x01
+    return (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+
+
+def strip_vbr_header(data: bytes) -> bytes:
+    """Drop a leading Xing/Info/VBRI frame.
+
+    Encoders put one at the start of every file to describe that file's
+    length. Once segments are concatenated those headers are wrong, and
+    players would use the first one to compute the duration of the whole
+    stream, so they are removed and the constant bitrate frames speak for
+    themselves.
+    """
+    length = _frame_length(data[:4])
+    if not length:
+        return data
+    mpeg1 = (data[1] >> 3) & 0x03 == 3
+    mono = data[3] >> 6 == 3
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    tag = data[4 + side_info: 8 + side_info]
+    if tag in (b"Xing", b"Info") or data[36:40] == b"VBRI":
+        return data[length:]
+    return data
+
+
+def concat_mp3(segments: Iterable[bytes]) -> Iterator[bytes]:
+    """Join independently encoded MP3 segments into a single stream without re-encoding."""
+    for segment in segments:
+        frames = strip_vbr_header(strip_id3(segment))
+        if frames:
+            yield frames
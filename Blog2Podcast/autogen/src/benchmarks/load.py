@@ -0,0 +1,220 @@
+"""Load-test the pipeline offline against local provider stand-ins.
+
+Runs the whole pipeline on the fakes from ``src.clients.fakes``, either at
+a fixed concurrency (each worker starts its next run when the last one
+ends) or at a fixed arrival rate (runs start on schedule however many are
+still in flight). Reports throughput, end-to-end and per-stage latency
+percentiles, and peak memory:
+
+    python -m src.benchmarks.load --runs 200 --concurrency 16
+    python -m src.benchmarks.load --runs 200 --rate 4 --streaming
+    python -m src.benchmarks.load --runs 200 --concurrency 16 --json > baseline.json
+    python -m src.benchmarks.load --runs 200 --concurrency 16 --baseline baseline.json
+
+Provider behaviour is set with the FAKES__* settings, for example
+``FAKES__SCRAPE_LATENCY=lognormal:2,0.6 FAKES__TTS_ERROR_RATE=0.02``. With
+``--baseline``, the command fails when throughput dropped, or a p95
+latency grew, by more than ``--tolerance``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+os.environ.setdefault("FAKES__ENABLED", "true")
+os.environ.setdefault("CACHE__ENABLED", "false")
+os.environ.setdefault("CHECKPOINT__BACKEND", "memory")
+# The fakes have no quotas; the limiter would only measure itself.
+os.environ.setdefault("RATE_LIMIT__ENABLED", "false")
+# Offline, trace export and prompt syncing only retry against an unreachable Opik.
+os.environ.setdefault("OPIK_TRACK_DISABLE", "true")
+os.environ.setdefault("TRACING__MODE", "off")
+
+from loguru import logger  # noqa: E402
+
+from src.agent.limits import get_stage_limiter  # noqa: E402
+
+# p95 latencies may grow by this much on top of the tolerance before they count as a regression.
+_SLACK_SECONDS = 0.01
+
+
+def pipeline(streaming: bool = False) -> Callable[[str], Awaitable[dict]]:
+    """The coroutine function converting one URL in this variant of the project."""
+    try:
+        from src.agent.graph import BlogToPodcastGraph
+    except ModuleNotFoundError:
+        # The crew variant runs a flow instead of a graph.
+        from src.agent.blog2postcast_flow import akickoff
+
+        return akickoff
+    return lambda url: BlogToPodcastGraph(url, streaming=streaming).ainvoke()
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0, "p50": None, "p95": None, "p99": None}
+    ordered = sorted(samples)
+
+    def rank(q: float) -> float:
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 3)
+
+    return {"count": len(ordered), "p50": rank(0.5), "p95": rank(0.95), "p99": rank(0.99)}
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def closed_loop(run: Callable[[str], Awaitable[None]], urls: list[str], concurrency: int) -> None:
+    queue = iter(urls)
+
+    async def worker() -> None:
+        for url in queue:
+            await run(url)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def open_loop(run: Callable[[str], Awaitable[None]], urls: list[str], rate: float) -> None:
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    tasks = []
+    for i, url in enumerate(urls):
+        delay = started + i / rate - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(run(url)))
+    await asyncio.gather(*tasks)
+
+
+async def load_test(
+    runs: int,
+    concurrency: int = 8,
+    rate: Optional[float] = None,
+    streaming: bool = False,
+    warmup: int = 1,
+) -> dict:
+    convert = pipeline(streaming)
+    latencies: list[float] = []
+    errors: Counter = Counter()
+
+    async def run(url: str) -> None:
+        started = time.perf_counter()
+        try:
+            await convert(url)
+        except Exception as e:
+            errors[type(e).__name__] += 1
+            return
+        latencies.append(time.perf_counter() - started)
+
+    # Prompts, the compiled graph and the clients are built on first use; keep that out of the numbers.
+    await closed_loop(run, [f"https://load-test.invalid/warmup-{i}" for i in range(warmup)], 1)
+    latencies.clear()
+    errors.clear()
+    get_stage_limiter().timings(reset=True)
+
+    urls = [f"https://load-test.invalid/post-{i}" for i in range(runs)]
+    started = time.perf_counter()
+    if rate:
+        await open_loop(run, urls, rate)
+    else:
+        await closed_loop(run, urls, concurrency)
+    seconds = time.perf_counter() - started
+
+    return {
+        "runs": runs,
+        "mode": f"rate {rate}/s" if rate else f"concurrency {concurrency}",
+        "streaming": streaming,
+        "failed": sum(errors.values()),
+        "errors": dict(errors),
+        "seconds": round(seconds, 3),
+        "runs_per_minute": round(len(latencies) / seconds * 60, 2) if seconds else 0.0,
+        "latency": percentiles(latencies),
+        "stages": {
+            stage: {kind: percentiles(samples) for kind, samples in kinds.items()}
+            for stage, kinds in sorted(get_stage_limiter().timings().items())
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def regressions(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """What got worse than ``baseline`` by more than ``tolerance`` (a fraction)."""
+    problems = []
+    if report["runs_per_minute"] < baseline["runs_per_minute"] * (1 - tolerance):
+        problems.append(f"throughput {report['runs_per_minute']} < {baseline['runs_per_minute']} runs/min")
+    pairs = [("end-to-end", report["latency"], baseline["latency"])]
+    for stage, kinds in report["stages"].items():
+        for kind, current in kinds.items():
+            previous = baseline.get("stages", {}).get(stage, {}).get(kind)
+            if previous:
+                pairs.append((f"{stage} {kind}", current, previous))
+    for name, current, previous in pairs:
+        if current["p95"] is not None and previous["p95"] is not None \
+                and current["p95"] > previous["p95"] * (1 + tolerance) + _SLACK_SECONDS:
+            problems.append(f"{name} p95 {current['p95']}s > {previous['p95']}s")
+    return problems
+
+
+def _print_report(report: dict) -> None:
+    print(f"{report['runs']} runs at {report['mode']}{', streaming' if report['streaming'] else ''}: "
+          f"{report['runs_per_minute']} runs/min, {report['failed']} failed {report['errors'] or ''}")
+    print(f"{'':18}{'p50':>8}{'p95':>8}{'p99':>8}")
+
+    def row(name: str, stats: dict) -> None:
+        values = "".join(f"{stats[q]:>8.3f}" if stats[q] is not None else f"{'-':>8}" for q in ("p50", "p95", "p99"))
+        print(f"{name:18}{values}")
+
+    row("end-to-end", report["latency"])
+    for stage, kinds in report["stages"].items():
+        for kind, stats in kinds.items():
+            row(f"{stage} {kind}", stats)
+    print(f"peak RSS: {report['peak_rss_mb']} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=100, help="Number of pipeline runs, each for a different URL.")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=8, help="Runs in flight at once (closed loop).")
+    load.add_argument("--rate", type=float, help="Runs started per second, whatever is in flight (open loop).")
+    parser.add_argument("--streaming", action="store_true", help="Use the streaming summarize-and-speak stage.")
+    parser.add_argument("--warmup", type=int, default=1, help="Runs before measuring.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON, e.g. to save a baseline.")
+    parser.add_argument("--baseline", type=Path, help="JSON report of an earlier run to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed regression against the baseline, as a fraction.")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    cwd = Path.cwd()
+    with tempfile.TemporaryDirectory(prefix="blog2podcast-load-") as workdir:
+        # The artifact store, with the audio of every run, is created in the working directory.
+        os.chdir(workdir)
+        try:
+            report = asyncio.run(load_test(args.runs, args.concurrency, args.rate, args.streaming, args.warmup))
+        finally:
+            os.chdir(cwd)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    if args.baseline:
+        problems = regressions(report, json.loads((cwd / args.baseline).read_text(encoding="utf-8")), args.tolerance)
+        for problem in problems:
+            print(f"regression: {problem}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compare time to first audio of the sequential and the streaming pipeline.
+
+Runs against a simulated LLM that emits tokens at a fixed rate and the
+simulated ElevenLabs client from ``src.benchmarks.tts``:
+
+    python -m src.benchmarks.streaming --words 400 --tokens-per-second 250
+"""
+import argparse
+import os
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("CACHE__ENABLED", "false")
+
+from src.agent.streaming import stream_podcast  # noqa: E402
+from src.audio.tts import synthesize_script  # noqa: E402
+from src.benchmarks.tts import SAMPLE_PARAGRAPH, SimulatedElevenLabs  # noqa: E402
+
+
+class SimulatedChatModel:
+    def __init__(self, words: int, first_token: float, tokens_per_second: float) -> None:
+        text = []
+        while len(text) < words:
+            text.extend(f"Part {len(text) // 50 + 1}. {SAMPLE_PARAGRAPH}".split(" "))
+        self.tokens = [word + " " for word in text[:words]]
+        self.first_token = first_token
+        self.token_interval = 1 / tokens_per_second
+
+    def stream(self, prompt):
+        time.sleep(self.first_token)
+        for token in self.tokens:
+            time.sleep(self.token_interval)
+            yield SimpleNamespace(content=token)
+
+    def invoke(self, prompt):
+        return SimpleNamespace(content="".join(chunk.content for chunk in self.stream(prompt)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=400, help="Length of the generated script in words.")
+    parser.add_argument("--first-token", type=float, default=0.3, help="Simulated LLM time to first token in seconds.")
+    parser.add_argument("--tokens-per-second", type=float, default=250, help="Simulated LLM generation speed.")
+    parser.add_argument("--tts-first-byte", type=float, default=0.3, help="Simulated TTS time to first byte in seconds.")
+    parser.add_argument("--tts-per-char", type=float, default=0.001, help="Simulated TTS seconds per character.")
+    args = parser.parse_args()
+
+    llm = SimulatedChatModel(args.words, args.first_token, args.tokens_per_second)
+    tts = SimulatedElevenLabs(args.tts_first_byte, args.tts_per_char)
+
+    started = time.perf_counter()
+    script = llm.invoke("").content
+    first_audio = None
+    for chunk in synthesize_script(tts, script):
+        if first_audio is None and chunk:
+            first_audio = time.perf_counter() - started
+    sequential_total = time.perf_counter() - started
+
+    result = stream_podcast("benchmark", llm=llm, tts_client=tts)
+    os.remove(result["audio_file"])
+
+    print(f"script words:                 {args.words}")
+    print(f"sequential time to 1st audio: {first_audio:.2f}s (total {sequential_total:.2f}s)")
+    print(f"streaming time to 1st audio:  {result['time_to_first_audio']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass
+class CacheEntry:
+    value: bytes
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    @property
+    def size(self) -> int:
+        return len(self.value)
+
+
+class CacheBackend(ABC):
+    """Key/value store for cache entries with TTL and size based eviction.
+
+    ``ttl`` is a hard expiry: entries older than it are dropped on access.
+    ``max_entries`` and ``max_bytes`` bound the store, evicting the least
+    recently used entries first. A value of ``0`` disables the bound.
+    """
+
+    def __init__(self, ttl: float = 0, max_entries: int = 0, max_bytes: int = 0) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expirations": 0}
+
+    def _expired(self, entry: CacheEntry) -> bool:
+        return bool(self.ttl) and entry.age > self.ttl
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        self._counters[name] += amount
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]: ...
+
+    @abstractmethod
+    def set(self, key: str, entry: CacheEntry) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = counters["hits"] / lookups if lookups else 0.0
+        counters["entries"] = len(self)
+        return counters
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache."""
+
+    def __init__(self, ttl: float = 0, max_entries: int = 0, max_bytes: int = 0) -> None:
+        super().__init__(ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._count("misses")
+                return None
+            if self._expired(entry):
+                self._remove(key)
+                self._count("expirations")
+                self._count("misses")
+                return None
+            self._entries.move_to_end(key)
+            self._count("hits")
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._count("sets")
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.max_entries and len(self._entries) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._count("evictions")
+
+
+class SQLiteCache(CacheBackend):
+    """On-disk cache stored in a single SQLite file, shared across processes."""
+
+    def __init__(self, path: str | Path, ttl: float = 0, max_entries: int = 0, max_bytes: int = 0) -> None:
+        super().__init__(ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, etag, last_modified, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count("misses")
+                return None
+            entry = CacheEntry(value=bytes(row[0]), etag=row[1], last_modified=row[2], created_at=row[3])
+            if self._expired(entry):
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._count("expirations")
+                self._count("misses")
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._count("hits")
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, etag, last_modified, created_at, accessed_at, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.value, entry.etag, entry.last_modified, entry.created_at, time.time(), entry.size),
+            )
+            self._count("sets")
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _evict(self) -> None:
+        if self.ttl:
+            expired = self._conn.execute(
+                "DELETE FROM cache WHERE created_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+            self._count("expirations", expired)
+        if self.max_entries:
+            evicted = self._conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._count("evictions", evicted)
+        if self.max_bytes:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            while total > self.max_bytes:
+                row = self._conn.execute(
+                    "SELECT key, size FROM cache ORDER BY accessed_at ASC LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    break
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (row[0],))
+                self._count("evictions")
+                total -= row[1]
+
+
+def create_backend(
+    kind: str,
+    name: str,
+    directory: str | Path,
+    ttl: float = 0,
+    max_entries: int = 0,
+    max_bytes: int = 0,
+) -> CacheBackend:
+    if kind == "memory":
+        return MemoryCache(ttl=ttl, max_entries=max_entries, max_bytes=max_bytes)
+    if kind == "sqlite":
+        return SQLiteCache(
+            Path(directory) / f"{name}.sqlite3", ttl=ttl, max_entries=max_entries, max_bytes=max_bytes
+        )
+    raise ValueError(f"Unknown cache backend '{kind}'. Expected 'memory' or 'sqlite'.")
@@ -1,5 +1,24 @@
-from firecrawl import FirecrawlApp
+from functools import lru_cache
+
+from src.clients.http import per_event_loop
 from src.config import settings
 
+@lru_cache(maxsize=1)
 def get_firecrawl_client():
-    return FirecrawlApp(api_key=settings.firecrawl.api_key)
\ No newline at end of file
+    if settings.fakes.enabled:
+        from src.clients.fakes import FakeFirecrawl
+
+        return FakeFirecrawl()
+    from firecrawl import FirecrawlApp
+
+    return FirecrawlApp(api_key=settings.firecrawl.api_key)
+
+@per_event_loop
+def get_async_firecrawl_client():
+    if settings.fakes.enabled:
+        from src.clients.fakes import FakeAsyncFirecrawl
+
+        return FakeAsyncFirecrawl()
+    from firecrawl import AsyncFirecrawl
+
+    return AsyncFirecrawl(api_key=settings.firecrawl.api_key)
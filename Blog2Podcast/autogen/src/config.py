@@ -1,4 +1,4 @@
-from typing import ClassVar
+from typing import ClassVar, Optional
 from pathlib import Path
 from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -16,6 +16,8 @@ class ElevenLabsSettings(BaseModel):
     optimize_streaming_latency: str = Field(default="0", description="The streaming latency optimization setting for ElevenLabs.")
     output_format: str = Field(default="mp3_22050_32", description="The output format for the audio file.")
     model_id: str = Field(default="eleven_multilingual_v2", description="The ElevenLabs model ID to use for text-to-speech conversion.")
+    segment_max_chars: int = Field(default=800, description="Character budget of a single text-to-speech request; scripts are split at sentence and paragraph boundaries to fit it (0 for one request per sentence).")
+    max_concurrency: int = Field(default=4, description="Maximum number of text-to-speech requests in flight for one script.")
 
 class FirecrawlSettings(BaseModel):
     api_key: str = Field(default="", description="Firecrawl API Key")
@@ -24,11 +26,160 @@ class OpikSettings(BaseModel):
     api_key: str = Field(default="", description="Opik API Key")
     project_name: str = Field(default="", description="Opik Project Name")
 
+class ClientSettings(BaseModel):
+    max_connections: int = Field(default=20, description="Maximum number of open connections per provider.")
+    max_keepalive_connections: int = Field(default=10, description="Maximum number of idle connections kept alive per provider.")
+    keepalive_expiry_seconds: float = Field(default=30.0, description="How long an idle connection is kept alive before it is closed.")
+    timeout_seconds: float = Field(default=240.0, description="Timeout for a single provider request.")
+    warm_up: bool = Field(default=False, description="Open a connection to every provider at startup instead of on the first request.")
+
+class CacheSettings(BaseModel):
+    enabled: bool = Field(default=True, description="Whether to cache provider responses between runs.")
+    backend: str = Field(default="sqlite", description="Cache backend to use: 'memory' (per process LRU) or 'sqlite' (on disk).")
+    directory: str = Field(default=".cache/blog2podcast", description="Directory for on-disk cache files.")
+    scrape_ttl_seconds: float = Field(default=3600, description="How long a scraped page is served without revalidating it against the origin.")
+    scrape_max_age_seconds: float = Field(default=7 * 24 * 3600, description="Hard expiry for scraped pages, revalidated or not.")
+    scrape_max_entries: int = Field(default=1000, description="Maximum number of scraped pages kept in the cache (0 for unbounded).")
+    scrape_max_bytes: int = Field(default=200 * 1024 * 1024, description="Maximum total size of scraped pages kept in the cache (0 for unbounded).")
+    script_max_age_seconds: float = Field(default=30 * 24 * 3600, description="Hard expiry for memoized podcast scripts.")
+    script_max_entries: int = Field(default=5000, description="Maximum number of memoized podcast scripts (0 for unbounded).")
+    tts_max_age_seconds: float = Field(default=90 * 24 * 3600, description="Hard expiry for synthesized audio segments.")
+    tts_max_bytes: int = Field(default=1024 * 1024 * 1024, description="Maximum total size of synthesized audio segments kept in the cache (0 for unbounded).")
+    revalidate: bool = Field(default=True, description="Revalidate stale pages with ETag/Last-Modified conditional requests.")
+    revalidate_timeout_seconds: float = Field(default=3.0, description="Timeout for conditional revalidation requests.")
+
+class PipelineSettings(BaseModel):
+    scrape_concurrency: int = Field(default=8, description="Maximum number of pipelines scraping at once (0 for unbounded).")
+    summarize_concurrency: int = Field(default=4, description="Maximum number of pipelines summarizing at once (0 for unbounded).")
+    tts_concurrency: int = Field(default=4, description="Maximum number of pipelines synthesizing audio at once (0 for unbounded).")
+    streaming: bool = Field(default=False, description="Start text-to-speech on each sentence while the LLM is still generating the script.")
+    batch_max_in_flight: int = Field(default=32, description="Maximum number of URLs a batch keeps in progress at once.")
+    coalesce: bool = Field(default=True, description="Let concurrent runs for the same URL, or the same stage input, wait on one in-flight run instead of repeating the provider calls.")
+    max_in_flight_runs: int = Field(default=8, description="Maximum number of pipeline runs in progress in the process; further runs wait for admission, interactive ones first (0 for unbounded).")
+    max_queued_runs: int = Field(default=32, description="Maximum number of interactive runs waiting for admission; further ones are rejected as busy (0 for unbounded). Batch runs are bounded by batch_max_in_flight instead.")
+
+class PreprocessSettings(BaseModel):
+    enabled: bool = Field(default=True, description="Strip images, links, code, navigation and boilerplate from scraped markdown before summarizing it.")
+    drop_code: bool = Field(default=True, description="Remove fenced code blocks, which are not read out in a podcast.")
+    max_tokens: int = Field(default=30000, description="Token budget of the cleaned post; trailing sections beyond it are dropped (0 for unbounded).")
+
+class SummarizationSettings(BaseModel):
+    mode: str = Field(default="auto", description="How the podcast script is generated: 'single' (one prompt with the whole post), 'map_reduce' (chunks summarized in parallel, then combined) or 'auto' (map-reduce for long posts).")
+    map_reduce_min_tokens: int = Field(default=12000, description="In 'auto' mode, posts of at least this many estimated tokens are summarized with map-reduce.")
+    chunk_tokens: int = Field(default=4000, description="Token budget of one chunk in the map step; posts are split along their markdown headings to fit it.")
+    map_max_tokens: int = Field(default=300, description="Maximum number of tokens the LLM generates for the notes of one chunk.")
+    map_concurrency: int = Field(default=8, description="Maximum number of chunks of one post summarized at once.")
+
+class CheckpointSettings(BaseModel):
+    backend: str = Field(default="sqlite", description="Checkpointer to use: 'memory' (per process) or 'sqlite' (on disk, lets failed runs resume after a restart).")
+    path: str = Field(default=".cache/blog2podcast/checkpoints.sqlite", description="SQLite file of the on-disk checkpointer.")
+    max_threads: int = Field(default=1000, description="Maximum number of pipeline runs whose checkpoints are kept in memory; the least recently used are dropped first (0 for unbounded).")
+    ttl_seconds: float = Field(default=3600, description="In memory, checkpoints of a run are dropped after this many seconds without use (0 to keep them until evicted by max_threads).")
+    max_stored_threads: int = Field(default=10000, description="Maximum number of pipeline runs kept on disk; the least recently used are dropped first (0 for unbounded).")
+    retention_seconds: float = Field(default=7 * 24 * 3600, description="On disk, checkpoints of a run are dropped after this many seconds without use (0 to keep them until evicted by max_stored_threads).")
+    compress_min_bytes: int = Field(default=1024, description="Serialized state values at least this large are stored zlib-compressed (0 to disable compression).")
+
+class RateLimitSettings(BaseModel):
+    enabled: bool = Field(default=True, description="Hold provider requests to the per-minute quotas below instead of sending them into 429 responses.")
+    max_retries: int = Field(default=5, description="How many times a request answered with 429 is retried before the error is raised.")
+    backoff_base_seconds: float = Field(default=1.0, description="First backoff delay after a 429 without Retry-After; doubled on every further 429, with full jitter.")
+    backoff_max_seconds: float = Field(default=60.0, description="Upper bound of a backoff delay, including one asked for by Retry-After.")
+    groq_requests_per_minute: float = Field(default=30, description="Groq requests per minute (0 for unlimited).")
+    groq_tokens_per_minute: float = Field(default=12000, description="Groq prompt and completion tokens per minute (0 for unlimited).")
+    firecrawl_requests_per_minute: float = Field(default=100, description="Firecrawl scrape requests per minute (0 for unlimited).")
+    elevenlabs_requests_per_minute: float = Field(default=0, description="ElevenLabs requests per minute (0 for unlimited).")
+    elevenlabs_characters_per_minute: float = Field(default=0, description="ElevenLabs characters synthesized per minute (0 for unlimited).")
+
+class ResilienceSettings(BaseModel):
+    failure_threshold: int = Field(default=5, description="Consecutive failed calls to a provider after which its circuit opens and further calls fail fast.")
+    reset_seconds: float = Field(default=30.0, description="How long an open circuit rejects calls before a probe call is let through.")
+    half_open_max_calls: int = Field(default=1, description="Probe calls let through at once while a circuit is half-open.")
+    scrape_timeout_seconds: float = Field(default=90.0, description="Time limit of one scrape (0 for none).")
+    summarize_timeout_seconds: float = Field(default=300.0, description="Time limit of generating a podcast script, map-reduce included (0 for none).")
+    tts_timeout_seconds: float = Field(default=60.0, description="Time limit of synthesizing one audio segment (0 for none).")
+    hedging: bool = Field(default=False, description="Send a second scrape or audio segment request when the first is slower than the provider's recent latency quantile; the first answer wins. Hedged requests count against the provider quotas.")
+    hedge_quantile: float = Field(default=0.95, description="Latency quantile of recent calls after which a hedged request is sent.")
+    hedge_min_samples: int = Field(default=20, description="Calls a provider must have answered before its latency quantile is used.")
+    hedge_initial_delay_seconds: float = Field(default=5.0, description="Hedging delay until enough latencies have been observed.")
+    hedge_min_delay_seconds: float = Field(default=0.05, description="Lower bound of the hedging delay.")
+    provider_threads: int = Field(default=16, description="Threads per provider for sync calls that have a time limit or are hedged. A call that times out keeps its thread until it returns, so a hung provider can only use up its own.")
+
+class FakesSettings(BaseModel):
+    enabled: bool = Field(default=False, description="Replace Firecrawl, Groq and ElevenLabs with local stand-ins (src.clients.fakes), for load tests without API keys or network.")
+    seed: Optional[int] = Field(default=None, description="Seed of the fakes' latencies and errors, for repeatable runs.")
+    error_status: int = Field(default=503, description="Status code of the errors the fakes raise.")
+    scrape_latency: str = Field(default="lognormal:1.2,0.4", description="Latency of a scrape: 'fixed:S', 'uniform:LOW,HIGH', 'exponential:MEAN' or 'lognormal:MEDIAN,SIGMA' seconds.")
+    scrape_error_rate: float = Field(default=0.0, description="Fraction of scrapes that fail.")
+    page_tokens: int = Field(default=4000, description="Size of a scraped page in tokens.")
+    llm_first_token_latency: str = Field(default="lognormal:0.3,0.4", description="Time to first token of an LLM call, in the same format as scrape_latency.")
+    llm_prefill_tokens_per_second: float = Field(default=4000, description="Prompt tokens the fake LLM processes per second before its first token.")
+    llm_tokens_per_second: float = Field(default=250, description="Tokens the fake LLM generates per second.")
+    llm_chunk_tokens: int = Field(default=5, description="Tokens per streamed LLM chunk.")
+    llm_error_rate: float = Field(default=0.0, description="Fraction of LLM calls that fail.")
+    script_tokens: int = Field(default=700, description="Length of a generated answer in tokens, capped by the call's max_tokens.")
+    tts_first_byte_latency: str = Field(default="lognormal:0.4,0.3", description="Time to first audio byte of a text-to-speech request, in the same format as scrape_latency.")
+    tts_chars_per_second: float = Field(default=800, description="Characters the fake text-to-speech synthesizes per second.")
+    tts_chunk_bytes: int = Field(default=4096, description="Size of a streamed audio chunk in bytes.")
+    tts_error_rate: float = Field(default=0.0, description="Fraction of text-to-speech requests that fail.")
+
+class MetricsSettings(BaseModel):
+    enabled: bool = Field(default=True, description="Record stage durations, provider latencies, cache hit rates and in-flight counts in process (src.observability.metrics), independently of Opik.")
+    port: int = Field(default=0, description="Port of the local endpoint serving /metrics (Prometheus text format) and /metrics.json (0 to not serve them).")
+    host: str = Field(default="127.0.0.1", description="Interface the metrics endpoint listens on.")
+
+class TracingSettings(BaseModel):
+    mode: str = Field(default="sdk", description="How @track records traces: 'sdk' (the Opik SDK, on the request path), 'queue' (sampled spans exported in batches by a background thread, src.observability.tracing) or 'off'.")
+    sample_rate: float = Field(default=1.0, description="In 'queue' mode, fraction of runs that are traced, decided when the run starts (e.g. 0.05).")
+    url: str = Field(default="", description="Opik REST API the queue exports to; empty for OPIK_URL_OVERRIDE or Opik Cloud. Point it at python -m src.observability.collector to test.")
+    workspace: str = Field(default="", description="Opik workspace of the exported traces; empty for OPIK_WORKSPACE or the key's default.")
+    queue_size: int = Field(default=10000, description="Span and trace records held for export; further ones are dropped.")
+    batch_size: int = Field(default=200, description="Maximum number of records sent in one request.")
+    flush_interval_seconds: float = Field(default=1.0, description="How long the exporter collects records before sending a batch that is not full.")
+    export_timeout_seconds: float = Field(default=2.0, description="Timeout of one export request.")
+    shutdown_timeout_seconds: float = Field(default=2.0, description="How long the process waits at exit for queued records to be exported.")
+
+class JobsSettings(BaseModel):
+    path: str = Field(default=".cache/blog2podcast/jobs.sqlite", description="SQLite file of the background job queue the Streamlit app submits conversions to.")
+    workers: int = Field(default=40, description="Jobs the queue takes on at once; of these, pipeline.max_in_flight_runs run and the others wait for admission, where the app shows their place in line.")
+    retention_seconds: float = Field(default=7 * 24 * 3600, description="Finished jobs and their results are deleted after this many seconds.")
+    poll_interval_seconds: float = Field(default=1.0, description="How often the app refreshes the progress of a running job, and the process running the jobs renews its lease and picks up jobs submitted elsewhere.")
+    lease_seconds: float = Field(default=30.0, description="How long the process running the jobs may go without renewing its lease on the jobs file before another process takes over and resumes its jobs.")
+
+class ApiSettings(BaseModel):
+    host: str = Field(default="127.0.0.1", description="Interface the HTTP API (python -m src.api) listens on.")
+    port: int = Field(default=8000, description="Port of the HTTP API.")
+    heartbeat_seconds: float = Field(default=15.0, description="Idle time after which a progress event stream sends a keep-alive comment and the job's place in line.")
+    max_body_bytes: int = Field(default=64 * 1024, description="Largest request body the API accepts.")
+    public_url: str = Field(default="", description="Base URL browsers reach the API at, e.g. http://podcasts.example.com:8000. When set, the app serves the API and its player streams the audio from there in ranges; when empty, the app sends the audio through Streamlit, as the API on its default loopback address is not reachable from remote browsers.")
+    audio_cache_seconds: int = Field(default=24 * 3600, description="How long browsers may reuse downloaded podcast audio without revalidating it.")
+
+class ArtifactSettings(BaseModel):
+    backend: str = Field(default="local", description="Artifact store for generated audio: 'local' (files in a directory).")
+    directory: str = Field(default=".cache/blog2podcast/artifacts", description="Directory of the local artifact store; files are named after the SHA-256 of their content.")
+    max_bytes: int = Field(default=2 * 1024 * 1024 * 1024, description="Disk quota of the artifact store; the least recently used artifacts are removed beyond it (0 for unbounded).")
+    max_age_seconds: float = Field(default=30 * 24 * 3600, description="Artifacts not written or reused for this many seconds are removed (0 to keep them until the quota is reached).")
+    gc_interval_seconds: float = Field(default=300, description="Minimum time between garbage collections of the artifact store, unless a write exceeds the quota.")
+    write_buffer_bytes: int = Field(default=1024 * 1024, description="Buffer size for writing artifacts, so audio chunks are not written to disk one by one.")
+
 class Settings(BaseSettings):
     groq: GroqSettings = Field(default_factory=GroqSettings)
     eleven_labs: ElevenLabsSettings = Field(default_factory=ElevenLabsSettings)
     firecrawl: FirecrawlSettings = Field(default_factory=FirecrawlSettings)
     opik: OpikSettings = Field(default_factory=OpikSettings)
+    clients: ClientSettings = Field(default_factory=ClientSettings)
+    cache: CacheSettings = Field(default_factory=CacheSettings)
+    pipeline: PipelineSettings = Field(default_factory=PipelineSettings)
+    preprocess: PreprocessSettings = Field(default_factory=PreprocessSettings)
+    summarization: SummarizationSettings = Field(default_factory=SummarizationSettings)
+    checkpoint: CheckpointSettings = Field(default_factory=CheckpointSettings)
+    rate_limit: RateLimitSettings = Field(default_factory=RateLimitSettings)
+    resilience: ResilienceSettings = Field(default_factory=ResilienceSettings)
+    fakes: FakesSettings = Field(default_factory=FakesSettings)
+    metrics: MetricsSettings = Field(default_factory=MetricsSettings)
+    tracing: TracingSettings = Field(default_factory=TracingSettings)
+    jobs: JobsSettings = Field(default_factory=JobsSettings)
+    api: ApiSettings = Field(default_factory=ApiSettings)
+    artifacts: ArtifactSettings = Field(default_factory=ArtifactSettings)
     
     model_config: ClassVar[SettingsConfigDict] = SettingsConfigDict(
         env_file=[str(Path(__file__).resolve().parents[1] / ".env")],
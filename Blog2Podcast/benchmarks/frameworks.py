@@ -0,0 +1,177 @@
+"""Framework overhead benchmark for the four Blog2Podcast variants.
+
+    python benchmarks/frameworks.py [--runs 20] [--latency 0] [--concurrency 16] [--variants langgraph crew]
+
+Every variant runs the whole pipeline against the same local provider
+stand-ins (``src.clients.fakes``), answering after the same fixed latency
+(zero by default), so what differs between variants is the framework. For
+each variant it reports:
+
+* the time to import the pipeline entry point;
+* the median time of one run, which at zero latency is orchestration alone
+  (at a fixed latency, subtract the provider time shared by all variants);
+* the Python memory allocated per run while ``--concurrency`` runs are in
+  flight at once, and the peak RSS of the process;
+* the LLM calls and prompt tokens per run; the difference to the leanest
+  variant is what its framework adds to the prompts, e.g. the crew's agent
+  and task definitions.
+
+Each measurement runs in fresh interpreters, started in a temporary
+directory so that audio and checkpoint files are thrown away.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+VARIANTS = ["langgraph", "crew", "autogen", "google-adk"]
+
+PROBE = """
+import asyncio, json, sys, time, tracemalloc
+runs, concurrency = int(sys.argv[1]), int(sys.argv[2])
+started = time.perf_counter()
+from src.benchmarks import load
+convert = load.pipeline()
+imported = time.perf_counter() - started
+from src.clients.fakes import fake_usage
+
+async def main():
+    await convert("https://benchmark.invalid/warmup")
+    fake_usage(reset=True)
+    seconds = []
+    for i in range(runs):
+        run_started = time.perf_counter()
+        await convert(f"https://benchmark.invalid/post-{i}")
+        seconds.append(time.perf_counter() - run_started)
+    result = {"import_seconds": imported, "run_seconds": seconds, "usage": fake_usage(reset=True)}
+    if concurrency:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        await asyncio.gather(*(convert(f"https://benchmark.invalid/concurrent-{i}") for i in range(concurrency)))
+        result["allocated_per_run"] = (tracemalloc.get_traced_memory()[1] - baseline) / concurrency
+        tracemalloc.stop()
+    result["peak_rss_mb"] = load.peak_rss_mb()
+    print("RESULT " + json.dumps(result), flush=True)
+
+asyncio.run(main())
+"""
+
+
+def probe_env(variant: str, latency: float) -> dict:
+    env = dict(os.environ)
+    env.update(
+        PYTHONPATH=str(ROOT / variant),
+        FAKES__ENABLED="true",
+        FAKES__SEED="0",
+        FAKES__SCRAPE_LATENCY=f"fixed:{latency}",
+        FAKES__LLM_FIRST_TOKEN_LATENCY=f"fixed:{latency}",
+        FAKES__TTS_FIRST_BYTE_LATENCY=f"fixed:{latency}",
+        # Prompt processing, generation and synthesis take no time; only the fixed latency above.
+        FAKES__LLM_PREFILL_TOKENS_PER_SECOND="1e12",
+        FAKES__LLM_TOKENS_PER_SECOND="1e12",
+        FAKES__TTS_CHARS_PER_SECOND="1e12",
+        CACHE__ENABLED="false",
+        PIPELINE__STREAMING="false",
+        OPIK_TRACK_DISABLE="true",
+        TRACING__MODE="off",
+        CREWAI_DISABLE_TELEMETRY="true",
+        OTEL_SDK_DISABLED="true",
+    )
+    # Dummy credentials: some SDKs refuse to build a client without a key.
+    for name in ("GROQ__API_KEY", "FIRECRAWL__API_KEY", "ELEVEN_LABS__API_KEY"):
+        env.setdefault(name, "benchmark")
+    return env
+
+
+def run_probe(variant: str, runs: int, concurrency: int, latency: float) -> dict:
+    with tempfile.TemporaryDirectory(prefix=f"blog2podcast-{variant}-") as workdir:
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE, str(runs), str(concurrency)],
+            cwd=workdir,
+            env=probe_env(variant, latency),
+            capture_output=True,
+            text=True,
+        )
+    lines = [line for line in result.stdout.splitlines() if line.startswith("RESULT ")]
+    if result.returncode != 0 or not lines:
+        raise RuntimeError(f"{variant} failed:\n{result.stderr[-2000:]}")
+    return json.loads(lines[-1][len("RESULT "):])
+
+
+def benchmark(variant: str, runs: int, concurrency: int, latency: float, processes: int) -> dict:
+    samples = [run_probe(variant, runs, concurrency, latency) for _ in range(processes)]
+    run_seconds = [seconds for sample in samples for seconds in sample["run_seconds"]]
+    usage = samples[-1]["usage"]
+    return {
+        "variant": variant,
+        "runs": runs * processes,
+        "latency_seconds": latency,
+        "import_seconds": round(statistics.median(s["import_seconds"] for s in samples), 3),
+        "run_seconds_p50": round(statistics.median(run_seconds), 4),
+        "run_seconds_p95": round(sorted(run_seconds)[min(int(0.95 * len(run_seconds)), len(run_seconds) - 1)], 4),
+        "allocated_kb_per_concurrent_run": (
+            round(statistics.median(s["allocated_per_run"] for s in samples) / 1024, 1) if concurrency else None
+        ),
+        "peak_rss_mb": max(s["peak_rss_mb"] for s in samples),
+        "llm_calls_per_run": round(usage.get("llm_calls", 0) / runs, 2),
+        "prompt_tokens_per_run": round(usage.get("prompt_tokens", 0) / runs),
+        "completion_tokens_per_run": round(usage.get("completion_tokens", 0) / runs),
+    }
+
+
+def compare(reports: list[dict]) -> None:
+    """Add each variant's overhead relative to the leanest one."""
+    fastest = min(r["run_seconds_p50"] for r in reports)
+    fewest_tokens = min(r["prompt_tokens_per_run"] for r in reports)
+    for report in reports:
+        report["extra_run_seconds"] = round(report["run_seconds_p50"] - fastest, 4)
+        report["extra_prompt_tokens_per_run"] = report["prompt_tokens_per_run"] - fewest_tokens
+
+
+def print_table(reports: list[dict]) -> None:
+    columns = [
+        ("variant", "variant", "{}"),
+        ("import s", "import_seconds", "{:.3f}"),
+        ("run p50 s", "run_seconds_p50", "{:.4f}"),
+        ("run p95 s", "run_seconds_p95", "{:.4f}"),
+        ("+run s", "extra_run_seconds", "{:.4f}"),
+        ("KB/run", "allocated_kb_per_concurrent_run", "{}"),
+        ("RSS MB", "peak_rss_mb", "{}"),
+        ("LLM calls", "llm_calls_per_run", "{}"),
+        ("prompt tok", "prompt_tokens_per_run", "{}"),
+        ("+prompt tok", "extra_prompt_tokens_per_run", "{}"),
+    ]
+    print("  ".join(f"{title:>11}" for title, _, _ in columns))
+    for report in reports:
+        print("  ".join(f"{fmt.format(report[key]) if report[key] is not None else '-':>11}" for _, key, fmt in columns))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the framework overhead of each Blog2Podcast variant.")
+    parser.add_argument("--runs", type=int, default=20, help="Sequential runs measured per process.")
+    parser.add_argument("--processes", type=int, default=2, help="Fresh processes per variant.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Runs in flight at once for the memory measurement (0 to skip).")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fixed latency of every provider call in seconds.")
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=VARIANTS)
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON lines instead of a table.")
+    args = parser.parse_args()
+
+    reports = []
+    for variant in args.variants:
+        reports.append(benchmark(variant, args.runs, args.concurrency, args.latency, args.processes))
+        print(f"{variant} done", file=sys.stderr, flush=True)
+    compare(reports)
+    if args.json:
+        for report in reports:
+            print(json.dumps(report), flush=True)
+    else:
+        print_table(reports)
+
+
+if __name__ == "__main__":
+    main()
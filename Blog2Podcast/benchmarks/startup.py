@@ -0,0 +1,85 @@
+"""Cold-start benchmark for the four Blog2Podcast variants.
+
+    python benchmarks/startup.py [--runs 5] [--variants langgraph crew]
+
+Every run starts a fresh interpreter in the variant's directory, imports
+the pipeline entry point and builds the object a request needs (the graph
+or the flow). It reports, per variant, the median time from the first
+import to ready and the median wall time of the whole process, which
+adds interpreter start-up and shutdown.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+GRAPH_ENTRY = (
+    "from src.agent.graph import BlogToPodcastGraph\n"
+    "BlogToPodcastGraph(url='https://example.com/post')\n"
+)
+ENTRY_POINTS = {
+    "langgraph": GRAPH_ENTRY,
+    "autogen": GRAPH_ENTRY,
+    "google-adk": GRAPH_ENTRY,
+    "crew": (
+        "from src.agent.blog2postcast_flow import Blog2PodcastFlow\n"
+        "Blog2PodcastFlow()\n"
+    ),
+}
+
+PROBE = """
+import time
+started = time.perf_counter()
+{entry}
+print("READY", time.perf_counter() - started)
+"""
+
+
+def run_once(variant: str) -> dict:
+    env = dict(os.environ)
+    # Dummy credentials: some SDKs refuse to build a client without a key.
+    for name in ("GROQ__API_KEY", "FIRECRAWL__API_KEY", "ELEVEN_LABS__API_KEY"):
+        env.setdefault(name, "benchmark")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(entry=ENTRY_POINTS[variant])],
+        cwd=ROOT / variant,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - started
+    ready = [line for line in result.stdout.splitlines() if line.startswith("READY ")]
+    if result.returncode != 0 or not ready:
+        raise RuntimeError(f"{variant} failed to start:\n{result.stderr[-2000:]}")
+    return {"ready": float(ready[-1].split()[1]), "wall": wall}
+
+
+def benchmark(variant: str, runs: int) -> dict:
+    samples = [run_once(variant) for _ in range(runs)]
+    return {
+        "variant": variant,
+        "runs": runs,
+        "import_to_ready_seconds": round(statistics.median(s["ready"] for s in samples), 3),
+        "process_seconds": round(statistics.median(s["wall"] for s in samples), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure cold-start time of each Blog2Podcast variant.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per variant.")
+    parser.add_argument("--variants", nargs="+", choices=sorted(ENTRY_POINTS), default=list(ENTRY_POINTS))
+    args = parser.parse_args()
+
+    for variant in args.variants:
+        print(json.dumps(benchmark(variant, args.runs)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
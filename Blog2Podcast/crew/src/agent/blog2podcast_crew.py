@@ -9,13 +9,12 @@ class Blog2PodcastAssistantCrew:
 
     agents_config = "config/agents.yaml"
     tasks_config = "config/tasks.yaml"
-    llm = get_groq_client()
 
     @agent
     def blog2podcast(self) -> Agent:
         return Agent(
             config=self.agents_config["blog2podcast"],
-            llm=self.llm,
+            llm=get_groq_client(),
         )
 
     @task
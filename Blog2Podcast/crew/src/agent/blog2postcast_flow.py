@@ -1,82 +1,275 @@
-import uuid
+import asyncio
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
 from loguru import logger
-import opik
 from crewai.flow.flow import Flow, listen, start
+from crewai.flow.persistence import persist
 
+from src.agent.flow_persistence import CompressedSQLiteFlowPersistence
 from src.agent.state import BlogToPodcastState
-from src.observability.opik_utils import configure
-from src.clients.firecrawl import get_firecrawl_client
-from src.clients.elevenlabs import get_elevenlabs_client
+from src.observability.opik_utils import track
+from src.observability.tracing import span
+from src.clients.firecrawl import get_async_firecrawl_client
+from src.clients.elevenlabs import get_async_elevenlabs_client
+from src.clients.grok import get_groq_map_client
+from src.clients.ratelimit import get_rate_limiter
+from src.clients.resilience import acall_provider
+from src.agent.admission import BATCH, INTERACTIVE, get_admission_controller
 from src.agent.blog2podcast_crew import Blog2PodcastAssistantCrew
-
-configure()
+from src.agent.chunking import estimate_tokens
+from src.agent.limits import get_stage_limiter
+from src.agent.preprocess import preprocess
+from src.agent.prompt import get_map_prompt
+from src.agent.singleflight import acoalesce, coalesce
+from src.agent.summarize import acondense, use_map_reduce
+from src.audio.tts import asynthesize_script
+from src.cache.scrape_cache import get_scrape_cache, normalize_url
+from src.cache.script_cache import get_script_cache, groq_model_settings, script_cache_key
+from src.cache.tts_cache import tts_cache_key
+from src.config import settings
+from src.observability.metrics import AUDIO_BYTES_WRITTEN
+from src.storage.artifacts import get_artifact_store
 
 log = logger.bind(tags=["blog2podcast-agent"])
 
+CREW_CONFIG_DIR = Path(__file__).parent / "config"
+
+flow_persistence = CompressedSQLiteFlowPersistence(
+    db_path=settings.checkpoint.path,
+    max_flows=settings.checkpoint.max_stored_threads,
+    retention_seconds=settings.checkpoint.retention_seconds,
+)
+
 
+@persist(flow_persistence)
 class Blog2PodcastFlow(Flow[BlogToPodcastState]):
+    """Blog to podcast flow.
+
+    The steps are coroutines, so ``kickoff_async`` runs the whole flow on the
+    caller's event loop while ``kickoff`` keeps working for synchronous callers.
+
+    The state is saved after every step. A flow restored with ``resume`` runs
+    its steps again, and each step skips itself when its output is already in
+    the restored state, so a failed run continues at the step that failed.
+    """
+
+    # The flow never recalls or remembers anything; skipping crewai's automatic
+    # flow memory avoids loading its vector store on every instantiation.
+    _skip_auto_memory: bool = True
 
     @start()
-    @opik.track(name="scraping-url", capture_input=False, capture_output=False)
-    def scrape_blog_content_with_firecrawl(self):
+    @track(name="scraping-url", capture_input=False, capture_output=False)
+    async def scrape_blog_content_with_firecrawl(self):
         url = self.state.url
+        if self.state.blog_content:
+            log.info(f"Blog content for {url} restored from the saved state")
+            return
         log.info(f"Scraping content from URL: {url}")
-        client = get_firecrawl_client()
-        response = client.scrape(url, formats=["markdown"], only_main_content=True)
-        self.state.blog_content = response.markdown
+
+        async def scrape():
+            if settings.cache.enabled:
+                return await get_scrape_cache().aget_or_scrape(url, _scrape)
+            return await _scrape(url)
+
+        self.state.blog_content = await acoalesce(("scrape", normalize_url(url)), scrape)
 
     @listen(scrape_blog_content_with_firecrawl)
-    @opik.track(name="summarizing-content", capture_input=False, capture_output=False)
-    def summarize_blog_content(self):
+    @track(name="preprocessing-content", capture_input=False, capture_output=False)
+    async def preprocess_blog_content(self):
+        # Skipped when restored, so the cleaned content is not cleaned again.
+        if self.state.preprocess_stats or not self.state.blog_content or not settings.preprocess.enabled:
+            return
+        self.state.blog_content, self.state.preprocess_stats = preprocess(self.state.blog_content)
+
+    @listen(preprocess_blog_content)
+    @track(name="summarizing-content", capture_input=False, capture_output=False)
+    async def summarize_blog_content(self):
         blog_content = self.state.blog_content
+        if self.state.podcast_script:
+            log.info("Podcast script restored from the saved state")
+            return
         log.info(f"Summarizing blog content of length {len(blog_content)} characters")
         if not blog_content:
             return {}
         try:
-            output = (
-                Blog2PodcastAssistantCrew()
-                .crew()
-                .kickoff(inputs={"blog_content": blog_content})
-            )
-            self.state.podcast_script = output.raw
+            map_reduce = use_map_reduce(blog_content)
+
+            async def generate():
+                async with get_stage_limiter().aslot("summarize"):
+                    return await acall_provider("groq", write_script, timeout=settings.resilience.summarize_timeout_seconds)
+
+            async def write_script():
+                # Long posts are condensed chunk by chunk first; the crew writes the script from the notes.
+                content = await acondense(blog_content, _acomplete) if map_reduce else blog_content
+                # LiteLLM has its own HTTP session, so the Groq quota is applied around the crew run.
+                output = await get_rate_limiter("groq").acall(
+                    lambda: get_crew().copy().kickoff_async(inputs={"blog_content": content}),
+                    requests=1,
+                    tokens=estimate_tokens(content) + settings.groq.max_tokens,
+                )
+                return output.raw
+
+            prompt = _crew_prompt()
+            model_settings = groq_model_settings()
+            if map_reduce:
+                prompt += get_map_prompt().prompt
+                model_settings.update(
+                    chunk_tokens=settings.summarization.chunk_tokens,
+                    map_max_tokens=settings.summarization.map_max_tokens,
+                )
+            version = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+            key = script_cache_key(blog_content, prompt, version, model_settings)
+            if settings.cache.enabled:
+                self.state.podcast_script = await acoalesce(
+                    ("summarize", key), lambda: get_script_cache().aget_or_generate(key, generate)
+                )
+            else:
+                self.state.podcast_script = await acoalesce(("summarize", key), generate)
         except Exception as e:
+            # Fail the flow, so it can be resumed from this step, rather than voicing an empty script.
             log.error(f"Error during summarization: {e}")
-            return {}
+            raise
 
     @listen(summarize_blog_content)
-    @opik.track(name="generating-audio", capture_input=False, capture_output=False)
-    def generate_audio(self):
+    @track(name="generating-audio", capture_input=False, capture_output=False)
+    async def generate_audio(self):
         summary = self.state.podcast_script
+        if self.state.audio_file:
+            log.info("Audio file restored from the saved state")
+            return
         log.info(f"Generating audio from podcast script of length {len(summary)} characters")
         if not summary:
             return {}
-        client = get_elevenlabs_client()
-        audio = client.text_to_speech.convert(
-            voice_id="pNInz6obpgDQGcFmaJgB",  # Adam pre-made voice
-            optimize_streaming_latency="0",
-            output_format="mp3_22050_32",
-            text=summary,
-            model_id="eleven_multilingual_v2",
+
+        async def write():
+            client = get_async_elevenlabs_client()
+            # Stored under the hash of its content, so identical audio is kept once.
+            async with get_stage_limiter().aslot("tts"):
+                with get_artifact_store().writer(".mp3") as f:
+                    async for chunk in asynthesize_script(client, summary):
+                        if chunk:
+                            f.write(chunk)
+                            AUDIO_BYTES_WRITTEN.inc(len(chunk))
+            return f.path
+
+        # Flows generating audio for the same script at the same time share one file.
+        key = tts_cache_key(
+            summary, settings.eleven_labs.voice_id, settings.eleven_labs.model_id, settings.eleven_labs.output_format
         )
-        # Generating a unique file name for the output MP3 file
-        save_file_path = f"{uuid.uuid4()}.mp3"
-        # Writing the audio stream to the file
+        self.state.audio_file = await acoalesce(("tts", key), write)
+
+@lru_cache(maxsize=1)
+def get_crew():
+    """The crew is assembled once per process; each run kicks off its own copy,
+    because a crew keeps the outputs of its current run on its tasks."""
+    return Blog2PodcastAssistantCrew().crew()
+
+
+async def _scrape(url: str) -> str:
+    client = get_async_firecrawl_client()
+    async with get_stage_limiter().aslot("scrape"):
+        # The Firecrawl SDK has its own HTTP session, so its quota is applied around the call.
+        response = await acall_provider(
+            "firecrawl",
+            lambda: get_rate_limiter("firecrawl").acall(
+                lambda: client.scrape(url, formats=["markdown"], only_main_content=True), requests=1
+            ),
+            timeout=settings.resilience.scrape_timeout_seconds,
+            hedge=True,
+        )
+    return response.markdown
+
+
+async def _acomplete(prompt: str) -> str:
+    return await get_rate_limiter("groq").acall(
+        lambda: get_groq_map_client().acall(prompt),
+        requests=1,
+        tokens=estimate_tokens(prompt) + settings.summarization.map_max_tokens,
+    )
 
-        with open(save_file_path, "wb") as f:
-            for chunk in audio:
-                if chunk:
-                    f.write(chunk)
-        self.state.audio_file = save_file_path
 
-def kickoff(url: str) -> dict:
+def _crew_prompt() -> str:
+    """The agent and task definitions play the role of the prompt for the crew."""
+    return "\n".join(
+        (CREW_CONFIG_DIR / name).read_text(encoding="utf-8") for name in ("agents.yaml", "tasks.yaml")
+    )
+
+
+def kickoff(url: str, priority: int = INTERACTIVE) -> dict:
+    """
+    Run the flow. A call for a URL that is already being converted waits
+    for that run and returns its final state; others wait for an admission
+    slot first, behind the runs of higher ``priority``.
+    """
+    def run():
+        blog2podcast_flow = Blog2PodcastFlow()
+        blog2podcast_flow.state.url = url
+        with get_admission_controller().admit(priority):
+            blog2podcast_flow.kickoff()
+        return blog2podcast_flow.state.dict()
+
+    with span("blog2podcast-run", url=url):
+        return coalesce(("pipeline", normalize_url(url)), run)
+
+async def akickoff(url: str, flow_id: Optional[str] = None, priority: int = INTERACTIVE) -> dict:
     """
-    Run the flow.
+    Run the flow on the running event loop. ``flow_id`` names the saved state,
+    so a failed run can be continued with ``aresume(flow_id)``.
     """
+    async def run():
+        blog2podcast_flow = Blog2PodcastFlow()
+        if flow_id:
+            blog2podcast_flow.state.id = flow_id
+        blog2podcast_flow.state.url = url
+        async with get_admission_controller().aadmit(priority, key=flow_id):
+            await blog2podcast_flow.kickoff_async()
+        return blog2podcast_flow.state.dict()
+
+    with span("blog2podcast-run", url=url, flow_id=flow_id):
+        return await acoalesce(("pipeline", normalize_url(url)), run)
+
+def resume(flow_id: str) -> dict:
+    """
+    Continue a saved flow at the first step whose output is missing.
+    """
+    return asyncio.run(aresume(flow_id))
+
+async def aresume(flow_id: str, priority: int = INTERACTIVE) -> dict:
+    """
+    Asynchronous ``resume``. Raises ``ValueError`` when no state is saved under ``flow_id``.
+    """
+    if await asyncio.to_thread(flow_persistence.load_state, flow_id) is None:
+        raise ValueError(f"No saved state found for flow {flow_id!r}")
     blog2podcast_flow = Blog2PodcastFlow()
-    blog2podcast_flow.state.url = url
-    blog2podcast_flow.kickoff()
+    with span("blog2podcast-run", flow_id=flow_id, resume=True):
+        async with get_admission_controller().aadmit(priority, key=flow_id):
+            await blog2podcast_flow.kickoff_async(inputs={"id": flow_id})
     return blog2podcast_flow.state.dict()
 
+async def akickoff_many(urls: Iterable[str], max_in_flight: Optional[int] = None) -> list:
+    """
+    Run the flow for many URLs concurrently, at most ``max_in_flight`` at a time.
+    The per-stage limits from ``settings.pipeline`` let the stages overlap across
+    URLs. Results come back in input order, with the exception in place of the
+    state for URLs that failed. The runs are admitted as batch work, after any
+    waiting interactive runs.
+    """
+    semaphore = asyncio.Semaphore(max_in_flight or settings.pipeline.batch_max_in_flight)
+
+    async def run(url):
+        async with semaphore:
+            return await akickoff(url, priority=BATCH)
+
+    return await asyncio.gather(*(run(url) for url in urls), return_exceptions=True)
+
+def kickoff_many(urls: Iterable[str], max_in_flight: Optional[int] = None) -> list:
+    """
+    Synchronous wrapper around ``akickoff_many``.
+    """
+    return asyncio.run(akickoff_many(urls, max_in_flight=max_in_flight))
+
 def plot():
     """
     Plot the flow.
@@ -0,0 +1,94 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Optional
+
+from crewai.flow.persistence.base import FlowPersistence
+from loguru import logger
+from pydantic import BaseModel, PrivateAttr
+
+
+class CompressedSQLiteFlowPersistence(FlowPersistence):
+    """Flow state persistence that keeps the latest state of each flow.
+
+    Unlike crewai's ``SQLiteFlowPersistence`` it does not append a row per
+    completed step: a flow's state is overwritten after every step and
+    stored zlib-compressed, so the scraped blog and the script are kept
+    once per run. Flows idle for longer than ``retention_seconds`` and the
+    least recently used beyond ``max_flows`` are deleted. The database is
+    opened on first use, so building the persistence costs nothing at
+    import time.
+    """
+
+    persistence_type: str = "CompressedSQLiteFlowPersistence"
+    db_path: str
+    max_flows: int = 0
+    retention_seconds: float = 0
+
+    _conn: Optional[sqlite3.Connection] = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def init_db(self) -> None:
+        path = Path(self.db_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS flow_states ("
+            " flow_uuid TEXT PRIMARY KEY,"
+            " method_name TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " state BLOB NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS flow_states_updated_at ON flow_states (updated_at)")
+
+    def save_state(self, flow_uuid: str, method_name: str, state_data: dict[str, Any] | BaseModel) -> None:
+        if isinstance(state_data, BaseModel):
+            state_data = state_data.model_dump(mode="json")
+        state = zlib.compress(json.dumps(state_data).encode("utf-8"))
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO flow_states (flow_uuid, method_name, updated_at, state) VALUES (?, ?, ?, ?)",
+                (flow_uuid, method_name, time.time(), state),
+            )
+            self._evict(conn, keep=flow_uuid)
+
+    def load_state(self, flow_uuid: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT state FROM flow_states WHERE flow_uuid = ?", (flow_uuid,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def delete_state(self, flow_uuid: str) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM flow_states WHERE flow_uuid = ?", (flow_uuid,))
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.init_db()
+        return self._conn
+
+    def _evict(self, conn: sqlite3.Connection, keep: str) -> None:
+        evicted = 0
+        if self.retention_seconds:
+            evicted += conn.execute(
+                "DELETE FROM flow_states WHERE updated_at < ? AND flow_uuid != ?",
+                (time.time() - self.retention_seconds, keep),
+            ).rowcount
+        if self.max_flows:
+            evicted += conn.execute(
+                "DELETE FROM flow_states WHERE flow_uuid IN ("
+                " SELECT flow_uuid FROM flow_states ORDER BY updated_at DESC LIMIT -1 OFFSET ?)"
+                " AND flow_uuid != ?",
+                (self.max_flows, keep),
+            ).rowcount
+        if evicted:
+            logger.debug(f"Evicted {evicted} stored flow states")
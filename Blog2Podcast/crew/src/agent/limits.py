@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from typing import Optional
+
+from src.config import settings
+from src.observability.metrics import SLOT_WAIT_SECONDS
+
+# Recent slot timings kept per stage.
+_TIMING_SAMPLES = 10000
+
+
+class _Waiter:
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+        self.admitted = False
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _Slots:
+    """``limit`` slots of one stage, taken in arrival order by threads and event loops alike."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._taken = 0
+        self._waiters: deque[_Waiter] = deque()
+
+    def enter(self, loop: Optional[asyncio.AbstractEventLoop]) -> Optional[_Waiter]:
+        """Take a slot, or ``None``; otherwise the waiter that is woken once it has been handed one."""
+        with self._lock:
+            if self._taken < self.limit:
+                self._taken += 1
+                return None
+            waiter = _Waiter(loop)
+            self._waiters.append(waiter)
+            return waiter
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                # The slot passes to the next in line without being freed, so no newcomer can take it first.
+                waiter = self._waiters.popleft()
+                waiter.admitted = True
+                waiter.wake()
+                return
+            self._taken -= 1
+
+    def abandon(self, waiter: _Waiter) -> None:
+        """A waiter gave up (cancelled or interrupted): leave the line, or pass on a slot it was just given."""
+        with self._lock:
+            if not waiter.admitted:
+                self._waiters.remove(waiter)
+                return
+        self.release()
+
+
+class StageLimiter:
+    """Caps how many pipelines may be inside each stage at the same time.
+
+    Giving scrape, summarize and TTS separate limits lets a batch pipeline:
+    while some URLs wait on TTS, others are already being scraped or
+    summarized. A limit of ``0`` leaves the stage unbounded. Threads and
+    event loops, however many, take their slots from the same count and
+    wait in one line. How long runs waited for a slot and then held it is
+    recorded per stage.
+    """
+
+    def __init__(self, limits: dict[str, int]) -> None:
+        self.limits = limits
+        self._slots = {stage: _Slots(limit) for stage, limit in limits.items() if limit > 0}
+        self._lock = threading.Lock()
+        self._in_flight = {stage: 0 for stage in limits}
+        self._timings: dict[str, dict[str, deque]] = {}
+
+    @contextmanager
+    def slot(self, stage: str):
+        slots = self._slots.get(stage)
+        requested = time.perf_counter()
+        if slots is not None:
+            waiter = slots.enter(None)
+            if waiter is not None:
+                try:
+                    waiter.event.wait()
+                except BaseException:
+                    slots.abandon(waiter)
+                    raise
+        try:
+            with self._track(stage, requested):
+                yield
+        finally:
+            if slots is not None:
+                slots.release()
+
+    @asynccontextmanager
+    async def aslot(self, stage: str):
+        slots = self._slots.get(stage)
+        requested = time.perf_counter()
+        if slots is not None:
+            waiter = slots.enter(asyncio.get_running_loop())
+            if waiter is not None:
+                try:
+                    await waiter.future
+                except BaseException:
+                    slots.abandon(waiter)
+                    raise
+        try:
+            with self._track(stage, requested):
+                yield
+        finally:
+            if slots is not None:
+                slots.release()
+
+    def in_flight(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._in_flight)
+
+    def timings(self, reset: bool = False) -> dict[str, dict[str, list[float]]]:
+        """Recent seconds spent waiting for and holding a slot (``wait`` and ``run``), per stage."""
+        with self._lock:
+            timings = {stage: {kind: list(samples) for kind, samples in kinds.items()} for stage, kinds in self._timings.items()}
+            if reset:
+                self._timings.clear()
+        return timings
+
+    @contextmanager
+    def _track(self, stage: str, requested: float):
+        acquired = time.perf_counter()
+        SLOT_WAIT_SECONDS.observe(acquired - requested, stage=stage)
+        with self._lock:
+            self._in_flight[stage] = self._in_flight.get(stage, 0) + 1
+        try:
+            yield
+        finally:
+            released = time.perf_counter()
+            with self._lock:
+                self._in_flight[stage] -= 1
+                timings = self._timings.setdefault(
+                    stage, {"wait": deque(maxlen=_TIMING_SAMPLES), "run": deque(maxlen=_TIMING_SAMPLES)}
+                )
+                timings["wait"].append(acquired - requested)
+                timings["run"].append(released - acquired)
+
+
+@lru_cache(maxsize=1)
+def get_stage_limiter() -> StageLimiter:
+    return StageLimiter(
+        {
+            "scrape": settings.pipeline.scrape_concurrency,
+            "summarize": settings.pipeline.summarize_concurrency,
+            "tts": settings.pipeline.tts_concurrency,
+        }
+    )
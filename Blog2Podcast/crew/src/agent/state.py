@@ -3,5 +3,6 @@ from crewai.flow.flow import FlowState
 class BlogToPodcastState(FlowState):
     url: str = ""
     blog_content: str = ""
+    preprocess_stats: dict = {}
     podcast_script: str = ""
     audio_file: str = ""
\ No newline at end of file
@@ -1,6 +1,24 @@
+import os
+
+from src.agent.admission import QueueFullError
+from src.api import audio_url, start_api_server
+from src.clients.http import start_warm_up
+from src.config import settings
+from src.jobs.queue import get_job_queue
+from src.jobs.store import DONE, FAILED
+from src.observability.metrics import start_metrics_server
+from src.observability.opik_utils import configure_in_background
 
 import streamlit as st
-from src.agent.blog2postcast_flow import kickoff
+
+STAGE_LABELS = {
+    "scraping-url": "Scraping the blog post",
+    "preprocessing-content": "Cleaning up the content",
+    "summarizing-content": "Writing the podcast script",
+    "summarizing-chunks": "Taking notes on a long post",
+    "generating-audio": "Recording the audio",
+    "streaming-script-to-audio": "Writing and recording the podcast",
+}
 
 
 st.set_page_config(
@@ -13,6 +31,49 @@ st.markdown(
     "</h1>",
     unsafe_allow_html=True,
 )
+configure_in_background()
+start_warm_up()
+start_metrics_server()
+# Conversions run on the process-wide job queue, not in this script run.
+if settings.api.public_url:
+    # Browsers stream the audio in ranges from the API. When another process already serves it on the
+    # port, that process runs the jobs too, and this one only submits and shows them.
+    jobs = get_job_queue(run_workers=start_api_server() is not None)
+else:
+    jobs = get_job_queue()
+
+
+@st.fragment(run_every=settings.jobs.poll_interval_seconds)
+def show_progress(job_id):
+    job = jobs.get(job_id)
+    if job is None or job.finished:
+        # A full rerun shows the result; this fragment is then no longer drawn, which ends the polling.
+        st.rerun()
+    position = jobs.position(job_id)
+    if position is not None:
+        st.info(f"⏳ Waiting for a free slot: you are number {position} in line...")
+    elif job.started_at is None:
+        st.info("⏳ Waiting for a free worker...")
+    else:
+        st.info(f"⏳ {STAGE_LABELS.get(job.stage, 'Working')}... ({job.seconds:.0f}s)")
+
+
+def show_output(job):
+    output = job.result
+    st.subheader("📝 Blog Content")
+    st.text_area("Content", output["blog_content"], height=300)
+    stats = output.get("preprocess_stats")
+    if stats:
+        st.caption(f"Cleaned for the LLM: {stats['tokens_before']} → {stats['tokens_after']} tokens")
+
+    st.subheader("📜 Podcast Script")
+    st.text_area("Script", output["podcast_script"], height=300)
+
+    if output["audio_file"] and os.path.exists(output["audio_file"]):
+        st.subheader("🔊 Podcast Audio")
+        # Without a URL browsers reach the API at, Streamlit sends the file itself.
+        st.audio(audio_url(job.id) or output["audio_file"], format="audio/mpeg")
+
 
 url = st.text_input(
     "🔗 Enter the URL of the blog post you want to convert to a podcast",
@@ -24,21 +85,27 @@ if generate_button:
     if not url:
         st.error("❗ Please enter a valid URL.")
     else:
-        with st.spinner("⏳ Scraping and generating podcast..."):
-            try:
-                output = kickoff(url=url)
-                st.session_state["output"] = output
-
-                st.subheader("📝 Blog Content")
-                st.text_area("Content", output["blog_content"], height=300)
-
-                st.subheader("📜 Podcast Script")
-                print(output)
-                st.text_area("Script", output["podcast_script"], height=300)
-
-                if output["audio_file"]:
-                    st.subheader("🔊 Podcast Audio")
-                    audio_file = open(output["audio_file"], "rb")
-                    st.audio(audio_file, format="audio/mp3")
-            except Exception as e:
-                st.error(f"❌ An error occurred: {e}")
+        try:
+            job = jobs.submit(url)
+        except QueueFullError as e:
+            st.error(f"⏸️ {e}")
+        else:
+            st.session_state["job_id"] = job.id
+            # In the URL too, so a reloaded page or a reconnecting browser finds the job again.
+            st.query_params["job"] = job.id
+
+job_id = st.session_state.get("job_id") or st.query_params.get("job")
+if job_id:
+    job = jobs.get(job_id)
+    if job is None:
+        st.warning("This job is no longer available; please generate the podcast again.")
+    elif job.status == DONE:
+        st.session_state["output"] = job.result
+        show_output(job)
+    elif job.status == FAILED:
+        st.error(f"❌ An error occurred: {job.error}")
+        if st.button("🔁 Retry"):
+            jobs.retry(job_id)
+            st.rerun()
+    else:
+        show_progress(job_id)
@@ -0,0 +1,86 @@
+import re
+
+SENTENCE_BOUNDARY = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"'”’)\]]))\s+")
+PARAGRAPH_BOUNDARY = re.compile(r"\n\s*\n")
+
+
+def normalize_segment(text: str) -> str:
+    return " ".join(text.split())
+
+
+def split_sentences(text: str) -> list[str]:
+    sentences = []
+    for paragraph in PARAGRAPH_BOUNDARY.split(text):
+        for sentence in SENTENCE_BOUNDARY.split(paragraph):
+            sentence = normalize_segment(sentence)
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+
+def _split_long(sentence: str, max_chars: int) -> list[str]:
+    pieces, current = [], ""
+    for word in sentence.split(" "):
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_segments(text: str, max_chars: int) -> list[str]:
+    """Split ``text`` into segments of at most ``max_chars`` characters.
+
+    Whole sentences are packed together within a paragraph; a segment never
+    spans a paragraph break, so editing one paragraph leaves the segments of
+    the others untouched. Sentences longer than the budget are split between
+    words. A budget of ``0`` yields one segment per sentence.
+    """
+    segments = []
+    for paragraph in PARAGRAPH_BOUNDARY.split(text):
+        current = ""
+        for sentence in split_sentences(paragraph):
+            if max_chars <= 0:
+                segments.append(sentence)
+                continue
+            if len(sentence) > max_chars:
+                if current:
+                    segments.append(current)
+                    current = ""
+                segments.extend(_split_long(sentence, max_chars))
+            elif current and len(current) + 1 + len(sentence) > max_chars:
+                segments.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            segments.append(current)
+    return segments
+
+
+class SentenceStream:
+    """Cuts complete sentences out of text that arrives in pieces, e.g. LLM tokens.
+
+    A sentence is complete once its terminator is followed by whitespace, so
+    the last, possibly unfinished sentence stays buffered until more text or
+    :meth:`flush` arrives.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        self._buffer += text
+        boundaries = list(SENTENCE_BOUNDARY.finditer(self._buffer)) + list(PARAGRAPH_BOUNDARY.finditer(self._buffer))
+        if not boundaries:
+            return []
+        end = max(match.end() for match in boundaries)
+        complete, self._buffer = self._buffer[:end], self._buffer[end:]
+        return split_sentences(complete)
+
+    def flush(self) -> list[str]:
+        remainder, self._buffer = self._buffer, ""
+        return split_sentences(remainder)
@@ -0,0 +1,73 @@
+"""Compare single-request TTS against segmented, concurrent TTS.
+
+Runs against a simulated ElevenLabs client whose latency is a fixed
+time-to-first-byte plus a per-character generation time, so the numbers
+are reproducible without an API key:
+
+    python -m src.benchmarks.tts --chars 6000 --workers 4
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("CACHE__ENABLED", "false")
+
+from src.audio.tts import synthesize_script, text_to_speech  # noqa: E402
+
+SAMPLE_PARAGRAPH = (
+    "Large language models have changed how we build software. They can summarize, translate and reason "
+    "about text in ways that felt impossible a few years ago. Still, every call costs time and money. "
+    "In this episode we look at where that time goes and how to get it back."
+)
+
+
+class SimulatedTextToSpeech:
+    def __init__(self, first_byte: float, per_char: float) -> None:
+        self.first_byte = first_byte
+        self.per_char = per_char
+
+    def convert(self, voice_id, text, **kwargs):
+        time.sleep(self.first_byte + self.per_char * len(text))
+        yield text.encode("utf-8")
+
+
+class SimulatedElevenLabs:
+    def __init__(self, first_byte: float, per_char: float) -> None:
+        self.text_to_speech = SimulatedTextToSpeech(first_byte, per_char)
+
+
+def build_script(chars: int) -> str:
+    paragraphs = []
+    while sum(len(p) for p in paragraphs) < chars:
+        paragraphs.append(f"Part {len(paragraphs) + 1}. {SAMPLE_PARAGRAPH}")
+    return "\n\n".join(paragraphs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chars", type=int, default=6000, help="Approximate script length in characters.")
+    parser.add_argument("--segment-chars", type=int, default=800, help="Character budget per TTS request.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent TTS requests.")
+    parser.add_argument("--first-byte", type=float, default=0.3, help="Simulated time to first byte in seconds.")
+    parser.add_argument("--per-char", type=float, default=0.001, help="Simulated generation seconds per character.")
+    args = parser.parse_args()
+
+    client = SimulatedElevenLabs(args.first_byte, args.per_char)
+    script = build_script(args.chars)
+
+    started = time.perf_counter()
+    single = text_to_speech(client, script)
+    single_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    segmented = b"".join(synthesize_script(client, script, max_chars=args.segment_chars, max_workers=args.workers))
+    segmented_seconds = time.perf_counter() - started
+
+    print(f"script characters:     {len(script)}")
+    print(f"single request:        {single_seconds:.2f}s ({len(single)} bytes)")
+    print(f"segmented x{args.workers} workers: {segmented_seconds:.2f}s ({len(segmented)} bytes)")
+    print(f"speedup:               {single_seconds / segmented_seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
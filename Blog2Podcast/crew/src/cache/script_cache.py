@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import json
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+
+from src.cache.backends import CacheBackend, CacheEntry, create_backend
+from src.config import settings
+
+
+def script_cache_key(blog_content: str, prompt: str, prompt_version: str, model_settings: dict) -> str:
+    """Hash of every input that determines the generated podcast script."""
+    payload = json.dumps(
+        {
+            "content": hashlib.sha256(blog_content.encode("utf-8")).hexdigest(),
+            "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+            "prompt_version": prompt_version,
+            "model": model_settings,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def groq_model_settings() -> dict:
+    return {
+        "model": settings.groq.model,
+        "temperature": settings.groq.temperature,
+        "max_tokens": settings.groq.max_tokens,
+    }
+
+
+class ScriptCache:
+    """Memoizes generated podcast scripts.
+
+    The key covers the blog content, the prompt text and version and the model
+    settings, so a new prompt version or model configuration never reuses a
+    script produced by the previous one.
+    """
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        logger.debug(f"Podcast script cache hit for {key[:12]}")
+        return entry.value.decode("utf-8")
+
+    def set(self, key: str, script: str) -> None:
+        if script:
+            self.backend.set(key, CacheEntry(script.encode("utf-8")))
+
+    def get_or_generate(self, key: str, generate: Callable[[], str]) -> str:
+        script = self.get(key)
+        if script is None:
+            script = generate()
+            self.set(key, script)
+        return script
+
+    async def aget(self, key: str) -> Optional[str]:
+        """:meth:`get` off the event loop, as the on-disk backend blocks."""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, script: str) -> None:
+        await asyncio.to_thread(self.set, key, script)
+
+    async def aget_or_generate(self, key: str, generate: Callable[[], Awaitable[str]]) -> str:
+        script = await self.aget(key)
+        if script is None:
+            script = await generate()
+            await self.aset(key, script)
+        return script
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+
+@lru_cache(maxsize=1)
+def get_script_cache() -> ScriptCache:
+    backend = create_backend(
+        settings.cache.backend,
+        name="scripts",
+        directory=settings.cache.directory,
+        ttl=settings.cache.script_max_age_seconds,
+        max_entries=settings.cache.script_max_entries,
+    )
+    return ScriptCache(backend)
@@ -1,5 +1,32 @@
-from elevenlabs.client import ElevenLabs
+from functools import lru_cache
+
+from src.clients.http import get_async_http_client, get_http_client, per_event_loop
 from src.config import settings
 
+@lru_cache(maxsize=1)
 def get_elevenlabs_client():
-    return ElevenLabs(api_key=settings.eleven_labs.api_key)
\ No newline at end of file
+    if settings.fakes.enabled:
+        from src.clients.fakes import FakeElevenLabs
+
+        return FakeElevenLabs()
+    from elevenlabs.client import ElevenLabs
+
+    return ElevenLabs(
+        api_key=settings.eleven_labs.api_key,
+        timeout=settings.clients.timeout_seconds,
+        httpx_client=get_http_client("elevenlabs"),
+    )
+
+@per_event_loop
+def get_async_elevenlabs_client():
+    if settings.fakes.enabled:
+        from src.clients.fakes import FakeAsyncElevenLabs
+
+        return FakeAsyncElevenLabs()
+    from elevenlabs.client import AsyncElevenLabs
+
+    return AsyncElevenLabs(
+        api_key=settings.eleven_labs.api_key,
+        timeout=settings.clients.timeout_seconds,
+        httpx_client=get_async_http_client("elevenlabs"),
+    )
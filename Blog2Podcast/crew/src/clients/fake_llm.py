@@ -0,0 +1,23 @@
+"""crewai adapter of the fake Groq model in ``src.clients.fakes``."""
+from crewai.llms.base_llm import BaseLLM
+
+from src.clients.fakes import FakeChatModel
+
+
+class FakeGroqLLM(BaseLLM):
+    """Answers like Groq would under the fake latency settings, for the crew agent and the map step."""
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None,
+             from_agent=None, response_model=None):
+        return self._format(messages, FakeChatModel(self.max_tokens).invoke(messages).content)
+
+    async def acall(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None,
+                    from_agent=None, response_model=None):
+        return self._format(messages, (await FakeChatModel(self.max_tokens).ainvoke(messages)).content)
+
+    @staticmethod
+    def _format(messages, answer: str) -> str:
+        # Agents send a conversation and parse the reply for the final answer; plain prompts get the text.
+        if isinstance(messages, str):
+            return answer
+        return f"Thought: I now can give a great answer\nFinal Answer: {answer}"
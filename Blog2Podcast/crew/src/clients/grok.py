@@ -1,7 +1,15 @@
-from crewai import LLM
+from functools import lru_cache
+
 from src.config import settings
 
+@lru_cache(maxsize=1)
 def get_groq_client():
+    if settings.fakes.enabled:
+        from src.clients.fake_llm import FakeGroqLLM
+
+        return FakeGroqLLM(model=f"groq/{settings.groq.model}", max_tokens=settings.groq.max_tokens)
+    from crewai import LLM
+
     return LLM(
         model=f"groq/{settings.groq.model}",  # LiteLLM requires the "groq/" prefix
         api_key=settings.groq.api_key,
@@ -9,6 +17,22 @@ def get_groq_client():
         max_tokens=settings.groq.max_tokens,
     )
 
+@lru_cache(maxsize=1)
+def get_groq_map_client():
+    """Groq LLM for the map step of map-reduce summarization, which writes short notes per chunk."""
+    if settings.fakes.enabled:
+        from src.clients.fake_llm import FakeGroqLLM
+
+        return FakeGroqLLM(model=f"groq/{settings.groq.model}", max_tokens=settings.summarization.map_max_tokens)
+    from crewai import LLM
+
+    return LLM(
+        model=f"groq/{settings.groq.model}",
+        api_key=settings.groq.api_key,
+        temperature=settings.groq.temperature,
+        max_tokens=settings.summarization.map_max_tokens,
+    )
+
 if __name__ == "__main__":
     client = get_groq_client()
     response = client.chat("What is the capital of France?")
@@ -0,0 +1,357 @@
+"""Circuit breakers, stage timeouts and hedged requests for the provider calls.
+
+Every provider gets one :class:`CircuitBreaker` per process. After
+repeated failures it opens and calls fail fast with
+:class:`CircuitOpenError` instead of waiting on a provider that is down;
+after a cool-down a single probe is let through (half-open) and its outcome
+closes or reopens the circuit. :func:`call_provider` also bounds each call
+by the stage timeout and, for idempotent calls, can hedge: when the first
+attempt is slower than the provider's recent p95 latency, a second one is
+sent and whichever finishes first wins.
+
+Blocking SDK calls cannot be interrupted, so a sync call that times out, or
+loses a hedge, is left to finish on its worker thread and its result is
+dropped. Each provider has its own bounded pool of such threads, so calls
+hanging on one provider cannot starve the others, and calls run in a copy
+of the caller's context, keeping its tracing span and job. Async attempts
+are cancelled.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from loguru import logger
+
+from src.config import settings
+from src.observability.metrics import PROVIDER_SECONDS
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Recent latencies kept per provider for the hedging delay.
+_LATENCY_WINDOW = 200
+
+
+class CircuitOpenError(Exception):
+    """The provider's circuit is open; the call was not attempted."""
+
+    def __init__(self, provider: str, retry_in: float) -> None:
+        super().__init__(f"{provider} is failing, calls are paused for another {retry_in:.0f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class StageTimeoutError(TimeoutError):
+    def __init__(self, provider: str, timeout: float) -> None:
+        super().__init__(f"{provider} call did not finish within {timeout:g}s")
+        self.provider = provider
+        self.timeout = timeout
+
+
+class CircuitBreaker:
+    """Counts consecutive failures of one provider and stops calling it after ``failure_threshold``."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float, half_open_max_calls: int = 1) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._stats = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def before_call(self) -> None:
+        """Admit a call or raise :class:`CircuitOpenError`."""
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._state = HALF_OPEN
+                self._probes += 1
+            elif state != CLOSED:
+                self._stats["rejected"] += 1
+                retry_in = max(self._opened_at + self.reset_seconds - time.monotonic(), 0.0)
+                raise CircuitOpenError(self.name, retry_in)
+            self._stats["calls"] += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                logger.info(f"{self.name} circuit closed, the probe call succeeded")
+            self._state, self._failures, self._probes = CLOSED, 0, 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._stats["failures"] += 1
+            self._failures += 1
+            if self._state == OPEN:
+                # A call sent before the circuit opened; it does not extend the pause.
+                return
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state, self._opened_at, self._probes = OPEN, time.monotonic(), 0
+                self._stats["opened"] += 1
+                logger.warning(
+                    f"{self.name} circuit opened after {self._failures} consecutive failures, "
+                    f"pausing calls for {self.reset_seconds:g}s"
+                )
+
+    @contextmanager
+    def guard(self):
+        """Run the enclosed call under the breaker."""
+        self.before_call()
+        try:
+            yield
+        except BaseException as e:
+            # An error passing through from another provider's call says nothing about this one.
+            origin = getattr(e, "_failed_provider", None)
+            if origin in (None, self.name) and counts_as_failure(e):
+                self.record_failure()
+            else:
+                self._release_probe()
+            if origin is None:
+                try:
+                    e._failed_provider = self.name
+                except AttributeError:
+                    pass
+            raise
+        self.record_success()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"state": self._current_state(), "consecutive_failures": self._failures, **self._stats}
+
+    def _release_probe(self) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return self._state
+
+
+def counts_as_failure(error: BaseException) -> bool:
+    """Whether ``error`` says something about the provider's health.
+
+    Timeouts, connection errors and 5xx responses do; client errors such as a
+    bad request, and cancellation, do not. A 429 that outlasted the rate
+    limiter's retries does.
+    """
+    if not isinstance(error, Exception) or isinstance(error, CircuitOpenError):
+        return False
+    status = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    return not (isinstance(status, int) and 400 <= status < 500 and status not in (408, 429))
+
+
+class LatencyWindow:
+    """The most recent call latencies of one provider."""
+
+    def __init__(self, size: int = _LATENCY_WINDOW) -> None:
+        self._lock = threading.Lock()
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < settings.resilience.hedge_min_samples:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+
+_lock = threading.Lock()
+_breakers: dict[str, CircuitBreaker] = {}
+_latencies: dict[str, LatencyWindow] = {}
+_hedges: dict[str, dict] = {}
+_executors: dict[str, ThreadPoolExecutor] = {}
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    with _lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = _breakers[provider] = CircuitBreaker(
+                provider,
+                settings.resilience.failure_threshold,
+                settings.resilience.reset_seconds,
+                settings.resilience.half_open_max_calls,
+            )
+        return breaker
+
+
+def _latency_window(provider: str) -> LatencyWindow:
+    with _lock:
+        return _latencies.setdefault(provider, LatencyWindow())
+
+
+def _count_hedge(provider: str, won: bool) -> None:
+    with _lock:
+        counts = _hedges.setdefault(provider, {"hedged": 0, "hedge_won": 0})
+        counts["hedged"] += 1
+        counts["hedge_won"] += won
+
+
+def hedge_delay(provider: str) -> float:
+    """How long the first attempt may take before a hedge is sent: the recent p95 latency."""
+    p95 = _latency_window(provider).quantile(settings.resilience.hedge_quantile)
+    return max(p95 if p95 is not None else settings.resilience.hedge_initial_delay_seconds,
+               settings.resilience.hedge_min_delay_seconds)
+
+
+def _submit(provider: str, fn: Callable[[], T]) -> Future:
+    """Run ``fn`` on ``provider``'s threads, in a copy of the caller's context."""
+    with _lock:
+        executor = _executors.get(provider)
+        if executor is None:
+            executor = _executors[provider] = ThreadPoolExecutor(
+                max_workers=settings.resilience.provider_threads, thread_name_prefix=f"{provider}-call"
+            )
+    return executor.submit(contextvars.copy_context().run, fn)
+
+
+def _timed(fn: Callable[[], T], provider: str) -> Callable[[], T]:
+    window = _latency_window(provider)
+
+    def run() -> T:
+        started = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - started
+        window.add(seconds)
+        PROVIDER_SECONDS.observe(seconds, provider=provider)
+        return result
+
+    return run
+
+
+def call_provider(provider: str, fn: Callable[[], T], timeout: float = 0, hedge: bool = False) -> T:
+    """Run ``fn`` under ``provider``'s circuit breaker, within ``timeout`` seconds (0 for none).
+
+    With ``hedge``, which is only safe for idempotent calls and only applies
+    when hedging is enabled in the settings, a second attempt is started if
+    the first one is slower than :func:`hedge_delay`.
+    """
+    breaker = get_circuit_breaker(provider)
+    attempt = _timed(fn, provider)
+    hedge = hedge and settings.resilience.hedging
+    with breaker.guard():
+        if not timeout and not hedge:
+            return attempt()
+        deadline = time.monotonic() + timeout if timeout else None
+        futures = [_submit(provider, attempt)]
+        if hedge:
+            done, _ = wait(futures, timeout=_remaining(deadline, hedge_delay(provider)))
+            if not done and (deadline is None or time.monotonic() < deadline):
+                futures.append(_submit(provider, attempt))
+        return _first_success(provider, futures, deadline, timeout)
+
+
+def _first_success(provider: str, futures: list[Future], deadline: Optional[float], timeout: float):
+    pending, error = list(futures), None
+    while pending:
+        done, not_done = wait(pending, timeout=_remaining(deadline), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                for other in not_done:
+                    other.cancel()
+                if len(futures) > 1:
+                    _count_hedge(provider, won=future is futures[1])
+                return future.result()
+            error = future.exception()
+        pending = list(not_done)
+    if error is not None and not pending:
+        raise error
+    for future in pending:
+        future.cancel()
+    raise StageTimeoutError(provider, timeout)
+
+
+async def acall_provider(provider: str, fn: Callable[[], Awaitable[T]], timeout: float = 0, hedge: bool = False) -> T:
+    breaker = get_circuit_breaker(provider)
+    window = _latency_window(provider)
+    hedge = hedge and settings.resilience.hedging
+
+    async def attempt() -> T:
+        started = time.perf_counter()
+        result = await fn()
+        seconds = time.perf_counter() - started
+        window.add(seconds)
+        PROVIDER_SECONDS.observe(seconds, provider=provider)
+        return result
+
+    with breaker.guard():
+        if not hedge:
+            if not timeout:
+                return await attempt()
+            try:
+                return await asyncio.wait_for(attempt(), timeout)
+            except asyncio.TimeoutError:
+                raise StageTimeoutError(provider, timeout) from None
+        deadline = time.monotonic() + timeout if timeout else None
+        tasks = [asyncio.ensure_future(attempt())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=_remaining(deadline, hedge_delay(provider)))
+            if not done and (deadline is None or time.monotonic() < deadline):
+                tasks.append(asyncio.ensure_future(attempt()))
+            pending, error = list(tasks), None
+            while pending:
+                done, not_done = await asyncio.wait(pending, timeout=_remaining(deadline), return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        if len(tasks) > 1:
+                            _count_hedge(provider, won=task is tasks[1])
+                        return task.result()
+                    error = task.exception()
+                pending = list(not_done)
+            if error is not None and not pending:
+                raise error
+            raise StageTimeoutError(provider, timeout)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def _remaining(deadline: Optional[float], cap: Optional[float] = None) -> Optional[float]:
+    if deadline is None:
+        return cap
+    remaining = max(deadline - time.monotonic(), 0.0)
+    return remaining if cap is None else min(remaining, cap)
+
+
+def resilience_stats() -> dict[str, dict]:
+    """Breaker state and counters, hedges sent and won, and the current p95 latency, per provider."""
+    with _lock:
+        providers = sorted(set(_breakers) | set(_hedges))
+        hedges = {name: dict(counts) for name, counts in _hedges.items()}
+    stats = {}
+    for name in providers:
+        p95 = _latency_window(name).quantile(0.95)
+        stats[name] = {
+            **get_circuit_breaker(name).stats(),
+            **hedges.get(name, {"hedged": 0, "hedge_won": 0}),
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+        }
+    return stats
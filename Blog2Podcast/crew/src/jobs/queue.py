@@ -0,0 +1,378 @@
+"""Background pipeline jobs for the Streamlit app.
+
+Submitting a URL returns a job right away; a fixed pool of workers, all
+on one event loop in a daemon thread, runs the pipelines, and the SQLite
+:class:`~src.jobs.store.JobStore` keeps each job's status, current stage
+and result. A Streamlit session therefore only polls its job: a rerun or a
+closed browser tab does not lose the conversion, and other sessions asking
+for the same URL while it is queued or running get the same job.
+
+The runs go through the process-wide admission control as interactive
+work, so at most ``pipeline.max_in_flight_runs`` of them convert at once;
+:meth:`JobQueue.position` tells the app where a waiting job is in line, and
+:meth:`JobQueue.submit` turns new jobs away once the line is full.
+
+Several processes can share a jobs file, such as the Streamlit app and
+``python -m src.api``. Only the one holding the file's lease runs the
+workers: it renews the lease every poll interval and picks up the jobs
+the other processes submit, which only create and read jobs. Jobs are run
+with the job id as the pipeline's thread (or flow) id, so when the holder
+stops renewing for ``jobs.lease_seconds``, the next process to take the
+lease resumes the jobs it left queued or running from their last
+checkpoints.
+"""
+import asyncio
+import atexit
+import concurrent.futures
+import contextvars
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+
+from src.agent.admission import INTERACTIVE, QueueFullError, get_admission_controller
+from src.cache.scrape_cache import normalize_url
+from src.config import settings
+from src.jobs.store import FAILED, QUEUED, RUNNING, Job, JobStore
+from src.observability.metrics import get_metrics
+from src.observability.opik_utils import add_stage_listener
+from src.storage.artifacts import add_partial_listener
+
+Runner = Callable[[str, str, bool], Awaitable[dict]]
+
+_current_job: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("blog2podcast_job", default=None)
+# The lease in the jobs file held by the process running the workers.
+_WORKERS_LEASE = "workers"
+
+
+def pipeline() -> Runner:
+    """``run(url, job_id, resume)`` for this variant of the project."""
+    try:
+        from src.agent.graph import BlogToPodcastGraph
+    except ModuleNotFoundError:
+        # The crew variant runs a flow instead of a graph.
+        from src.agent.blog2postcast_flow import akickoff, aresume
+
+        async def run_flow(url: str, job_id: str, resume: bool) -> dict:
+            if resume:
+                try:
+                    return await aresume(job_id, priority=INTERACTIVE)
+                except ValueError:
+                    pass
+            return await akickoff(url, flow_id=job_id, priority=INTERACTIVE)
+
+        return run_flow
+
+    async def run_graph(url: str, job_id: str, resume: bool) -> dict:
+        if resume:
+            try:
+                run = await asyncio.to_thread(BlogToPodcastGraph.from_thread, job_id)
+            except ValueError:
+                pass
+            else:
+                return await run.ainvoke(resume=True, priority=INTERACTIVE)
+        return await BlogToPodcastGraph(url=url, thread_id=job_id).ainvoke(priority=INTERACTIVE)
+
+    return run_graph
+
+
+class JobQueue:
+    def __init__(self, store: JobStore, run: Runner, workers: int) -> None:
+        self.store = store
+        self.workers = max(workers, 1)
+        self._run = run
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._queue: Optional[asyncio.Queue] = None
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lease_thread: Optional[threading.Thread] = None
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.leader = False
+        # Jobs handed to the workers of this process and not finished yet.
+        self._taken: set[str] = set()
+        self._subscribers: dict[str, list[queue.SimpleQueue]] = {}
+        # The audio file each running job streams to, as recorded in the store.
+        self._partial: dict[str, str] = {}
+        # Store writes of the running jobs, made in order on the job-store thread instead of the workers' loop.
+        self._writes: queue.SimpleQueue = queue.SimpleQueue()
+
+    def start(self) -> "JobQueue":
+        """Compete for the jobs file's lease; while this process holds it, run the workers.
+
+        The first attempt is made before returning, so a process that is
+        alone on the jobs file has its workers running right away.
+        """
+        with self._lock:
+            if self._lease_thread is not None:
+                return self
+            self._lease_thread = threading.Thread(target=self._hold_lease, name="job-lease", daemon=True)
+        self._try_lease()
+        self._lease_thread.start()
+        # Let the next process take over right away instead of after the lease expires.
+        atexit.register(self._release_lease)
+        return self
+
+    def _release_lease(self) -> None:
+        if self.leader:
+            self.leader = False
+            self.store.release_lease(_WORKERS_LEASE, self.owner)
+
+    def _hold_lease(self) -> None:
+        while True:
+            time.sleep(settings.jobs.poll_interval_seconds)
+            try:
+                self._try_lease()
+            except Exception as e:
+                logger.warning(f"Could not update the lease on {self.store.path}: {e}")
+
+    def _try_lease(self) -> None:
+        if self.leader:
+            if self.store.renew_lease(_WORKERS_LEASE, self.owner):
+                self._pick_up()
+                return
+            # Stalled for longer than the lease: another process has taken over and resumes the jobs.
+            logger.warning(f"Lost the lease on {self.store.path}; this process starts no further jobs")
+            with self._lock:
+                self.leader = False
+            return
+        if not self.store.acquire_lease(_WORKERS_LEASE, self.owner, settings.jobs.lease_seconds):
+            holder = self.store.lease_owner(_WORKERS_LEASE)
+            if holder is None or not _exited(holder):
+                return
+            if not self.store.acquire_lease(_WORKERS_LEASE, self.owner, settings.jobs.lease_seconds, dead_owner=holder):
+                return
+        logger.info(f"Running the jobs of {self.store.path} in this process")
+        with self._lock:
+            self.leader = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._serve, name="job-workers", daemon=True)
+                self._thread.start()
+        self._ready.wait()
+        self._pick_up()
+
+    def _pick_up(self) -> None:
+        """Hand the workers the unfinished jobs they do not have: new ones from other processes, or left by a stopped holder."""
+        with self._lock:
+            jobs = [job for job in self.store.unfinished() if job.id not in self._taken]
+            for job in jobs:
+                self._enqueue(job.id)
+        resumed = sum(1 for job in jobs if job.status == RUNNING or job.attempts)
+        if resumed:
+            logger.info(f"Resuming {resumed} unfinished jobs")
+
+    def submit(self, url: str) -> Job:
+        """Queue a conversion of ``url``, or return the job already converting it.
+
+        Raises :class:`~src.agent.admission.QueueFullError` when as many jobs
+        are unfinished as can run and wait for admission.
+        """
+        key = normalize_url(url)
+        with self._lock:
+            job = self.store.active(key)
+            if job is None:
+                self._check_capacity()
+                job = self.store.create(url, key)
+                if self.leader:
+                    self._enqueue(job.id)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """Place in line (1 for next) of a job waiting to run; ``None`` once it runs or has finished."""
+        admission = get_admission_controller()
+        position = admission.position(job_id)
+        if position is not None:
+            return position
+        job = self.store.get(job_id)
+        if job is None or job.status != QUEUED:
+            return None
+        # Not yet picked up by a worker: behind every run waiting for admission and the jobs queued before it.
+        return admission.waiting(INTERACTIVE) + self.store.queued_before(job) + 1
+
+    def _check_capacity(self) -> None:
+        capacity = get_admission_controller().capacity
+        if not capacity:
+            return
+        counts = self.store.counts()
+        unfinished = counts[QUEUED] + counts[RUNNING]
+        if unfinished >= capacity:
+            raise QueueFullError(unfinished - get_admission_controller().max_in_flight)
+
+    def retry(self, job_id: str) -> Optional[Job]:
+        """Queue a failed job again; it resumes from the stage that failed."""
+        with self._lock:
+            job = self.store.get(job_id)
+            if job is None or job.status != FAILED:
+                return job
+            self.store.requeue(job_id)
+            if self.leader:
+                self._enqueue(job_id)
+        self._publish(job_id, "queued")
+        return self.store.get(job_id)
+
+    def subscribe(self, job_id: str) -> queue.SimpleQueue:
+        """A queue receiving ``(event, data)`` for each change of the job until :meth:`unsubscribe`.
+
+        Events are ``started``, ``stage`` (a pipeline stage began), ``audio``
+        (more of the audio is readable while it streams), ``done``, ``failed``
+        and ``queued`` (retried). Subscribe before reading the job, so no
+        change between the two is missed.
+        """
+        events = queue.SimpleQueue()
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(events)
+        return events
+
+    def unsubscribe(self, job_id: str, events: queue.SimpleQueue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(job_id, [])
+            if events in subscribers:
+                subscribers.remove(events)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    def _publish(self, job_id: str, event: str, **data) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for events in subscribers:
+            events.put((event, data))
+
+    def _enqueue(self, job_id: str) -> None:
+        """Hand ``job_id`` to the workers; called with the lock held."""
+        if job_id not in self._taken:
+            self._taken.add(job_id)
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, job_id)
+
+    def _write(self, write: Callable, *args) -> concurrent.futures.Future:
+        """Have the job-store thread call ``write(*args)`` after the writes queued before it."""
+        future = concurrent.futures.Future()
+        self._writes.put((future, write, args))
+        return future
+
+    def _store_writes(self) -> None:
+        while True:
+            future, write, args = self._writes.get()
+            try:
+                future.set_result(write(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+    @staticmethod
+    def _log_failed_write(future: concurrent.futures.Future) -> None:
+        if future.exception() is not None:
+            logger.warning(f"Could not record the progress of a job: {future.exception()}")
+
+    def _serve(self) -> None:
+        threading.Thread(target=self._store_writes, name="job-store", daemon=True).start()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        for i in range(self.workers):
+            self._loop.create_task(self._worker(), name=f"job-worker-{i}")
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None or job.finished or not self.leader:
+                # Another process holds the lease now and runs the job.
+                with self._lock:
+                    self._taken.discard(job_id)
+                continue
+            await asyncio.wrap_future(self._write(self.store.start, job_id))
+            self._publish(job_id, "started", attempt=job.attempts + 1)
+            token = _current_job.set(job_id)
+            try:
+                # A job that ran before, here or in a stopped process, continues from its checkpoint.
+                state = await self._run(job.url, job_id, job.attempts > 0)
+                error = None if state.get("audio_file") else "pipeline produced no audio"
+            except Exception as e:
+                state, error = {}, f"{type(e).__name__}: {e}"
+            finally:
+                _current_job.reset(token)
+            if error:
+                logger.error(f"Job {job_id} for {job.url} failed: {error}")
+                await asyncio.wrap_future(self._write(self.store.fail, job_id, error))
+                self._publish(job_id, "failed", error=error)
+            else:
+                await asyncio.wrap_future(self._write(self.store.finish, job_id, state))
+                self._publish(job_id, "done")
+            with self._lock:
+                self._partial.pop(job_id, None)
+                self._taken.discard(job_id)
+
+    def _stage_started(self, stage: str) -> None:
+        job_id = _current_job.get()
+        if job_id is not None:
+            self._write(self._record_stage, job_id, stage).add_done_callback(self._log_failed_write)
+
+    def _record_stage(self, job_id: str, stage: str) -> None:
+        self.store.set_stage(job_id, stage)
+        self._publish(job_id, "stage", stage=stage)
+
+    def _partial_written(self, path: str, size: int) -> None:
+        job_id = _current_job.get()
+        if job_id is None:
+            return
+        with self._lock:
+            announced = self._partial.get(job_id) == path
+            self._partial[job_id] = path
+        self._write(self._record_partial, job_id, None if announced else path, size).add_done_callback(self._log_failed_write)
+
+    def _record_partial(self, job_id: str, path: Optional[str], size: int) -> None:
+        if path is not None:
+            self.store.set_partial_audio(job_id, path)
+        self._publish(job_id, "audio", bytes=size)
+
+
+def _exited(owner: str) -> bool:
+    """Whether the lease owner ``owner`` was a process on this host that has exited."""
+    host, pid, _ = owner.rsplit(":", 2)
+    if host != socket.gethostname() or os.name != "posix":
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except (PermissionError, ValueError):
+        return False
+    return False
+
+
+def _job_samples():
+    for status, count in _job_queue().store.counts().items():
+        yield "jobs", "gauge", "Pipeline jobs in the job store, by status.", {"status": status}, count
+
+
+def get_job_queue(run_workers: bool = True) -> JobQueue:
+    """The process-wide job queue; Streamlit reruns and sessions share it.
+
+    With ``run_workers`` the process competes for the lease on the jobs
+    file and runs the workers while it holds it. Without, it only submits
+    and reads jobs, leaving them to the process running the workers.
+    """
+    queue = _job_queue()
+    return queue.start() if run_workers else queue
+
+
+@lru_cache(maxsize=1)
+def _job_queue() -> JobQueue:
+    store = JobStore(settings.jobs.path)
+    purged = store.purge(settings.jobs.retention_seconds)
+    if purged:
+        logger.info(f"Removed {purged} finished jobs older than {settings.jobs.retention_seconds:g}s")
+    queue = JobQueue(store, pipeline(), settings.jobs.workers)
+    add_stage_listener(queue._stage_started)
+    add_partial_listener(queue._partial_written)
+    get_metrics().register_collector(_job_samples)
+    return queue
@@ -0,0 +1,208 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+@dataclass
+class Job:
+    id: str
+    url: str
+    status: str
+    stage: Optional[str] = None
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    # The audio file while the pipeline is still writing it.
+    partial_audio: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    @property
+    def seconds(self) -> float:
+        """Time since the job started, or its run time once finished."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+_COLUMNS = "id, url, status, stage, created_at, started_at, finished_at, attempts, result, error, partial_audio"
+
+
+class JobStore:
+    """Pipeline jobs and their results in one SQLite file, shared across processes."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " url_key TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " stage TEXT,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " result TEXT,"
+            " error TEXT,"
+            " partial_audio TEXT)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "partial_audio" not in columns:
+            # Jobs files from before streamed audio was tracked.
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN partial_audio TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_url ON jobs (status, url_key)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, renewed_at REAL NOT NULL)"
+        )
+
+    def create(self, url: str, url_key: str) -> Job:
+        job = Job(id=uuid.uuid4().hex, url=url, status=QUEUED, created_at=time.time())
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, url, url_key, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, url, url_key, QUEUED, job.created_at),
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    def active(self, url_key: str) -> Optional[Job]:
+        """The queued or running job for the URL, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE url_key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                (url_key, QUEUED, RUNNING),
+            ).fetchone()
+        return _job(row) if row else None
+
+    def unfinished(self) -> list[Job]:
+        """Queued and running jobs, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [_job(row) for row in rows]
+
+    def queued_before(self, job: Job) -> int:
+        """Queued jobs created before ``job``."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?", (QUEUED, job.created_at)
+            ).fetchone()[0]
+
+    def recent(self, limit: int = 20) -> list[Job]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [_job(row) for row in rows]
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0, **dict(rows)}
+
+    def start(self, job_id: str) -> None:
+        self._update(
+            "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1, stage = NULL, error = NULL,"
+            " partial_audio = NULL WHERE id = ?",
+            (RUNNING, time.time(), job_id),
+        )
+
+    def set_stage(self, job_id: str, stage: str) -> None:
+        self._update("UPDATE jobs SET stage = ? WHERE id = ?", (stage, job_id))
+
+    def set_partial_audio(self, job_id: str, path: str) -> None:
+        self._update("UPDATE jobs SET partial_audio = ? WHERE id = ?", (path, job_id))
+
+    def finish(self, job_id: str, result: dict) -> None:
+        self._update(
+            "UPDATE jobs SET status = ?, finished_at = ?, result = ?, stage = NULL, partial_audio = NULL WHERE id = ?",
+            (DONE, time.time(), json.dumps(result, default=str), job_id),
+        )
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._update(
+            "UPDATE jobs SET status = ?, finished_at = ?, error = ?, partial_audio = NULL WHERE id = ?",
+            (FAILED, time.time(), error, job_id),
+        )
+
+    def requeue(self, job_id: str) -> None:
+        self._update("UPDATE jobs SET status = ?, finished_at = NULL WHERE id = ?", (QUEUED, job_id))
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs that ended more than ``older_than`` seconds ago."""
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (DONE, FAILED, time.time() - older_than)
+            ).rowcount
+
+    def acquire_lease(self, name: str, owner: str, expires_after: float, dead_owner: Optional[str] = None) -> bool:
+        """Take the lease ``name`` for ``owner`` unless another owner renewed it within ``expires_after`` seconds.
+
+        It is also taken when it is still held by ``dead_owner``, an owner known to have stopped.
+        """
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two processes cannot both see the lease as free.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT owner, renewed_at FROM leases WHERE name = ?", (name,)).fetchone()
+                taken = row is None or row[0] in (owner, dead_owner) or row[1] < now - expires_after
+                if taken:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO leases (name, owner, renewed_at) VALUES (?, ?, ?)", (name, owner, now)
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return taken
+
+    def lease_owner(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def renew_lease(self, name: str, owner: str) -> bool:
+        """Renew ``owner``'s lease; ``False`` when another owner has taken it over."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE leases SET renewed_at = ? WHERE name = ? AND owner = ?", (time.time(), name, owner)
+            ).rowcount == 1
+
+    def release_lease(self, name: str, owner: str) -> None:
+        self._update("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    def _update(self, sql: str, params: tuple) -> None:
+        with self._lock:
+            self._conn.execute(sql, params)
+
+
+def _job(row: tuple) -> Job:
+    job = Job(*row)
+    job.result = json.loads(job.result) if job.result else None
+    return job
@@ -0,0 +1,119 @@
+"""A local stand-in for Opik's trace ingestion API.
+
+Accepts the span and trace batches of the export queue
+(``src.observability.tracing``) and keeps them in memory, optionally
+appending them to a JSONL file. It can answer slowly or with errors, to see
+that a slow or dead tracing backend does not slow the pipeline down:
+
+    python -m src.observability.collector --port 5173 --output traces.jsonl
+    TRACING__MODE=queue TRACING__URL=http://127.0.0.1:5173 python -m src.batch urls.txt
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+_BATCH_PATHS = {"/v1/private/spans/batch": "spans", "/v1/private/traces/batch": "traces"}
+
+
+class LocalCollector:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        delay: float = 0.0,
+        error_rate: float = 0.0,
+        output: Optional[Path] = None,
+    ) -> None:
+        self.delay = delay
+        self.error_rate = error_rate
+        self.output = output
+        self.spans: list[dict] = []
+        self.traces: list[dict] = []
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalCollector":
+        threading.Thread(target=self._server.serve_forever, name="trace-collector", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def received(self, kind: str, records: list[dict]) -> None:
+        with self._lock:
+            (self.spans if kind == "spans" else self.traces).extend(records)
+            if self.output is not None:
+                with self.output.open("a", encoding="utf-8") as f:
+                    for record in records:
+                        f.write(json.dumps({"kind": kind[:-1], **record}) + "\n")
+
+    def _handler(self):
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                kind = _BATCH_PATHS.get(self.path.split("?", 1)[0])
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with collector._lock:
+                    collector.requests += 1
+                if collector.delay:
+                    time.sleep(collector.delay)
+                if kind is None:
+                    self.send_error(404)
+                    return
+                if collector.error_rate and random.random() < collector.error_rate:
+                    self.send_error(503)
+                    return
+                try:
+                    records = json.loads(body)[kind]
+                except (ValueError, KeyError, TypeError):
+                    self.send_error(400)
+                    return
+                collector.received(kind, records)
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Receive trace batches like Opik's API and keep them locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5173)
+    parser.add_argument("--output", type=Path, help="JSONL file the received spans and traces are appended to.")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before answering each batch.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of batches answered with 503.")
+    args = parser.parse_args()
+
+    collector = LocalCollector(args.host, args.port, args.delay, args.error_rate, args.output)
+    logger.info(f"Collecting traces at {collector.url}")
+    try:
+        collector.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    logger.info(f"Received {len(collector.spans)} spans and {len(collector.traces)} traces")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,34 @@
+import inspect
 import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable
 
-import opik
 from loguru import logger
-from opik.configurator.configure import OpikConfigurator
 from src.config import settings
+from src.observability.metrics import STAGE_ERRORS, STAGE_SECONDS, STAGES_IN_PROGRESS
+from src.observability.tracing import span
+
+_configured = threading.Event()
+_configure_lock = threading.Lock()
+_configure_started = False
+_stage_listeners: list[Callable[[str], None]] = []
 
 
 def configure() -> None:
+    try:
+        _configure()
+    finally:
+        _configured.set()
+
+
+def _configure() -> None:
     if settings.opik.api_key and settings.opik.project_name:
+        import opik
+        from opik.configurator.configure import OpikConfigurator
+
         try:
             client = OpikConfigurator(api_key=settings.opik.api_key)
             default_workspace = client._get_default_workspace()
@@ -36,4 +57,102 @@ def configure() -> None:
     else:
         logger.warning(
             "OPIK_API_KEY and OPIK_PROJECT_NAME are not set. Set them to enable prompt monitoring with Opik."
-        )
\ No newline at end of file
+        )
+        # Tracing still goes to Opik's default project, so the SDK is loaded here, off the request path.
+        import opik  # noqa: F401
+
+
+def configure_in_background() -> None:
+    """Run :func:`configure` once per process on a daemon thread.
+
+    Configuring Opik imports its SDK and may look up the default workspace
+    over the network; doing it in the background keeps both off the import
+    and request paths. Outside of SDK mode there is nothing to configure.
+    """
+    global _configure_started
+    if settings.tracing.mode != "sdk":
+        return
+    with _configure_lock:
+        if _configure_started:
+            return
+        _configure_started = True
+    threading.Thread(target=configure, name="opik-configure", daemon=True).start()
+
+
+def is_configured() -> bool:
+    """Whether Opik is configured; starts the configuration when it has not been yet.
+
+    Always ``False`` unless traces go through the Opik SDK (``TRACING__MODE=sdk``):
+    the export queue needs no configuration, and Opik is not contacted.
+    """
+    if settings.tracing.mode != "sdk":
+        return False
+    if _configured.is_set():
+        return True
+    configure_in_background()
+    return False
+
+
+def add_stage_listener(listener: Callable[[str], None]) -> None:
+    """Call ``listener(name)`` whenever a ``@track``-ed stage starts, e.g. to report a job's progress."""
+    _stage_listeners.append(listener)
+
+
+@contextmanager
+def _measured(stage: str):
+    for listener in _stage_listeners:
+        listener(stage)
+    STAGES_IN_PROGRESS.inc(stage=stage)
+    started = time.perf_counter()
+    try:
+        with span(stage):
+            yield
+    except Exception as e:
+        STAGE_ERRORS.inc(stage=stage, error=type(e).__name__)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+        STAGES_IN_PROGRESS.dec(stage=stage)
+
+
+def track(name: str, **track_kwargs):
+    """``opik.track`` that loads Opik on first use instead of at import time.
+
+    Calls made before Opik is configured run untraced, so a cold process
+    never waits on Opik before it can serve a request. Either way, the call
+    is timed in the local metrics under ``name``. With ``TRACING__MODE=queue``
+    the span goes to the sampled export queue instead of the SDK.
+    """
+
+    def decorator(func):
+        traced = None
+
+        def get_traced():
+            nonlocal traced
+            if traced is None:
+                import opik
+
+                traced = opik.track(name=name, **track_kwargs)(func)
+            return traced
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with _measured(name):
+                    if not is_configured():
+                        return await func(*args, **kwargs)
+                    return await get_traced()(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _measured(name):
+                if not is_configured():
+                    return func(*args, **kwargs)
+                return get_traced()(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
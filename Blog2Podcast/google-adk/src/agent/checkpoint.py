@@ -0,0 +1,461 @@
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from loguru import logger
+
+from src.config import settings
+
+COMPRESSED_SUFFIX = "+zlib"
+
+
+class CompressedSerializer:
+    """Wraps a checkpoint serializer and zlib-compresses large payloads.
+
+    The scraped blog and the generated script dominate the state, and both
+    compress well, so checkpoints of thousands of runs stay small.
+    """
+
+    def __init__(self, serde=None, min_bytes: int = 1024, level: int = 6) -> None:
+        self.serde = serde or JsonPlusSerializer()
+        self.min_bytes = min_bytes
+        self.level = level
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if self.min_bytes and len(data) >= self.min_bytes:
+            compressed = zlib.compress(data, self.level)
+            if len(compressed) < len(data):
+                return type_ + COMPRESSED_SUFFIX, compressed
+        return type_, data
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(COMPRESSED_SUFFIX):
+            type_, payload = type_[: -len(COMPRESSED_SUFFIX)], zlib.decompress(payload)
+        return self.serde.loads_typed((type_, payload))
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """In-memory checkpointer that keeps a bounded number of threads.
+
+    Every read or write of a thread marks it as recently used. Once more
+    than ``max_threads`` threads are stored, the least recently used ones
+    are deleted, and threads idle for longer than ``ttl`` seconds are
+    deleted as well. A bound of ``0`` disables that limit.
+    """
+
+    def __init__(self, max_threads: int = 1000, ttl: Optional[float] = None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._last_used: OrderedDict[str, float] = OrderedDict()
+        self._evictions = 0
+
+    def get_tuple(self, config):
+        with self._lock:
+            checkpoint = super().get_tuple(config)
+            if checkpoint is not None:
+                self._touch(config["configurable"]["thread_id"])
+            return checkpoint
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with self._lock:
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            self._touch(config["configurable"]["thread_id"])
+            self._evict(keep=config["configurable"]["thread_id"])
+            return next_config
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+            self._touch(config["configurable"]["thread_id"])
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            super().delete_thread(thread_id)
+            self._last_used.pop(thread_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"threads": len(self._last_used), "evictions": self._evictions}
+
+    def _touch(self, thread_id: str) -> None:
+        self._last_used[thread_id] = time.monotonic()
+        self._last_used.move_to_end(thread_id)
+
+    def _evict(self, keep: str) -> None:
+        expired_before = time.monotonic() - self.ttl if self.ttl else None
+        for thread_id, last_used in list(self._last_used.items()):
+            over_capacity = self.max_threads and len(self._last_used) > self.max_threads
+            expired = expired_before is not None and last_used < expired_before
+            if not (over_capacity or expired):
+                # Oldest first: once one thread survives, all later ones do too.
+                break
+            if thread_id != keep:
+                self.delete_thread(thread_id)
+                self._evictions += 1
+                logger.debug(f"Evicted checkpoints of thread {thread_id}")
+
+
+class SQLiteSaver(BaseCheckpointSaver[str]):
+    """Checkpointer stored in a single SQLite file.
+
+    Checkpoints survive a crash or restart, so a run that failed in a later
+    stage can resume from its last completed node. Channel values are
+    stored once per version, as the in-memory saver does, so the scraped
+    blog is not copied into every later checkpoint of the run. Threads idle
+    for longer than ``retention`` seconds and the least recently used
+    threads beyond ``max_threads`` are deleted.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_threads: int = 0,
+        retention: Optional[float] = None,
+        serde=None,
+    ) -> None:
+        super().__init__(serde=serde or CompressedSerializer())
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_threads = max_threads
+        self.retention = retention
+        self._lock = threading.RLock()
+        self._evictions = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS threads ("
+            " thread_id TEXT PRIMARY KEY,"
+            " updated_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS threads_updated_at ON threads (updated_at);"
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " thread_id TEXT NOT NULL,"
+            " checkpoint_ns TEXT NOT NULL,"
+            " checkpoint_id TEXT NOT NULL,"
+            " parent_checkpoint_id TEXT,"
+            " checkpoint_type TEXT NOT NULL,"
+            " checkpoint BLOB NOT NULL,"
+            " metadata_type TEXT NOT NULL,"
+            " metadata BLOB NOT NULL,"
+            " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id));"
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " thread_id TEXT NOT NULL,"
+            " checkpoint_ns TEXT NOT NULL,"
+            " channel TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " type TEXT NOT NULL,"
+            " blob BLOB NOT NULL,"
+            " PRIMARY KEY (thread_id, checkpoint_ns, channel, version));"
+            "CREATE TABLE IF NOT EXISTS writes ("
+            " thread_id TEXT NOT NULL,"
+            " checkpoint_ns TEXT NOT NULL,"
+            " checkpoint_id TEXT NOT NULL,"
+            " task_id TEXT NOT NULL,"
+            " idx INTEGER NOT NULL,"
+            " channel TEXT NOT NULL,"
+            " type TEXT NOT NULL,"
+            " value BLOB NOT NULL,"
+            " task_path TEXT NOT NULL,"
+            " PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx));"
+        )
+
+    def get_tuple(self, config) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata"
+                    " FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata"
+                    " FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+                    " ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            self._touch(thread_id)
+            return self._tuple(thread_id, checkpoint_ns, row)
+
+    def list(self, config, *, filter=None, before=None, limit=None) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,"
+            " checkpoint_type, checkpoint, metadata_type, metadata FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            metadata = self.serde.loads_typed((row[4], row[5]))
+            if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                checkpoint = self._tuple(thread_id, checkpoint_ns, row)
+            yield checkpoint
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        c = checkpoint.copy()
+        values = c.pop("channel_values")
+        blobs = [
+            (thread_id, checkpoint_ns, channel, str(version),
+             *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")))
+            for channel, version in new_versions.items()
+        ]
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(c)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO blobs (thread_id, checkpoint_ns, channel, version, type, blob)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    blobs,
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,"
+                    " checkpoint_type, checkpoint, metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint["id"],
+                        config["configurable"].get("checkpoint_id"),
+                        checkpoint_type,
+                        checkpoint_blob,
+                        metadata_type,
+                        metadata_blob,
+                    ),
+                )
+                self._touch(thread_id)
+                self._evict(keep=thread_id)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(self, config, writes, task_id, task_path="") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            rows.append(
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint_id,
+                    task_id,
+                    WRITES_IDX_MAP.get(channel, idx),
+                    channel,
+                    *self.serde.dumps_typed(value),
+                    task_path,
+                )
+            )
+        # Regular writes are kept from the first attempt; special channels
+        # (errors, interrupts) carry negative indexes and are replaced.
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx,"
+                    " channel, type, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._touch(thread_id)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._delete(thread_id)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    async def aget_tuple(self, config) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        checkpoints = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path="") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def stats(self) -> dict:
+        with self._lock:
+            threads = self._conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+            checkpoints = self._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+        size = sum(path.stat().st_size for path in self.path.parent.glob(self.path.name + "*"))
+        return {"threads": threads, "checkpoints": checkpoints, "evictions": self._evictions, "bytes": size}
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint_blob, metadata_type, metadata_blob = row
+        checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_blob))
+        writes = self._conn.execute(
+            "SELECT task_id, idx, channel, type, value, task_path FROM writes"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        writes.sort(key=lambda w: writes_sort_key(w[5], w[0], w[1]))
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(thread_id, checkpoint_ns, checkpoint["channel_versions"]),
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((type_, value)))
+                for task_id, _, channel, type_, value, _ in writes
+            ],
+        )
+
+    def _load_blobs(self, thread_id: str, checkpoint_ns: str, versions: dict) -> dict:
+        values = {}
+        for channel, version in versions.items():
+            row = self._conn.execute(
+                "SELECT type, blob FROM blobs"
+                " WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row is not None and row[0] != "empty":
+                values[channel] = self.serde.loads_typed((row[0], row[1]))
+        return values
+
+    def _touch(self, thread_id: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO threads (thread_id, updated_at) VALUES (?, ?)", (thread_id, time.time())
+        )
+
+    def _delete(self, thread_id: str) -> None:
+        for table in ("checkpoints", "blobs", "writes", "threads"):
+            self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def _evict(self, keep: str) -> None:
+        stale = []
+        if self.retention:
+            stale += self._conn.execute(
+                "SELECT thread_id FROM threads WHERE updated_at < ?", (time.time() - self.retention,)
+            ).fetchall()
+        if self.max_threads:
+            stale += self._conn.execute(
+                "SELECT thread_id FROM threads ORDER BY updated_at DESC LIMIT -1 OFFSET ?", (self.max_threads,)
+            ).fetchall()
+        for (thread_id,) in set(stale):
+            if thread_id != keep:
+                self._delete(thread_id)
+                self._evictions += 1
+                logger.debug(f"Evicted checkpoints of thread {thread_id}")
+
+
+@lru_cache(maxsize=1)
+def get_checkpointer() -> BaseCheckpointSaver:
+    serde = CompressedSerializer(min_bytes=settings.checkpoint.compress_min_bytes)
+    if settings.checkpoint.backend == "memory":
+        return BoundedMemorySaver(
+            max_threads=settings.checkpoint.max_threads,
+            ttl=settings.checkpoint.ttl_seconds,
+            serde=serde,
+        )
+    if settings.checkpoint.backend == "sqlite":
+        return SQLiteSaver(
+            settings.checkpoint.path,
+            max_threads=settings.checkpoint.max_stored_threads,
+            retention=settings.checkpoint.retention_seconds,
+            serde=serde,
+        )
+    raise ValueError(f"Unknown checkpoint backend: {settings.checkpoint.backend!r}")
@@ -0,0 +1,70 @@
+"""Token estimates and token-budgeted splitting of markdown."""
+import re
+
+# Llama-family tokenizers average about four characters per token on English prose.
+CHARS_PER_TOKEN = 4
+
+_HEADING = re.compile(r"^#{1,6}\s")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of LLM tokens in ``text``."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def split_sections(markdown: str) -> list[str]:
+    """Split ``markdown`` before every heading; headings inside code blocks are ignored."""
+    sections, current, in_code = [], [], False
+    for line in markdown.splitlines(keepends=True):
+        if _FENCE.match(line):
+            in_code = not in_code
+        elif not in_code and _HEADING.match(line) and current:
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("".join(current))
+    return [section.strip() for section in sections if section.strip()]
+
+
+def split_markdown(markdown: str, max_tokens: int) -> list[str]:
+    """Split ``markdown`` into chunks of at most ``max_tokens`` estimated tokens.
+
+    Chunks are cut at headings so that sections stay together, and
+    consecutive small sections share a chunk. A section that does not fit
+    on its own is cut at paragraphs, then at sentences and, as a last
+    resort, every ``max_tokens`` worth of characters.
+    """
+    pieces = []
+    for section in split_sections(markdown):
+        pieces.extend(_fit(section, max_tokens))
+    return _pack(pieces, "\n\n", max_tokens)
+
+
+def _fit(text: str, max_tokens: int) -> list[str]:
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+    if len(paragraphs) > 1:
+        return _pack([piece for p in paragraphs for piece in _fit(p, max_tokens)], "\n\n", max_tokens)
+    sentences = _SENTENCE_END.split(text)
+    if len(sentences) > 1:
+        return _pack([piece for s in sentences for piece in _fit(s, max_tokens)], " ", max_tokens)
+    size = max_tokens * CHARS_PER_TOKEN
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+
+def _pack(pieces: list[str], separator: str, max_tokens: int) -> list[str]:
+    chunks, current = [], ""
+    for piece in pieces:
+        candidate = f"{current}{separator}{piece}" if current else piece
+        if current and estimate_tokens(candidate) > max_tokens:
+            chunks.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
@@ -1,43 +1,178 @@
-from opik.integrations.langchain import OpikTracer
-from opik import opik_context
-import opik
+import asyncio
+import uuid
+from functools import lru_cache
+from typing import Iterable, Optional
+
 from loguru import logger
 
+from src.agent.admission import BATCH, INTERACTIVE, get_admission_controller
+from src.agent.checkpoint import get_checkpointer
+from src.agent.singleflight import acoalesce, coalesce
 from src.agent.state import BlogToPodcastState
-from src.agent.nodes import scrape_blog_content_with_firecrawl, summarize_blog_content, generate_audio
+from src.cache.scrape_cache import normalize_url
+from src.config import settings
+from src.observability.opik_utils import is_configured
+from src.observability.tracing import span
+from src.agent.nodes import (
+     apreprocess_blog_content,
+     ascrape_blog_content_with_firecrawl,
+     asummarize_blog_content,
+     agenerate_audio,
+     astream_script_to_audio,
+     preprocess_blog_content,
+     scrape_blog_content_with_firecrawl,
+     summarize_blog_content,
+     generate_audio,
+     stream_script_to_audio,
+)
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import START, END, StateGraph
-from langgraph.checkpoint.memory import MemorySaver
 
-def construct_blog_to_podcast_graph():
+def construct_blog_to_podcast_graph(streaming: bool = False, checkpointer=None):
      graph = StateGraph(BlogToPodcastState)
-     graph.add_node("scrape", scrape_blog_content_with_firecrawl)
-     graph.add_node("summarize", summarize_blog_content)
-     graph.add_node("generate", generate_audio)
-     graph.add_edge("scrape", "summarize")
-     graph.add_edge("summarize", "generate")
-     graph.add_edge("generate", END)
+     # Each node carries a sync and an async implementation: graph.invoke runs
+     # the former, graph.ainvoke the latter on the caller's event loop.
+     graph.add_node("scrape", RunnableLambda(scrape_blog_content_with_firecrawl, afunc=ascrape_blog_content_with_firecrawl))
+     # Strips markdown noise so that the LLM is not paid for it.
+     graph.add_node("preprocess", RunnableLambda(preprocess_blog_content, afunc=apreprocess_blog_content))
+     graph.add_edge("scrape", "preprocess")
+     if streaming:
+          # Summarization and TTS overlap: sentences are spoken while the LLM is still generating.
+          graph.add_node("stream", RunnableLambda(stream_script_to_audio, afunc=astream_script_to_audio))
+          graph.add_edge("preprocess", "stream")
+          graph.add_edge("stream", END)
+     else:
+          graph.add_node("summarize", RunnableLambda(summarize_blog_content, afunc=asummarize_blog_content))
+          graph.add_node("generate", RunnableLambda(generate_audio, afunc=agenerate_audio))
+          graph.add_edge("preprocess", "summarize")
+          graph.add_edge("summarize", "generate")
+          graph.add_edge("generate", END)
      graph.set_entry_point("scrape")
 
-     memory = MemorySaver()
-     return graph.compile(checkpointer=memory)
+     return graph.compile(checkpointer=checkpointer or get_checkpointer())
+
+
+@lru_cache(maxsize=2)
+def get_blog_to_podcast_graph(streaming: bool = False):
+     """The compiled graph, built once per process for each mode.
+
+     Runs share it and the bounded checkpointer; their thread ids keep
+     their checkpoints apart.
+     """
+     return construct_blog_to_podcast_graph(streaming=streaming)
 
 
 class BlogToPodcastGraph:
-    def __init__(self, url, thread_id: str = "default"):
-        self.thread_id = thread_id
-        self._opik_tracer = OpikTracer(
-            tags=["blog2podcast-agent"],
-            thread_id=thread_id,
-        )
-        self.graph = construct_blog_to_podcast_graph()
+    def __init__(self, url, thread_id: Optional[str] = None, streaming: Optional[bool] = None):
+        self.thread_id = thread_id or uuid.uuid4().hex
+        self._opik_tracer = None
+        self.streaming = settings.pipeline.streaming if streaming is None else streaming
+        self.graph = get_blog_to_podcast_graph(streaming=self.streaming)
         self.state = BlogToPodcastState(url=url)
      
-    def invoke(self):
-        state = self.graph.invoke(self.state, {
-                "configurable": {"thread_id": self.thread_id},
-                "callbacks": [self._opik_tracer]
-            })
-        return state
+    def _callbacks(self):
+        # The tracer is created on the first run after Opik is configured;
+        # runs before that are not traced rather than waiting for Opik. It
+        # stays per instance because a tracer keeps every trace it created.
+        if self._opik_tracer is None and is_configured():
+            from opik.integrations.langchain import OpikTracer
+
+            self._opik_tracer = OpikTracer(
+                tags=["blog2podcast-agent"],
+                thread_id=self.thread_id,
+            )
+        return [self._opik_tracer] if self._opik_tracer is not None else []
+
+    def _config(self):
+        return {
+            "configurable": {"thread_id": self.thread_id},
+            # Saved with every checkpoint, so resume() picks the same graph.
+            "metadata": {"streaming": self.streaming},
+            "callbacks": self._callbacks()
+        }
+
+    def invoke(self, resume: bool = False, priority: int = INTERACTIVE):
+        """Run the pipeline; with ``resume`` it continues from the thread's last checkpoint.
+
+        Fresh runs for a URL that is already being converted wait for that
+        run and return its final state. Others wait for an admission slot
+        first, behind the runs of higher ``priority``; see
+        :class:`~src.agent.admission.AdmissionController`.
+        """
+        with self._span(resume):
+            if resume:
+                return self._admitted(priority, None)
+            return coalesce(self._coalescing_key(), lambda: self._admitted(priority, self.state))
+
+    async def ainvoke(self, resume: bool = False, priority: int = INTERACTIVE):
+        with self._span(resume):
+            if resume:
+                return await self._aadmitted(priority, None)
+            return await acoalesce(self._coalescing_key(), lambda: self._aadmitted(priority, self.state))
+
+    def _admitted(self, priority: int, state):
+        with get_admission_controller().admit(priority, key=self.thread_id):
+            return self.graph.invoke(state, self._config())
+
+    async def _aadmitted(self, priority: int, state):
+        async with get_admission_controller().aadmit(priority, key=self.thread_id):
+            return await self.graph.ainvoke(state, self._config())
+
+    def _span(self, resume: bool):
+        # The root span of the run in the export queue; a no-op when traces go through the SDK.
+        return span("blog2podcast-run", thread_id=self.thread_id, url=self.state["url"], streaming=self.streaming, resume=resume)
+
+    def _coalescing_key(self):
+        return ("pipeline", normalize_url(self.state["url"]), self.streaming)
+
+    @classmethod
+    def from_thread(cls, thread_id: str) -> "BlogToPodcastGraph":
+        """The pipeline run checkpointed under ``thread_id``."""
+        checkpoint = get_checkpointer().get_tuple({"configurable": {"thread_id": thread_id}})
+        if checkpoint is None:
+            raise ValueError(f"No checkpoint found for thread {thread_id!r}")
+        return cls(
+            url=checkpoint.checkpoint["channel_values"].get("url", ""),
+            thread_id=thread_id,
+            streaming=bool(checkpoint.metadata.get("streaming", False)),
+        )
+
+    @classmethod
+    def resume(cls, thread_id: str):
+        """Continue the run ``thread_id`` from its last completed node.
+
+        Stages that already finished (the scrape and the summary when audio
+        generation failed) are not run again. Resuming a finished run
+        returns its final state.
+        """
+        return cls.from_thread(thread_id).invoke(resume=True)
+
+    @classmethod
+    async def aresume(cls, thread_id: str):
+        run = await asyncio.to_thread(cls.from_thread, thread_id)
+        return await run.ainvoke(resume=True)
+
+    @classmethod
+    async def ainvoke_many(cls, urls: Iterable[str], max_in_flight: Optional[int] = None) -> list:
+        """Convert many URLs concurrently on the running event loop.
+
+        At most ``max_in_flight`` URLs are in progress at once; within that,
+        the per-stage limits from ``settings.pipeline`` let the stages overlap
+        across URLs. Results are returned in input order, with the exception
+        in place of the state for URLs that failed. The runs are admitted
+        as batch work, after any waiting interactive runs.
+        """
+        semaphore = asyncio.Semaphore(max_in_flight or settings.pipeline.batch_max_in_flight)
+
+        async def run(url):
+            async with semaphore:
+                return await cls(url=url).ainvoke(priority=BATCH)
+
+        return await asyncio.gather(*(run(url) for url in urls), return_exceptions=True)
+
+    @classmethod
+    def invoke_many(cls, urls: Iterable[str], max_in_flight: Optional[int] = None) -> list:
+        return asyncio.run(cls.ainvoke_many(urls, max_in_flight=max_in_flight))
     
 
 if __name__ == "__main__":
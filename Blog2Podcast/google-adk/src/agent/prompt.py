@@ -1,6 +1,22 @@
+from functools import lru_cache
+
 from src.observability.prompt_versioning import Prompt
 
 DEFAULT_PROMPT = """Summarize the following blog content and make it engaging and conversational:\n\n{blog_content}"""
 
+MAP_PROMPT = """This is part {part} of {parts} of a blog post. Write concise notes of its key points, facts and examples, in the order they appear. Leave out anything that is not part of the post itself:\n\n{chunk}"""
+
+REDUCE_PROMPT = """The following notes cover a blog post section by section. Summarize the blog content they describe and make it engaging and conversational:\n\n{notes}"""
+
+# Creating a prompt syncs it with Opik, so each one is created once per process.
+@lru_cache(maxsize=1)
 def get_summarization_prompt():
-    return Prompt(name="summarization_prompt", prompt=DEFAULT_PROMPT)
\ No newline at end of file
+    return Prompt(name="summarization_prompt", prompt=DEFAULT_PROMPT)
+
+@lru_cache(maxsize=1)
+def get_map_prompt():
+    return Prompt(name="summarization_map_prompt", prompt=MAP_PROMPT)
+
+@lru_cache(maxsize=1)
+def get_reduce_prompt():
+    return Prompt(name="summarization_reduce_prompt", prompt=REDUCE_PROMPT)
\ No newline at end of file
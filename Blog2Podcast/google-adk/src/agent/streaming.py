@@ -0,0 +1,178 @@
+"""Streaming summarize-and-speak stage.
+
+Instead of waiting for the full podcast script before starting text to
+speech, the LLM output is consumed token by token, cut into sentences as
+soon as they are complete and each sentence is sent to ElevenLabs while the
+LLM keeps generating. Audio is appended to the output artifact in script
+order as it arrives and flushed, so it can be played from the artifact's
+partial file after roughly one sentence of generation and synthesis
+instead of after the whole script. Once the script is spoken the file is
+committed to the artifact store.
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from loguru import logger
+
+from src.agent.limits import get_stage_limiter
+from src.agent.summarize import ascript_prompt, script_prompt, summary_cache_key
+from src.audio.segments import SentenceStream
+from src.audio.tts import acached_text_to_speech, cached_text_to_speech
+from src.cache.script_cache import get_script_cache
+from src.clients.elevenlabs import get_async_elevenlabs_client, get_elevenlabs_client
+from src.clients.grok import get_async_groq_client, get_groq_client
+from src.clients.resilience import get_circuit_breaker
+from src.config import settings
+from src.observability.metrics import AUDIO_BYTES_WRITTEN, LLM_FIRST_TOKEN_SECONDS
+from src.storage.artifacts import get_artifact_store
+
+
+class _Timings:
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.first_audio = None
+        self.script_done = None
+
+    def audio_written(self) -> None:
+        if self.first_audio is None:
+            self.first_audio = time.perf_counter() - self.started
+
+    def finish(self, script: str, audio_file: str) -> dict:
+        total = time.perf_counter() - self.started
+        logger.info(
+            f"Time to first audio {self.first_audio or total:.2f}s, "
+            f"script finished after {self.script_done or total:.2f}s, audio after {total:.2f}s"
+        )
+        return {
+            "podcast_script": script,
+            "audio_file": audio_file,
+            "time_to_first_audio": self.first_audio if self.first_audio is not None else total,
+        }
+
+
+def stream_podcast(blog_content: str, llm=None, tts_client=None) -> dict:
+    key = summary_cache_key(blog_content)
+    cache = get_script_cache() if settings.cache.enabled else None
+    cached = cache.get(key) if cache is not None else None
+    llm = llm or get_groq_client()
+    tts_client = tts_client or get_elevenlabs_client()
+    timings = _Timings()
+    splitter = SentenceStream()
+    pending = deque()
+    parts = []
+
+    with ThreadPoolExecutor(max_workers=settings.eleven_labs.max_concurrency, thread_name_prefix="tts") as executor, \
+            get_stage_limiter().slot("tts"), get_artifact_store().writer(".mp3") as f:
+
+        def write_ready(block: bool) -> None:
+            written = f.size
+            while pending and (block or pending[0].done()):
+                audio = pending.popleft().result()
+                if audio:
+                    f.write(audio)
+                    AUDIO_BYTES_WRITTEN.inc(len(audio))
+            if f.size > written:
+                f.flush()
+                timings.audio_written()
+
+        def speak(text: str) -> None:
+            parts.append(text)
+            for sentence in splitter.feed(text):
+                pending.append(executor.submit(cached_text_to_speech, tts_client, sentence))
+            write_ready(block=False)
+
+        try:
+            if cached is not None:
+                speak(cached)
+            else:
+                # The script is spoken as it streams, so it is not cut off by a timeout; the breaker still applies.
+                with get_stage_limiter().slot("summarize"), get_circuit_breaker("groq").guard():
+                    # For long posts this runs the map step; the reduce step is streamed.
+                    prompt = script_prompt(blog_content, llm)
+                    requested = time.perf_counter()
+                    for chunk in llm.stream(prompt):
+                        if requested is not None:
+                            LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - requested)
+                            requested = None
+                        if chunk.content:
+                            speak(chunk.content)
+            for sentence in splitter.flush():
+                pending.append(executor.submit(cached_text_to_speech, tts_client, sentence))
+            timings.script_done = time.perf_counter() - timings.started
+            write_ready(block=True)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+
+    script = "".join(parts).strip()
+    if cache is not None and cached is None:
+        cache.set(key, script)
+    return timings.finish(script, f.path)
+
+
+async def astream_podcast(blog_content: str, llm=None, tts_client=None) -> dict:
+    key = summary_cache_key(blog_content)
+    cache = get_script_cache() if settings.cache.enabled else None
+    cached = await cache.aget(key) if cache is not None else None
+    llm = llm or get_async_groq_client()
+    tts_client = tts_client or get_async_elevenlabs_client()
+    timings = _Timings()
+    splitter = SentenceStream()
+    semaphore = asyncio.Semaphore(settings.eleven_labs.max_concurrency)
+    pending = deque()
+    parts = []
+
+    async def synthesize(sentence: str) -> bytes:
+        async with semaphore:
+            return await acached_text_to_speech(tts_client, sentence)
+
+    async with get_stage_limiter().aslot("tts"):
+        with get_artifact_store().writer(".mp3") as f:
+
+            async def write_ready(block: bool) -> None:
+                written = f.size
+                while pending and (block or pending[0].done()):
+                    audio = await pending.popleft()
+                    if audio:
+                        f.write(audio)
+                        AUDIO_BYTES_WRITTEN.inc(len(audio))
+                if f.size > written:
+                    f.flush()
+                    timings.audio_written()
+
+            async def speak(text: str) -> None:
+                parts.append(text)
+                for sentence in splitter.feed(text):
+                    pending.append(asyncio.create_task(synthesize(sentence)))
+                await write_ready(block=False)
+
+            try:
+                if cached is not None:
+                    await speak(cached)
+                else:
+                    async with get_stage_limiter().aslot("summarize"):
+                        with get_circuit_breaker("groq").guard():
+                            prompt = await ascript_prompt(blog_content, llm)
+                            requested = time.perf_counter()
+                            async for chunk in llm.astream(prompt):
+                                if requested is not None:
+                                    LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - requested)
+                                    requested = None
+                                if chunk.content:
+                                    await speak(chunk.content)
+                for sentence in splitter.flush():
+                    pending.append(asyncio.create_task(synthesize(sentence)))
+                timings.script_done = time.perf_counter() - timings.started
+                await write_ready(block=True)
+            finally:
+                for task in pending:
+                    task.cancel()
+
+    script = "".join(parts).strip()
+    if cache is not None and cached is None:
+        await cache.aset(key, script)
+    return timings.finish(script, f.path)
+
@@ -0,0 +1,115 @@
+"""Single-shot and map-reduce generation of the podcast script.
+
+Short posts are sent to the LLM in one prompt. Long posts would overflow
+the context window or make one slow generation wait on the whole input,
+so they are split along their markdown headings into chunks of
+``settings.summarization.chunk_tokens``. Notes are written for every chunk
+in parallel (map), and the script is written from the notes (reduce).
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+
+from src.agent.chunking import estimate_tokens, split_markdown
+from src.agent.prompt import get_map_prompt, get_reduce_prompt, get_summarization_prompt
+from src.cache.script_cache import groq_model_settings, script_cache_key
+from src.config import settings
+from src.observability.opik_utils import track
+
+SUMMARIZATION_MODES = ("auto", "single", "map_reduce")
+
+
+def use_map_reduce(blog_content: str, mode: Optional[str] = None) -> bool:
+    """Whether ``blog_content`` is summarized with map-reduce; ``mode`` overrides the setting."""
+    mode = mode or settings.summarization.mode
+    if mode not in SUMMARIZATION_MODES:
+        raise ValueError(f"Unknown summarization mode {mode!r}, expected one of {SUMMARIZATION_MODES}")
+    if mode == "auto":
+        return estimate_tokens(blog_content) >= settings.summarization.map_reduce_min_tokens
+    return mode == "map_reduce"
+
+
+def summary_cache_key(blog_content: str, mode: Optional[str] = None) -> str:
+    """Script cache key of ``blog_content``; the two modes never share scripts."""
+    if not use_map_reduce(blog_content, mode):
+        prompt_template = get_summarization_prompt()
+        return script_cache_key(blog_content, prompt_template.prompt, prompt_template.version, groq_model_settings())
+    map_prompt, reduce_prompt = get_map_prompt(), get_reduce_prompt()
+    return script_cache_key(
+        blog_content,
+        map_prompt.prompt + reduce_prompt.prompt,
+        f"{map_prompt.version}+{reduce_prompt.version}",
+        {
+            **groq_model_settings(),
+            "chunk_tokens": settings.summarization.chunk_tokens,
+            "map_max_tokens": settings.summarization.map_max_tokens,
+        },
+    )
+
+
+def _map_prompts(blog_content: str) -> list[str]:
+    chunks = split_markdown(blog_content, settings.summarization.chunk_tokens)
+    template = get_map_prompt().prompt
+    logger.info(
+        f"Map-reduce summarization of ~{estimate_tokens(blog_content)} tokens in {len(chunks)} chunks"
+    )
+    return [template.format(part=i, parts=len(chunks), chunk=chunk) for i, chunk in enumerate(chunks, 1)]
+
+
+def _join_notes(notes: list[str]) -> str:
+    return "\n\n".join(note.strip() for note in notes if note and note.strip())
+
+
+@track(name="summarizing-chunks", capture_input=False, capture_output=False)
+def condense(blog_content: str, complete: Callable[[str], str]) -> str:
+    """Map step: notes of every chunk of ``blog_content``, written by ``complete``, in post order."""
+    prompts = _map_prompts(blog_content)
+    with ThreadPoolExecutor(max_workers=max(settings.summarization.map_concurrency, 1)) as executor:
+        return _join_notes(list(executor.map(complete, prompts)))
+
+
+@track(name="summarizing-chunks", capture_input=False, capture_output=False)
+async def acondense(blog_content: str, acomplete: Callable[[str], Awaitable[str]]) -> str:
+    semaphore = asyncio.Semaphore(max(settings.summarization.map_concurrency, 1))
+
+    async def run(prompt):
+        async with semaphore:
+            return await acomplete(prompt)
+
+    return _join_notes(await asyncio.gather(*(run(prompt) for prompt in _map_prompts(blog_content))))
+
+
+def _map_llm(llm):
+    return llm.bind(max_tokens=settings.summarization.map_max_tokens)
+
+
+def script_prompt(blog_content: str, llm, mode: Optional[str] = None) -> str:
+    """The prompt that generates the script; for long posts the map step runs first on ``llm``."""
+    if not use_map_reduce(blog_content, mode):
+        return get_summarization_prompt().prompt.format(blog_content=blog_content)
+    map_llm = _map_llm(llm)
+    notes = condense(blog_content, lambda prompt: map_llm.invoke(prompt).content)
+    return get_reduce_prompt().prompt.format(notes=notes)
+
+
+async def ascript_prompt(blog_content: str, llm, mode: Optional[str] = None) -> str:
+    if not use_map_reduce(blog_content, mode):
+        return get_summarization_prompt().prompt.format(blog_content=blog_content)
+    map_llm = _map_llm(llm)
+
+    async def acomplete(prompt):
+        return (await map_llm.ainvoke(prompt)).content
+
+    notes = await acondense(blog_content, acomplete)
+    return get_reduce_prompt().prompt.format(notes=notes)
+
+
+def summarize(blog_content: str, llm, mode: Optional[str] = None) -> str:
+    """The podcast script of ``blog_content``, generated by the chat model ``llm``."""
+    return llm.invoke(script_prompt(blog_content, llm, mode)).content.strip()
+
+
+async def asummarize(blog_content: str, llm, mode: Optional[str] = None) -> str:
+    return (await llm.ainvoke(await ascript_prompt(blog_content, llm, mode))).content.strip()
@@ -0,0 +1,308 @@
+"""HTTP API for converting blog posts to podcasts.
+
+    python -m src.api [--host 127.0.0.1] [--port 8000]
+
+Conversions run on the same background job queue as the Streamlit app:
+
+``POST /podcasts``
+    Body ``{"url": "https://..."}``. Returns ``202`` with the job; asking
+    for a URL that is already being converted returns that job. Returns
+    ``503`` with ``Retry-After`` when too many conversions are waiting. The
+    body needs a ``Content-Length`` of at most ``api.max_body_bytes``.
+``GET /podcasts/{id}``
+    The job: its status, current stage, place in line and, once done, the
+    script and a link to the audio.
+``GET /podcasts/{id}/events``
+    Server-sent events with the job's progress: ``status`` first, then
+    ``started``, ``stage`` for every pipeline stage that begins, ``audio``
+    as streamed audio becomes playable, ``queued`` when its place in line
+    changes, and ``done`` or ``failed`` last. Each event's data is the job
+    as returned by ``GET /podcasts/{id}``.
+``GET /podcasts/{id}/audio``
+    The MP3, with support for ``Range`` requests so players can seek, and
+    ``ETag``/``Last-Modified`` revalidation. ``HEAD`` is supported too.
+    While the streaming pipeline is still speaking the script, the audio
+    so far is sent as it grows, until the podcast is complete.
+
+Requests are served on a thread each; the pipelines run on the job queue's
+event loop, so slow clients and open event streams do not hold up
+conversions.
+"""
+import argparse
+import json
+import queue
+import re
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from src.agent.admission import QueueFullError
+from src.audio.serving import follow_file, send_file
+from src.clients.http import start_warm_up
+from src.config import settings
+from src.jobs.queue import get_job_queue
+from src.jobs.store import DONE, FAILED, RUNNING, Job
+from src.observability.metrics import start_metrics_server
+from src.observability.opik_utils import configure_in_background
+
+_JOB_PATH = re.compile(r"^/podcasts/(?P<id>[0-9a-f]{32})(?P<tail>/events|/audio)?/?$")
+# Seconds a client should wait before submitting again after a 503.
+_RETRY_AFTER = 30
+
+
+def job_json(job: Job) -> dict:
+    """The API representation of ``job``."""
+    jobs = get_job_queue()
+    links = {"self": f"/podcasts/{job.id}", "events": f"/podcasts/{job.id}/events"}
+    body = {
+        "id": job.id,
+        "url": job.url,
+        "status": job.status,
+        "stage": job.stage,
+        "position": None if job.finished else jobs.position(job.id),
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "seconds": round(job.seconds, 3),
+        "error": job.error,
+        "links": links,
+    }
+    if job.status == DONE and job.result:
+        body["result"] = {key: value for key, value in job.result.items() if key != "audio_file"}
+        if job.result.get("audio_file"):
+            links["audio"] = f"/podcasts/{job.id}/audio"
+    elif job.status == RUNNING and job.partial_audio:
+        links["audio"] = f"/podcasts/{job.id}/audio"
+    return body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "Blog2Podcast"
+
+    def do_POST(self) -> None:
+        if self.path.split("?", 1)[0].rstrip("/") != "/podcasts":
+            self._send_error(HTTPStatus.NOT_FOUND, "Not found")
+            return
+        value = self.headers.get("Content-Length")
+        # Without a valid length the body cannot be delimited, so the connection is not reused either.
+        if value is None:
+            self._reject_body(HTTPStatus.LENGTH_REQUIRED, "Send the body with a Content-Length header")
+            return
+        value = value.strip()
+        if not (value.isascii() and value.isdigit()):
+            self._reject_body(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+            return
+        length = int(value)
+        if length > settings.api.max_body_bytes:
+            self._reject_body(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+            return
+        try:
+            url = json.loads(self.rfile.read(length) or b"{}").get("url")
+        except (ValueError, AttributeError):
+            self._send_error(HTTPStatus.BAD_REQUEST, 'Expected a JSON body like {"url": "https://..."}')
+            return
+        if not isinstance(url, str) or urlparse(url).scheme not in ("http", "https") or not urlparse(url).netloc:
+            self._send_error(HTTPStatus.BAD_REQUEST, "'url' must be an http(s) URL")
+            return
+        try:
+            job = get_job_queue().submit(url)
+        except QueueFullError as e:
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, str(e), {"Retry-After": str(_RETRY_AFTER)})
+            return
+        self._send_json(HTTPStatus.ACCEPTED, job_json(job), {"Location": f"/podcasts/{job.id}"})
+
+    def do_GET(self, head: bool = False) -> None:
+        match = _JOB_PATH.match(self.path.split("?", 1)[0])
+        job = get_job_queue().get(match["id"]) if match else None
+        if job is None:
+            self._send_error(HTTPStatus.NOT_FOUND, "No such podcast job")
+        elif match["tail"] == "/events":
+            self._stream_events(job)
+        elif match["tail"] == "/audio":
+            self._send_audio(job, head)
+        else:
+            self._send_json(HTTPStatus.OK, job_json(job))
+
+    def do_HEAD(self) -> None:
+        match = _JOB_PATH.match(self.path.split("?", 1)[0])
+        if match is None or match["tail"] != "/audio":
+            self.send_response(HTTPStatus.METHOD_NOT_ALLOWED)
+            self.send_header("Allow", "GET, POST")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.do_GET(head=True)
+
+    def _stream_events(self, job: Job) -> None:
+        jobs, job_id = get_job_queue(), job.id
+        # Subscribe before reading the job again, so no change in between is missed.
+        events = jobs.subscribe(job_id)
+        try:
+            # A job purged meanwhile keeps its last known state.
+            job = jobs.get(job_id) or job
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            state = job_json(job)
+            self._send_event(job.status if job.finished else "status", state)
+            position, last_write = state["position"], time.monotonic()
+            seen = (job.status, job.stage, job.partial_audio)
+            while not job.finished:
+                try:
+                    event, data = events.get(timeout=settings.jobs.poll_interval_seconds)
+                except queue.Empty:
+                    job = jobs.get(job_id) or job
+                    state = job_json(job)
+                    # Jobs run by the workers of another process publish no events here; report what the store shows.
+                    previous, seen = seen, (job.status, job.stage, job.partial_audio)
+                    if job.finished:
+                        self._send_event(job.status, state)
+                    elif job.status != previous[0] and job.status == RUNNING:
+                        self._send_event("started", state)
+                    elif job.stage != previous[1] and job.stage:
+                        self._send_event("stage", state)
+                    elif job.partial_audio != previous[2] and job.partial_audio:
+                        self._send_event("audio", state)
+                    elif state["position"] != position:
+                        position = state["position"]
+                        self._send_event("queued", state)
+                    elif time.monotonic() - last_write >= settings.api.heartbeat_seconds:
+                        self.wfile.write(b": keep-alive\n\n")
+                        self.wfile.flush()
+                    else:
+                        continue
+                    last_write = time.monotonic()
+                    continue
+                job = jobs.get(job_id) or job
+                state = job_json(job)
+                position, last_write = state["position"], time.monotonic()
+                seen = (job.status, job.stage, job.partial_audio)
+                self._send_event(event, {**state, **data})
+                if event in (DONE, FAILED):
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away; its subscription ends here.
+            pass
+        finally:
+            jobs.unsubscribe(job_id, events)
+
+    def _send_event(self, event: str, data: dict) -> None:
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _send_audio(self, job: Job, head: bool = False) -> None:
+        if job.status == RUNNING and job.partial_audio:
+            try:
+                follow_file(self, job.partial_audio, lambda: self._audio_done(job.id), head=head)
+                return
+            except FileNotFoundError:
+                # Committed to the artifact store in the meantime.
+                job = get_job_queue().get(job.id) or job
+        path = (job.result or {}).get("audio_file")
+        if job.status != DONE or not path:
+            self._send_error(HTTPStatus.CONFLICT, f"The podcast is not ready (status {job.status})")
+            return
+        try:
+            send_file(self, path, "audio/mpeg", max_age=settings.api.audio_cache_seconds, head=head)
+        except FileNotFoundError:
+            self._send_error(HTTPStatus.GONE, "The audio file is no longer available")
+
+    @staticmethod
+    def _audio_done(job_id: str) -> Optional[bool]:
+        job = get_job_queue().get(job_id)
+        if job is not None and job.status == RUNNING and job.partial_audio:
+            return None
+        return job is not None and job.status == DONE
+
+    def _send_json(self, status: HTTPStatus, payload: dict, headers: Optional[dict] = None) -> None:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: HTTPStatus, message: str, headers: Optional[dict] = None) -> None:
+        self._send_json(status, {"error": message}, headers)
+
+    def _reject_body(self, status: HTTPStatus, message: str) -> None:
+        """Answer with an error without reading the request body, and close the connection."""
+        self.close_connection = True
+        self._send_error(status, message, {"Connection": "close"})
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None) -> ThreadingHTTPServer:
+    """Start the API on a daemon thread; ``port`` 0 picks a free one (see ``server_address``).
+
+    The job queue, and with it the workers, only start once the port is bound.
+    """
+    server = ThreadingHTTPServer((host or settings.api.host, settings.api.port if port is None else port), _Handler)
+    server.daemon_threads = True
+    get_job_queue()
+    threading.Thread(target=server.serve_forever, name="api-server", daemon=True).start()
+    logger.info(f"Serving the Blog2Podcast API at http://{server.server_address[0]}:{server.server_address[1]}")
+    return server
+
+
+def start_api_server() -> Optional[ThreadingHTTPServer]:
+    """Serve the API on a daemon thread, once per process; ``None`` when the port is taken.
+
+    The Streamlit app starts it when ``api.public_url`` is set, for browsers
+    to stream the audio from. When the port is taken, normally by
+    ``python -m src.api`` on the same jobs file, that server answers instead.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = serve()
+            except OSError as e:
+                logger.warning(f"API not started on port {settings.api.port}: {e}")
+                return None
+        return _server
+
+
+def audio_url(job_id: str) -> Optional[str]:
+    """Where a browser fetches the audio of ``job_id``; ``None`` unless ``api.public_url`` says where browsers reach the API."""
+    if not settings.api.public_url:
+        return None
+    return f"{settings.api.public_url.rstrip('/')}/podcasts/{job_id}/audio"
+
+
+_server_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", help=f"Interface to listen on (default {settings.api.host}).")
+    parser.add_argument("--port", type=int, help=f"Port to listen on (default {settings.api.port}).")
+    args = parser.parse_args()
+
+    configure_in_background()
+    start_warm_up()
+    start_metrics_server()
+    server = serve(args.host, args.port)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
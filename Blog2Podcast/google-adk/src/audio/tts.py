@@ -0,0 +1,200 @@
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import AsyncIterator, Iterator, Optional
+
+from loguru import logger
+
+from src.audio.mp3 import concat_mp3
+from src.audio.segments import split_segments
+from src.cache.tts_cache import get_tts_cache, tts_cache_key
+from src.clients.resilience import acall_provider, call_provider
+from src.config import settings
+from src.observability.metrics import TTS_CHARACTERS, TTS_CHARACTERS_PER_SECOND
+
+
+def _convert_kwargs(text: str) -> dict:
+    return dict(
+        voice_id=settings.eleven_labs.voice_id,
+        optimize_streaming_latency=settings.eleven_labs.optimize_streaming_latency,
+        output_format=settings.eleven_labs.output_format,
+        text=text,
+        model_id=settings.eleven_labs.model_id,
+        # 429s are retried by the rate-limited transport; SDK retries would multiply them.
+        request_options={"max_retries": 0},
+    )
+
+
+def _record_speed(text: str, started: float) -> None:
+    TTS_CHARACTERS.inc(len(text))
+    seconds = time.perf_counter() - started
+    if seconds > 0:
+        TTS_CHARACTERS_PER_SECOND.observe(len(text) / seconds)
+
+
+def text_to_speech(client, text: str) -> bytes:
+    def convert() -> bytes:
+        started = time.perf_counter()
+        audio = client.text_to_speech.convert(**_convert_kwargs(text))
+        audio = b"".join(chunk for chunk in audio if chunk)
+        _record_speed(text, started)
+        return audio
+
+    # Synthesizing a segment again gives the same audio, so a slow request may be hedged.
+    return call_provider("elevenlabs", convert, timeout=settings.resilience.tts_timeout_seconds, hedge=True)
+
+
+async def atext_to_speech(client, text: str) -> bytes:
+    async def convert() -> bytes:
+        started = time.perf_counter()
+        audio = client.text_to_speech.convert(**_convert_kwargs(text))
+        audio = b"".join([chunk async for chunk in audio if chunk])
+        _record_speed(text, started)
+        return audio
+
+    return await acall_provider("elevenlabs", convert, timeout=settings.resilience.tts_timeout_seconds, hedge=True)
+
+
+def _segment_key(text: str) -> str:
+    return tts_cache_key(
+        text,
+        settings.eleven_labs.voice_id,
+        settings.eleven_labs.model_id,
+        settings.eleven_labs.output_format,
+    )
+
+
+def _plan(script: str, max_chars: Optional[int]) -> tuple[list[str], list[str]]:
+    max_chars = settings.eleven_labs.segment_max_chars if max_chars is None else max_chars
+    segments = split_segments(script, max_chars)
+    return segments, [_segment_key(segment) for segment in segments]
+
+
+def cached_text_to_speech(client, text: str) -> bytes:
+    """MP3 frames for ``text``, served from the TTS cache when possible."""
+    key = _segment_key(text)
+    cache = get_tts_cache() if settings.cache.enabled else None
+    audio = cache.get(key) if cache is not None else None
+    if audio is None:
+        audio = text_to_speech(client, text)
+        if cache is not None:
+            cache.set(key, audio)
+    return b"".join(concat_mp3([audio]))
+
+
+async def acached_text_to_speech(client, text: str) -> bytes:
+    key = _segment_key(text)
+    cache = get_tts_cache() if settings.cache.enabled else None
+    audio = await cache.aget(key) if cache is not None else None
+    if audio is None:
+        audio = await atext_to_speech(client, text)
+        if cache is not None:
+            await cache.aset(key, audio)
+    return b"".join(concat_mp3([audio]))
+
+
+def _log_summary(characters: dict, requests: int, segments: int, started: float) -> None:
+    logger.info(
+        f"Synthesized {characters['synthesized']} characters in {requests} requests and served "
+        f"{characters['cached']} from cache across {segments} segments "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+
+
+def synthesize_script(
+    client,
+    script: str,
+    max_chars: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Yield the MP3 audio of ``script`` segment by segment, in script order.
+
+    The script is split into segments under ``max_chars`` characters. Each
+    segment is looked up in the TTS cache first, and the remaining ones are
+    synthesized concurrently on at most ``max_workers`` threads. Segments
+    repeated within the script are synthesized once. The segments are
+    stitched by concatenating their MPEG frames, so no audio is re-encoded.
+    """
+    max_workers = max_workers or settings.eleven_labs.max_concurrency
+    segments, keys = _plan(script, max_chars)
+    cache = get_tts_cache() if settings.cache.enabled else None
+    started = time.perf_counter()
+    characters = {"synthesized": 0, "cached": 0}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts") as executor:
+        pending: dict[str, Future] = {}
+        audio: dict[str, bytes] = {}
+        for key, segment in zip(keys, segments):
+            if key in audio or key in pending:
+                continue
+            cached = cache.get(key) if cache is not None else None
+            if cached is not None:
+                audio[key] = cached
+                characters["cached"] += len(segment)
+            else:
+                pending[key] = executor.submit(text_to_speech, client, segment)
+                characters["synthesized"] += len(segment)
+
+        def ordered() -> Iterator[bytes]:
+            for key in keys:
+                if key not in audio:
+                    audio[key] = pending[key].result()
+                    if cache is not None:
+                        cache.set(key, audio[key])
+                yield audio[key]
+
+        try:
+            yield from concat_mp3(ordered())
+        except BaseException:
+            for future in pending.values():
+                future.cancel()
+            raise
+
+    _log_summary(characters, len(pending), len(segments), started)
+
+
+async def asynthesize_script(
+    client,
+    script: str,
+    max_chars: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """Async counterpart of :func:`synthesize_script` for the async ElevenLabs client."""
+    max_workers = max_workers or settings.eleven_labs.max_concurrency
+    segments, keys = _plan(script, max_chars)
+    cache = get_tts_cache() if settings.cache.enabled else None
+    started = time.perf_counter()
+    characters = {"synthesized": 0, "cached": 0}
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def synthesize(segment: str) -> bytes:
+        async with semaphore:
+            return await atext_to_speech(client, segment)
+
+    pending: dict[str, asyncio.Task] = {}
+    # One lookup off the event loop for all segments; the on-disk cache blocks.
+    cached = await cache.aget_many(keys) if cache is not None else {}
+    audio: dict[str, bytes] = {}
+    for key, segment in zip(keys, segments):
+        if key in audio or key in pending:
+            continue
+        if key in cached:
+            audio[key] = cached[key]
+            characters["cached"] += len(segment)
+        else:
+            pending[key] = asyncio.create_task(synthesize(segment))
+            characters["synthesized"] += len(segment)
+
+    try:
+        for key in keys:
+            if key not in audio:
+                audio[key] = await pending[key]
+                if cache is not None:
+                    await cache.aset(key, audio[key])
+            for frames in concat_mp3([audio[key]]):
+                yield frames
+    finally:
+        for task in pending.values():
+            task.cancel()
+
+    _log_summary(characters, len(pending), len(segments), started)
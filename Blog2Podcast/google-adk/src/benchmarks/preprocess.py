@@ -0,0 +1,75 @@
+"""Measure the token reduction of markdown pre-processing and its effect on summarization latency.
+
+Builds a post in the shape Firecrawl returns (navigation, images, links,
+code, a cookie banner and a repeated call to action around the article)
+and summarizes it with and without pre-processing on the simulated LLM
+from ``src.benchmarks.summarize``:
+
+    python -m src.benchmarks.preprocess --sections 12
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("CACHE__ENABLED", "false")
+
+from src.agent.chunking import estimate_tokens  # noqa: E402
+from src.agent.preprocess import preprocess  # noqa: E402
+from src.agent.prompt import get_map_prompt, get_reduce_prompt, get_summarization_prompt  # noqa: E402
+from src.agent.summarize import summarize  # noqa: E402
+from src.benchmarks.summarize import SimulatedChatModel  # noqa: E402
+from src.benchmarks.tts import SAMPLE_PARAGRAPH  # noqa: E402
+from src.config import settings  # noqa: E402
+
+NAVIGATION = "\n".join(
+    f"* [{item}](https://example.com/{item.lower()})" for item in ("Home", "Blog", "Pricing", "Docs", "About", "Contact")
+)
+COOKIE_BANNER = "We use cookies to improve your experience. [Accept all cookies](https://example.com/consent) or manage your consent in the cookie settings."
+CALL_TO_ACTION = "**Enjoyed this post?** [Subscribe to our newsletter](https://example.com/newsletter) for weekly updates."
+CODE = "```python\nfor url in urls:\n    result = convert(url)\n    print(result)\n```"
+
+
+def build_noisy_post(sections: int) -> str:
+    parts = [NAVIGATION, COOKIE_BANNER, "# How we cut our LLM bill"]
+    for i in range(1, sections + 1):
+        parts += [
+            f"## Part {i}",
+            f"![Diagram {i}](https://cdn.example.com/images/diagram-{i}.png)",
+            f"In part {i}: " + SAMPLE_PARAGRAPH.replace("software", "[software](https://en.wikipedia.org/wiki/Software)"),
+            f"To sum up part {i}: {SAMPLE_PARAGRAPH}",
+            CODE,
+            CALL_TO_ACTION,
+        ]
+    parts += [NAVIGATION, "© 2025 Example Inc. All rights reserved."]
+    return "\n\n".join(parts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=12, help="Number of sections in the generated post.")
+    parser.add_argument("--first-token", type=float, default=0.2, help="Simulated LLM time to first token in seconds.")
+    parser.add_argument("--prefill", type=float, default=4000, help="Simulated prompt processing speed in tokens per second.")
+    parser.add_argument("--decode", type=float, default=250, help="Simulated generation speed in tokens per second.")
+    args = parser.parse_args()
+
+    get_summarization_prompt(), get_map_prompt(), get_reduce_prompt()
+    llm = SimulatedChatModel(args.first_token, args.prefill, args.decode, settings.groq.max_tokens)
+    raw = build_noisy_post(args.sections)
+    cleaned, stats = preprocess(raw)
+
+    started = time.perf_counter()
+    summarize(raw, llm)
+    raw_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    summarize(cleaned, llm)
+    cleaned_seconds = time.perf_counter() - started
+
+    print(f"input tokens:     {estimate_tokens(raw)} -> {estimate_tokens(cleaned)} "
+          f"({1 - estimate_tokens(cleaned) / estimate_tokens(raw):.0%} fewer)")
+    print(f"pre-processing:   {stats['seconds'] * 1000:.1f} ms")
+    print(f"summarize raw:     {raw_seconds:.2f}s")
+    print(f"summarize cleaned: {cleaned_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,47 @@
+from functools import lru_cache
 
-from langchain_groq import ChatGroq
+from src.clients.http import get_async_http_client, get_http_client, per_event_loop
 from src.config import settings
 
+@lru_cache(maxsize=1)
 def get_groq_client():
+    if settings.fakes.enabled:
+        from src.clients.fakes import FakeChatModel
+
+        return FakeChatModel()
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(
+            model=settings.groq.model,
+            api_key=settings.groq.api_key,
+            temperature=settings.groq.temperature,
+            max_tokens=settings.groq.max_tokens,
+            # 429s are retried by the rate-limited transport; SDK retries would multiply them.
+            max_retries=0,
+            http_client=get_http_client("groq"),
+        )
+
+@per_event_loop
+def get_async_groq_client():
+    """Groq client for async calls; its connections belong to the running event loop."""
+    if settings.fakes.enabled:
+        from src.clients.fakes import FakeChatModel
+
+        return FakeChatModel()
+    from langchain_groq import ChatGroq
+
     return ChatGroq(
             model=settings.groq.model,
             api_key=settings.groq.api_key,
             temperature=settings.groq.temperature,
             max_tokens=settings.groq.max_tokens,
+            # 429s are retried by the rate-limited transport; SDK retries would multiply them.
+            max_retries=0,
+            http_client=get_http_client("groq"),
+            http_async_client=get_async_http_client("groq"),
         )
 
 if __name__ == "__main__":
     client = get_groq_client()
     response = client.chat("What is the capital of France?")
-    print(response)
\ No newline at end of file
+    print(response)
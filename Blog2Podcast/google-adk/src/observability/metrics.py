@@ -0,0 +1,316 @@
+"""In-process pipeline metrics, exported without Opik.
+
+Counters, gauges and histograms live in one registry per process and cost
+a dictionary update under a lock to record. Every ``@track``-ed stage
+records its duration, errors and how many calls are in progress; the
+providers, text-to-speech, audio output and stage slots add their own
+metrics, and the cache statistics are read when the metrics are exported.
+
+:func:`metrics_snapshot` returns everything as a JSON-serializable dict;
+with ``METRICS__PORT`` set, :func:`start_metrics_server` serves it at
+``/metrics.json`` and in the Prometheus text format at ``/metrics``.
+"""
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable, Optional
+
+from loguru import logger
+
+from src.config import settings
+
+PREFIX = "blog2podcast_"
+
+# Upper bounds in seconds, from cache hits to long generations.
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 60, 120, 300)
+RATE_BUCKETS = (50, 100, 200, 400, 800, 1600, 3200, 6400)
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = PREFIX + name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def samples(self) -> list[tuple[dict, object]]:
+        with self._lock:
+            values = [(key, self._copy(value)) for key, value in self._values.items()]
+        return [(dict(zip(self.labels, key)), value) for key, value in sorted(values, key=lambda item: item[0])]
+
+    def _copy(self, value):
+        return value
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not settings.metrics.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Family):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        if not settings.metrics.enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not settings.metrics.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Family):
+    """Observations counted into cumulative ``le`` buckets, with their count and sum."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: Iterable[float] = SECONDS_BUCKETS) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        if not settings.metrics.enabled:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # One count per bucket plus +Inf, then the sum of the observations.
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _copy(self, counts: list) -> dict:
+        cumulative, total = [], 0
+        for count in counts[:-1]:
+            total += count
+            cumulative.append(total)
+        return {
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], cumulative)),
+            "count": total,
+            "sum": counts[-1],
+        }
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._families: dict[str, _Family] = {}
+        self._collectors: list[Callable[[], Iterable[tuple[str, str, str, dict, float]]]] = []
+
+    def _family(self, cls, name: str, help: str, labels: tuple[str, ...], **kwargs) -> _Family:
+        with self._lock:
+            family = self._families.get(PREFIX + name)
+            if family is None:
+                family = self._families[PREFIX + name] = cls(name, help, labels, **kwargs)
+            return family
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._family(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._family(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: Iterable[float] = SECONDS_BUCKETS) -> Histogram:
+        return self._family(Histogram, name, help, labels, buckets=buckets)
+
+    def register_collector(self, collect: Callable[[], Iterable[tuple[str, str, str, dict, float]]]) -> None:
+        """Add ``collect``, called on every export, yielding ``(name, kind, help, labels, value)`` samples."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def _collected(self) -> list[_Family]:
+        with self._lock:
+            collectors = list(self._collectors)
+        families: dict[str, _Family] = {}
+        for collect in collectors:
+            try:
+                samples = list(collect())
+            except Exception as e:
+                logger.warning(f"Metrics collector {getattr(collect, '__name__', collect)} failed: {e}")
+                continue
+            for name, kind, help, labels, value in samples:
+                family = families.get(name)
+                if family is None:
+                    family = families[name] = (Counter if kind == "counter" else Gauge)(name, help, tuple(labels))
+                family._values[family._key(labels)] = value
+        return list(families.values())
+
+    def families(self) -> list[_Family]:
+        with self._lock:
+            families = list(self._families.values())
+        return sorted(families + self._collected(), key=lambda family: family.name)
+
+    def snapshot(self) -> dict:
+        return {
+            family.name: {
+                "type": family.kind,
+                "help": family.help,
+                "samples": [{"labels": labels, "value": value} for labels, value in family.samples()],
+            }
+            for family in self.families()
+        }
+
+    def prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for family in self.families():
+            lines.append(f"# HELP {family.name} {_escape_help(family.help)}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, value in family.samples():
+                if family.kind != "histogram":
+                    lines.append(f"{family.name}{_labels(labels)} {_number(value)}")
+                    continue
+                for bound, count in value["buckets"].items():
+                    lines.append(f"{family.name}_bucket{_labels({**labels, 'le': bound})} {count}")
+                lines.append(f"{family.name}_sum{_labels(labels)} {_number(value['sum'])}")
+                lines.append(f"{family.name}_count{_labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value) -> str:
+    return _escape_help(str(value)).replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+@lru_cache(maxsize=1)
+def get_metrics() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.register_collector(_cache_samples)
+    registry.register_collector(_stage_slot_samples)
+    return registry
+
+
+def metrics_snapshot() -> dict:
+    """All metrics as a JSON-serializable dict, keyed by metric name."""
+    return get_metrics().snapshot()
+
+
+def _cache_samples():
+    # Caches are only read once the pipeline has created them.
+    from src.cache.scrape_cache import get_scrape_cache
+    from src.cache.script_cache import get_script_cache
+    from src.cache.tts_cache import get_tts_cache
+
+    for name, get_cache in (("scrape", get_scrape_cache), ("script", get_script_cache), ("tts", get_tts_cache)):
+        if not get_cache.cache_info().currsize:
+            continue
+        stats = get_cache().stats()
+        labels = {"cache": name}
+        yield "cache_hits_total", "counter", "Cache lookups answered from the cache.", labels, stats["hits"] + stats.get("revalidated", 0)
+        yield "cache_misses_total", "counter", "Cache lookups that went to the provider.", labels, stats["misses"]
+        yield "cache_hit_ratio", "gauge", "Share of cache lookups answered from the cache.", labels, stats["hit_rate"]
+
+
+def _stage_slot_samples():
+    from src.agent.limits import get_stage_limiter
+
+    for stage, count in get_stage_limiter().in_flight().items():
+        yield "stage_slots_in_use", "gauge", "Pipelines holding a concurrency slot of the stage.", {"stage": stage}, count
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body, content_type = get_metrics().prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body, content_type = json.dumps(metrics_snapshot()).encode("utf-8"), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        # Scrapes every few seconds would flood stderr.
+        pass
+
+
+_server_lock = threading.Lock()
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None) -> Optional[ThreadingHTTPServer]:
+    """Serve the metrics on a daemon thread, once per process; ``None`` when no port is configured."""
+    global _server
+    port = settings.metrics.port if port is None else port
+    if not port or not settings.metrics.enabled:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host or settings.metrics.host, port), _Handler)
+            except OSError as e:
+                # Another process of the app, e.g. a second Streamlit session, already serves this port.
+                logger.warning(f"Metrics endpoint not started on port {port}: {e}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+            logger.info(f"Serving metrics at http://{_server.server_address[0]}:{_server.server_address[1]}/metrics")
+        return _server
+
+
+_metrics = get_metrics()
+
+STAGE_SECONDS = _metrics.histogram("stage_duration_seconds", "Duration of a pipeline stage call.", ("stage",))
+STAGE_ERRORS = _metrics.counter("stage_errors_total", "Pipeline stage calls that raised.", ("stage", "error"))
+STAGES_IN_PROGRESS = _metrics.gauge("stage_in_progress", "Pipeline stage calls currently running.", ("stage",))
+SLOT_WAIT_SECONDS = _metrics.histogram("stage_slot_wait_seconds", "Time waited for a stage concurrency slot.", ("stage",))
+ADMISSION_WAIT_SECONDS = _metrics.histogram("admission_wait_seconds", "Time a pipeline run waited for admission.", ("priority",))
+PROVIDER_SECONDS = _metrics.histogram("provider_request_seconds", "Duration of a successful provider call attempt.", ("provider",))
+LLM_FIRST_TOKEN_SECONDS = _metrics.histogram("llm_time_to_first_token_seconds", "Time from sending a streamed LLM request to its first token.")
+TTS_CHARACTERS = _metrics.counter("tts_characters_total", "Characters synthesized by the text-to-speech provider.")
+TTS_CHARACTERS_PER_SECOND = _metrics.histogram(
+    "tts_characters_per_second", "Synthesis speed of one text-to-speech request.", buckets=RATE_BUCKETS
+)
+AUDIO_BYTES_WRITTEN = _metrics.counter("audio_bytes_written_total", "MP3 bytes written to podcast files.")
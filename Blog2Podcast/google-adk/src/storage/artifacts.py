@@ -0,0 +1,278 @@
+"""Content-addressed store for generated files, such as the podcast MP3s.
+
+An artifact is named after the SHA-256 of its bytes, so identical audio,
+for example a script voiced twice from the TTS cache, is stored once. It
+is written to a temporary file through a buffer while being hashed, then
+renamed into place, so readers of the artifact never see a partial file.
+A writer streaming audio can still let listeners play the temporary file
+while it grows (:attr:`ArtifactWriter.partial_path`); the rename does not
+disturb those that have it open. Garbage
+collection removes artifacts unused for longer than ``max_age`` and then
+the least recently used ones until the store fits ``max_bytes``; writing
+or reusing an artifact counts as a use.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+
+from loguru import logger
+
+from src.config import settings
+from src.observability.metrics import get_metrics
+
+# Temporary files older than this are left over from a crashed writer.
+_STALE_TEMP_SECONDS = 3600
+_partial_listeners: list[Callable[[str, int], None]] = []
+
+
+def add_partial_listener(listener: Callable[[str, int], None]) -> None:
+    """Call ``listener(partial_path, size)`` whenever a writer flushes, e.g. to let a job's clients play its audio while it is streamed."""
+    _partial_listeners.append(listener)
+
+
+@dataclass
+class Artifact:
+    name: str
+    size: int
+    used_at: float
+
+
+class ArtifactBackend(ABC):
+    """Where artifacts are kept, by name."""
+
+    @abstractmethod
+    def open_temp(self, buffer_bytes: int) -> tuple[BinaryIO, str]:
+        """A buffered file to write a new artifact to, and its temporary name, a path readers can open while it is written."""
+
+    @abstractmethod
+    def commit(self, temp: str, name: str) -> bool:
+        """Move the written temporary file to ``name``; ``False`` if ``name`` existed and the temporary file was dropped."""
+
+    @abstractmethod
+    def discard(self, temp: str) -> None: ...
+
+    @abstractmethod
+    def location(self, name: str) -> str:
+        """The path readers open the artifact at."""
+
+    @abstractmethod
+    def delete(self, name: str) -> None: ...
+
+    @abstractmethod
+    def list(self) -> list[Artifact]: ...
+
+    @abstractmethod
+    def remove_stale_temps(self, older_than: float) -> int: ...
+
+
+class LocalArtifactBackend(ArtifactBackend):
+    """Artifacts as files in one directory; temporary files in its ``tmp`` subdirectory, on the same file system."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self._temp_directory = self.directory / "tmp"
+        self._temp_directory.mkdir(parents=True, exist_ok=True)
+
+    def open_temp(self, buffer_bytes: int) -> tuple[BinaryIO, str]:
+        fd, temp = tempfile.mkstemp(dir=self._temp_directory, suffix=".part")
+        return os.fdopen(fd, "wb", buffering=buffer_bytes), temp
+
+    def commit(self, temp: str, name: str) -> bool:
+        path = self.directory / name
+        try:
+            # Mark the existing copy as recently used, so GC keeps it.
+            os.utime(path)
+        except FileNotFoundError:
+            # Not there, or just collected by a concurrent GC: keep the new copy.
+            pass
+        else:
+            os.unlink(temp)
+            return False
+        # Atomic: a concurrent writer of the same bytes replaces it with an identical file.
+        os.replace(temp, path)
+        return True
+
+    def discard(self, temp: str) -> None:
+        Path(temp).unlink(missing_ok=True)
+
+    def location(self, name: str) -> str:
+        return str(self.directory / name)
+
+    def delete(self, name: str) -> None:
+        (self.directory / name).unlink(missing_ok=True)
+
+    def list(self) -> list[Artifact]:
+        artifacts = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                artifacts.append(Artifact(entry.name, stat.st_size, stat.st_mtime))
+        return artifacts
+
+    def remove_stale_temps(self, older_than: float) -> int:
+        removed = 0
+        for entry in os.scandir(self._temp_directory):
+            try:
+                if entry.stat().st_mtime < time.time() - older_than:
+                    os.unlink(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+
+def create_artifact_backend(kind: str, directory: str | Path) -> ArtifactBackend:
+    if kind == "local":
+        return LocalArtifactBackend(directory)
+    raise ValueError(f"Unknown artifact backend '{kind}'. Expected 'local'.")
+
+
+class ArtifactWriter:
+    """Buffered, hashing writer of one artifact; :attr:`path` is set when the ``with`` block ends without an error.
+
+    Until then the bytes written up to the last :meth:`flush` can be read at
+    :attr:`partial_path`.
+    """
+
+    def __init__(self, store: "ArtifactStore", suffix: str) -> None:
+        self._store = store
+        self._suffix = suffix
+        self._hash = hashlib.sha256()
+        self._file, self._temp = store.backend.open_temp(store.write_buffer_bytes)
+        self.size = 0
+        self.path: Optional[str] = None
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += len(data)
+
+    def flush(self) -> None:
+        """Make everything written so far readable at :attr:`partial_path`."""
+        self._file.flush()
+        for listener in _partial_listeners:
+            listener(self._temp, self.size)
+
+    @property
+    def partial_path(self) -> str:
+        return self._temp
+
+    def __enter__(self) -> "ArtifactWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self._file.close()
+        finally:
+            if exc_type is not None:
+                self._store.backend.discard(self._temp)
+        if exc_type is None:
+            self.path = self._store._commit(self._temp, f"{self._hash.hexdigest()}{self._suffix}", self.size)
+
+
+class ArtifactStore:
+    def __init__(
+        self,
+        backend: ArtifactBackend,
+        max_bytes: int = 0,
+        max_age: float = 0,
+        gc_interval: float = 300,
+        write_buffer_bytes: int = 1024 * 1024,
+    ) -> None:
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.gc_interval = gc_interval
+        self.write_buffer_bytes = write_buffer_bytes
+        self._lock = threading.Lock()
+        self._gc_lock = threading.Lock()
+        self._bytes: Optional[int] = None
+        self._last_gc = 0.0
+        self._stats = {"written": 0, "deduplicated": 0, "collected": 0, "collected_bytes": 0}
+
+    def writer(self, suffix: str = "") -> ArtifactWriter:
+        """Write an artifact in chunks: ``with store.writer(".mp3") as f: f.write(...)``, then ``f.path``."""
+        return ArtifactWriter(self, suffix)
+
+    def put(self, data: bytes, suffix: str = "") -> str:
+        with self.writer(suffix) as f:
+            f.write(data)
+        return f.path
+
+    def gc(self, keep: Optional[str] = None) -> dict:
+        """Remove expired artifacts, then the least recently used ones until the store is within its quota.
+
+        The artifact named ``keep``, one just written, is never removed.
+        """
+        with self._gc_lock:
+            removed = removed_bytes = 0
+            artifacts = sorted(self.backend.list(), key=lambda artifact: artifact.used_at)
+            total = sum(artifact.size for artifact in artifacts)
+            now = time.time()
+            for artifact in artifacts:
+                if artifact.name == keep:
+                    continue
+                expired = bool(self.max_age) and artifact.used_at < now - self.max_age
+                if not expired and not (self.max_bytes and total > self.max_bytes):
+                    break
+                self.backend.delete(artifact.name)
+                total -= artifact.size
+                removed += 1
+                removed_bytes += artifact.size
+            temps = self.backend.remove_stale_temps(_STALE_TEMP_SECONDS)
+            with self._lock:
+                self._bytes = total
+                self._last_gc = time.monotonic()
+                self._stats["collected"] += removed
+                self._stats["collected_bytes"] += removed_bytes
+            if removed or temps:
+                logger.info(f"Artifact GC removed {removed} artifacts ({removed_bytes} bytes) and {temps} stale temporary files")
+            return {"removed": removed, "removed_bytes": removed_bytes, "bytes": total}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "bytes": self._bytes}
+
+    def _commit(self, temp: str, name: str, size: int) -> str:
+        created = self.backend.commit(temp, name)
+        with self._lock:
+            self._stats["written" if created else "deduplicated"] += 1
+            if created and self._bytes is not None:
+                self._bytes += size
+            due = self._bytes is None or time.monotonic() - self._last_gc >= self.gc_interval \
+                or bool(self.max_bytes) and self._bytes > self.max_bytes
+        if due:
+            self.gc(keep=name)
+        return self.backend.location(name)
+
+
+def _artifact_samples():
+    stats = get_artifact_store().stats()
+    if stats["bytes"] is not None:
+        yield "artifact_bytes", "gauge", "Bytes of stored artifacts as of the last write or collection.", {}, stats["bytes"]
+    yield "artifacts_written_total", "counter", "Artifacts stored.", {}, stats["written"]
+    yield "artifacts_deduplicated_total", "counter", "Artifact writes whose content was already stored.", {}, stats["deduplicated"]
+    yield "artifacts_collected_total", "counter", "Artifacts removed by garbage collection.", {}, stats["collected"]
+
+
+@lru_cache(maxsize=1)
+def get_artifact_store() -> ArtifactStore:
+    backend = create_artifact_backend(settings.artifacts.backend, settings.artifacts.directory)
+    get_metrics().register_collector(_artifact_samples)
+    return ArtifactStore(
+        backend,
+        max_bytes=settings.artifacts.max_bytes,
+        max_age=settings.artifacts.max_age_seconds,
+        gc_interval=settings.artifacts.gc_interval_seconds,
+        write_buffer_bytes=settings.artifacts.write_buffer_bytes,
+    )
@@ -0,0 +1,183 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from typing import Optional
+
+from src.config import settings
+from src.observability.metrics import ADMISSION_WAIT_SECONDS, get_metrics
+
+INTERACTIVE, BATCH = 0, 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+
+class QueueFullError(Exception):
+    """Too many runs are waiting already; the run was not queued."""
+
+    def __init__(self, waiting: int) -> None:
+        super().__init__(
+            f"Blog2Podcast is busy: {waiting} conversions are already waiting. Please try again in a few minutes."
+        )
+        self.waiting = waiting
+
+
+class _Waiter:
+    def __init__(self, priority: int, seq: int, key: Optional[str], loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        self.priority = priority
+        self.seq = seq
+        self.key = key
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+        self.admitted = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AdmissionController:
+    """Caps how many pipeline runs are in flight in the process.
+
+    Runs beyond ``max_in_flight`` wait in line: interactive runs before
+    batch runs, each in arrival order. A freed slot is handed straight to
+    the first in line. At most ``max_queued`` interactive runs wait; further
+    ones are rejected with :class:`QueueFullError` instead of piling up.
+    Batch runs are bounded by their callers (``pipeline.batch_max_in_flight``)
+    and are never rejected. Threads and event loops share the same slots.
+    A limit of ``0`` leaves it unbounded.
+    """
+
+    def __init__(self, max_in_flight: int, max_queued: int) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._stats = {"admitted": 0, "queued": 0, "rejected": 0}
+
+    @contextmanager
+    def admit(self, priority: int = INTERACTIVE, key: Optional[str] = None):
+        """Hold a run slot for the enclosed block; ``key`` identifies the run for :meth:`position`."""
+        requested = time.perf_counter()
+        waiter = self._enter(priority, key, None)
+        if waiter is not None:
+            try:
+                waiter.event.wait()
+            except BaseException:
+                self._abandon(waiter)
+                raise
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - requested, priority=PRIORITY_NAMES[priority])
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def aadmit(self, priority: int = INTERACTIVE, key: Optional[str] = None):
+        requested = time.perf_counter()
+        waiter = self._enter(priority, key, asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await waiter.future
+            except BaseException:
+                self._abandon(waiter)
+                raise
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - requested, priority=PRIORITY_NAMES[priority])
+        try:
+            yield
+        finally:
+            self._release()
+
+    def position(self, key: str) -> Optional[int]:
+        """Place in line (1 for next) of the waiting run ``key``; ``None`` when it is not waiting."""
+        with self._lock:
+            waiter = next((w for w in self._waiters if w.key == key), None)
+            if waiter is None:
+                return None
+            return 1 + sum(1 for w in self._waiters if w < waiter)
+
+    def waiting(self, priority: Optional[int] = None) -> int:
+        with self._lock:
+            return self._waiting(priority)
+
+    @property
+    def capacity(self) -> int:
+        """Interactive runs that can be in flight or waiting before new ones are rejected (0 for unbounded)."""
+        if not self.max_in_flight or not self.max_queued:
+            return 0
+        return self.max_in_flight + self.max_queued
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "running": self._running,
+                "waiting_interactive": self._waiting(INTERACTIVE),
+                "waiting_batch": self._waiting(BATCH),
+            }
+
+    def _waiting(self, priority: Optional[int]) -> int:
+        return sum(1 for w in self._waiters if priority is None or w.priority == priority)
+
+    def _enter(self, priority: int, key: Optional[str], loop) -> Optional[_Waiter]:
+        with self._lock:
+            if not self.max_in_flight or self._running < self.max_in_flight:
+                self._running += 1
+                self._stats["admitted"] += 1
+                return None
+            if priority == INTERACTIVE and self.max_queued and self._waiting(INTERACTIVE) >= self.max_queued:
+                self._stats["rejected"] += 1
+                raise QueueFullError(self._waiting(None))
+            waiter = _Waiter(priority, next(self._seq), key, loop)
+            heapq.heappush(self._waiters, waiter)
+            self._stats["queued"] += 1
+            return waiter
+
+    def _release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                # The slot passes to the next run without being freed, so no newcomer can take it first.
+                waiter = heapq.heappop(self._waiters)
+                waiter.admitted = True
+                self._stats["admitted"] += 1
+                waiter.wake()
+                return
+            self._running -= 1
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """A waiting run gave up (cancelled or interrupted): leave the line, or pass on a slot it was just given."""
+        with self._lock:
+            if not waiter.admitted:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+                return
+        self._release()
+
+
+def _admission_samples():
+    stats = get_admission_controller().stats()
+    yield "runs_in_flight", "gauge", "Pipeline runs holding an admission slot.", {}, stats["running"]
+    for priority in ("interactive", "batch"):
+        yield "runs_waiting", "gauge", "Pipeline runs waiting for admission.", {"priority": priority}, stats[f"waiting_{priority}"]
+    yield "runs_rejected_total", "counter", "Interactive runs rejected because the wait queue was full.", {}, stats["rejected"]
+
+
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController:
+    get_metrics().register_collector(_admission_samples)
+    return AdmissionController(settings.pipeline.max_in_flight_runs, settings.pipeline.max_queued_runs)
@@ -0,0 +1,148 @@
+"""Clean-up of scraped markdown before it reaches the LLM.
+
+Firecrawl's markdown keeps a lot that never makes it into a podcast:
+images, link targets, code blocks, navigation lists, cookie banners and
+text repeated on every page. Every token of it is paid for and waited on
+in the summarization prompt, so it is stripped here. The result is then
+held to a token budget by dropping trailing sections.
+"""
+import re
+import time
+
+from loguru import logger
+
+from src.agent.chunking import estimate_tokens, split_markdown
+from src.config import settings
+
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_EMPTY_LINK = re.compile(r"\[\s*\]\([^)]*\)")
+_LINK = re.compile(r"\[([^\]]+)\]\((?:[^()]|\([^)]*\))*\)")
+_REFERENCE_LINK = re.compile(r"\[([^\]]+)\]\[[^\]]*\]")
+_REFERENCE_DEFINITION = re.compile(r"^\s*\[[^\]]+\]:\s*\S+.*$")
+_LINK_ONLY_LINE = re.compile(r"^\s*(?:[-*+]|\d+\.)?\s*\[[^\]]*\]\([^)]*\)\s*$")
+_URL = re.compile(r"<?https?://[^\s>)]*[^\s>).,;:!?]>?")
+_HTML_TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+# Bold markers around words; ``a**2`` or ``__init__`` are left alone.
+_EMPHASIS = re.compile(r"(?<!\w)(\*\*|__)(?=\S)(.+?)(?<=\S)\1(?!\w)")
+_INLINE_CODE = re.compile(r"(`+).+?\1")
+_RULE = re.compile(r"^\s*([-*_]\s*){3,}$")
+_HEADING = re.compile(r"^#{1,6}\s")
+_SPACES = re.compile(r"[ \t]{2,}")
+_SPACE_BEFORE_PUNCTUATION = re.compile(r"(?<=\S)[ \t]+(?=[.,;:!?](\s|$))")
+_BOILERPLATE = re.compile(
+    r"(?i)\b(we use cookies|this (web)?site uses cookies|accept (all )?cookies|cookie (policy|settings|preferences)"
+    r"|manage (your )?consent|subscribe to (our|the) newsletter|sign up for (our|the) newsletter"
+    r"|share (this|on) (post|article|facebook|twitter|linkedin)|all rights reserved|skip to (main )?content)\b"
+)
+# Banners are short; a long paragraph that mentions cookies is content.
+_BOILERPLATE_MAX_WORDS = 60
+
+
+def clean_markdown(markdown: str, drop_code: bool = True) -> str:
+    """``markdown`` without the parts that carry nothing for a spoken summary."""
+    lines, in_code = [], False
+    for line in markdown.splitlines():
+        if _FENCE.match(line):
+            in_code = not in_code
+            if not drop_code:
+                lines.append(line)
+            continue
+        if in_code:
+            if not drop_code:
+                lines.append(line)
+            continue
+        if _LINK_ONLY_LINE.match(line) or _REFERENCE_DEFINITION.match(line) or _RULE.match(line):
+            # Navigation entries, "read more" links and link targets.
+            continue
+        line = _outside_code(line, _clean_prose)
+        line = _SPACE_BEFORE_PUNCTUATION.sub("", _SPACES.sub(" ", line))
+        lines.append(line.rstrip())
+
+    paragraphs, seen = [], set()
+    for paragraph in "\n".join(lines).split("\n\n"):
+        paragraph = paragraph.strip("\n")
+        if not paragraph.strip():
+            continue
+        if not _HEADING.match(paragraph):
+            if len(paragraph.split()) <= _BOILERPLATE_MAX_WORDS and _BOILERPLATE.search(paragraph):
+                continue
+            # Text repeated within a page (calls to action, bylines, disclaimers) is kept once.
+            fingerprint = " ".join(paragraph.lower().split())
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+        paragraphs.append(paragraph)
+    return "\n\n".join(_drop_empty_sections(paragraphs))
+
+
+def _clean_prose(text: str) -> str:
+    text = _IMAGE.sub("", text)
+    text = _EMPTY_LINK.sub("", text)
+    text = _LINK.sub(r"\1", text)
+    text = _REFERENCE_LINK.sub(r"\1", text)
+    text = _URL.sub("", text)
+    text = _HTML_TAG.sub("", text)
+    return _EMPHASIS.sub(r"\2", text)
+
+
+def _outside_code(line: str, clean) -> str:
+    """``line`` with ``clean`` applied to the text between its inline code spans, which are kept as they are."""
+    parts, start = [], 0
+    for match in _INLINE_CODE.finditer(line):
+        parts.append(clean(line[start:match.start()]))
+        parts.append(match.group(0))
+        start = match.end()
+    parts.append(clean(line[start:]))
+    return "".join(parts)
+
+
+def _drop_empty_sections(paragraphs: list[str]) -> list[str]:
+    """Headings followed directly by another heading of the same or a higher level lost their content."""
+    kept = []
+    for i, paragraph in enumerate(paragraphs):
+        if _HEADING.match(paragraph):
+            level = len(paragraph) - len(paragraph.lstrip("#"))
+            following = paragraphs[i + 1] if i + 1 < len(paragraphs) else None
+            if following is None or (
+                _HEADING.match(following) and len(following) - len(following.lstrip("#")) <= level
+            ):
+                continue
+        kept.append(paragraph)
+    return kept
+
+
+def enforce_budget(markdown: str, max_tokens: int) -> str:
+    """The leading part of ``markdown`` that fits ``max_tokens``, cut at section or paragraph boundaries."""
+    if max_tokens <= 0 or estimate_tokens(markdown) <= max_tokens:
+        return markdown
+    kept, used = [], 0
+    for chunk in split_markdown(markdown, max(max_tokens // 8, 1)):
+        tokens = estimate_tokens(chunk) + 1
+        if used + tokens > max_tokens:
+            break
+        kept.append(chunk)
+        used += tokens
+    return "\n\n".join(kept)
+
+
+def preprocess(markdown: str) -> tuple[str, dict]:
+    """Clean ``markdown`` and fit it to the token budget; returns the text and token counts."""
+    started = time.perf_counter()
+    tokens_before = estimate_tokens(markdown)
+    cleaned = clean_markdown(markdown, drop_code=settings.preprocess.drop_code)
+    tokens_cleaned = estimate_tokens(cleaned)
+    text = enforce_budget(cleaned, settings.preprocess.max_tokens)
+    tokens_after = estimate_tokens(text)
+    stats = {
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_over_budget": tokens_cleaned - tokens_after,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+    reduction = 1 - tokens_after / tokens_before if tokens_before else 0.0
+    logger.info(
+        f"Preprocessed blog content: {tokens_before} -> {tokens_after} tokens ({reduction:.0%} fewer)"
+        + (f", {stats['tokens_over_budget']} tokens over budget dropped" if stats["tokens_over_budget"] else "")
+    )
+    return text, stats
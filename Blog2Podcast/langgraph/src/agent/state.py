@@ -3,5 +3,7 @@ from typing import TypedDict
 class BlogToPodcastState(TypedDict):
     url: str
     blog_content: str
+    preprocess_stats: dict
     podcast_script: str
-    audio_file: str
\ No newline at end of file
+    audio_file: str
+    time_to_first_audio: float
\ No newline at end of file
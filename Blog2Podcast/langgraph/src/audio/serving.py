@@ -0,0 +1,150 @@
+import os
+import re
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from typing import Callable, Optional
+
+_FOLLOW_CHUNK_BYTES = 64 * 1024
+
+
+class UnsatisfiableRange(ValueError):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """The inclusive byte range a ``Range`` header asks for, or ``None`` to send the whole file.
+
+    Malformed and multi-range headers are ignored, as RFC 9110 allows;
+    a range starting past the end raises :class:`UnsatisfiableRange`.
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (header or "").strip())
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # A suffix range: the last N bytes.
+        if int(last) == 0 or size == 0:
+            raise UnsatisfiableRange(header)
+        return max(size - int(last), 0), size - 1
+    first, last = int(first), int(last) if last else size - 1
+    if first >= size:
+        raise UnsatisfiableRange(header)
+    if last < first:
+        return None
+    return first, min(last, size - 1)
+
+
+def etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _not_modified(handler: BaseHTTPRequestHandler, tag: str, stat: os.stat_result) -> bool:
+    if_none_match = handler.headers.get("If-None-Match")
+    if if_none_match is not None:
+        return if_none_match.strip() == "*" or tag in (t.strip().removeprefix("W/") for t in if_none_match.split(","))
+    if_modified_since = handler.headers.get("If-Modified-Since")
+    if if_modified_since:
+        try:
+            return int(stat.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def send_file(
+    handler: BaseHTTPRequestHandler,
+    path: str,
+    content_type: str = "audio/mpeg",
+    max_age: int = 0,
+    head: bool = False,
+) -> None:
+    """Answer ``handler``'s request with the file at ``path``, or the byte range it asks for.
+
+    The body goes from the file to the socket with ``sendfile`` (chunked
+    reads where that is unavailable), so serving a long podcast to many
+    listeners holds none of it in memory. Responses carry an ``ETag`` and
+    ``Last-Modified`` for revalidation, and ``Cache-Control`` with
+    ``max_age`` seconds; ``If-Range`` makes a stale range request get the
+    whole file. Raises ``FileNotFoundError`` before anything is sent.
+    """
+    with open(path, "rb") as file:
+        stat = os.fstat(file.fileno())
+        tag, size = etag(stat), stat.st_size
+        headers = {
+            "Accept-Ranges": "bytes",
+            "ETag": tag,
+            "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+            "Cache-Control": f"private, max-age={max_age}" if max_age else "no-cache",
+        }
+        if _not_modified(handler, tag, stat):
+            _send_head(handler, HTTPStatus.NOT_MODIFIED, headers)
+            return
+        range_header = handler.headers.get("Range")
+        if_range = handler.headers.get("If-Range")
+        if if_range is not None and if_range.strip() not in (tag, headers["Last-Modified"]):
+            range_header = None
+        try:
+            byte_range = parse_range(range_header, size)
+        except UnsatisfiableRange:
+            _send_head(handler, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, {"Content-Range": f"bytes */{size}", "Content-Length": "0"})
+            return
+        first, last = byte_range or (0, size - 1)
+        headers.update({"Content-Type": content_type, "Content-Length": str(last - first + 1)})
+        if byte_range:
+            headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+        _send_head(handler, HTTPStatus.PARTIAL_CONTENT if byte_range else HTTPStatus.OK, headers)
+        if head or size == 0:
+            return
+        try:
+            handler.connection.sendfile(file, first, last - first + 1)
+        except (BrokenPipeError, ConnectionResetError):
+            # Players drop the connection when seeking.
+            handler.close_connection = True
+
+
+def follow_file(
+    handler: BaseHTTPRequestHandler,
+    path: str,
+    done: Callable[[], Optional[bool]],
+    content_type: str = "audio/mpeg",
+    poll_interval: float = 0.1,
+    head: bool = False,
+) -> None:
+    """Answer ``handler``'s request with the file at ``path`` while it is still being written.
+
+    The body is sent with chunked transfer encoding as the file grows.
+    ``done()`` returns ``None`` while the file is being written, ``True``
+    once it is complete and ``False`` if the writer gave up; the response
+    then ends after the last bytes, or is cut off without its final chunk
+    so clients do not take the partial file for the whole. Ranges are not
+    supported until the file is complete. Raises ``FileNotFoundError``
+    before anything is sent.
+    """
+    with open(path, "rb") as file:
+        _send_head(handler, HTTPStatus.OK, {"Content-Type": content_type, "Cache-Control": "no-store", "Transfer-Encoding": "chunked"})
+        if head:
+            return
+        try:
+            while True:
+                # Asked before reading, so everything written before the writer finished is sent.
+                complete = done()
+                while chunk := file.read(_FOLLOW_CHUNK_BYTES):
+                    handler.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+                if complete is None:
+                    time.sleep(poll_interval)
+                    continue
+                if complete:
+                    handler.wfile.write(b"0\r\n\r\n")
+                handler.close_connection = not complete
+                return
+        except (BrokenPipeError, ConnectionResetError):
+            handler.close_connection = True
+
+
+def _send_head(handler: BaseHTTPRequestHandler, status: HTTPStatus, headers: dict) -> None:
+    handler.send_response(status)
+    for name, value in headers.items():
+        handler.send_header(name, value)
+    handler.end_headers()
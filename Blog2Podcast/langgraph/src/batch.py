@@ -0,0 +1,152 @@
+"""Convert a list of blog posts to podcasts.
+
+    python -m src.batch urls.txt [--manifest urls.manifest.jsonl] [--max-in-flight 32]
+
+``urls.txt`` holds one URL per line; blank lines and lines starting with
+``#`` are ignored. Every finished URL is appended to a JSONL manifest.
+Running the same command again skips the URLs the manifest already
+records as done and retries the failed ones, so an interrupted batch
+continues where it stopped. A retried URL resumes its failed run from the
+last completed stage instead of starting over.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+from src.agent.admission import BATCH
+from src.agent.graph import BlogToPodcastGraph
+from src.clients.http import pool_stats, start_warm_up
+from src.clients.ratelimit import rate_limit_stats
+from src.clients.resilience import resilience_stats
+from src.observability.metrics import start_metrics_server
+from src.observability.opik_utils import configure_in_background
+from src.config import settings
+
+
+async def convert(url: str, thread_id: str, resume: bool = False) -> dict:
+    """Convert ``url`` on ``thread_id``, continuing from its checkpoint when ``resume`` is set and one exists."""
+    if resume:
+        try:
+            run = await asyncio.to_thread(BlogToPodcastGraph.from_thread, thread_id)
+        except ValueError:
+            pass
+        else:
+            return await run.ainvoke(resume=True, priority=BATCH)
+    return await BlogToPodcastGraph(url=url, thread_id=thread_id).ainvoke(priority=BATCH)
+
+
+def read_urls(path: Path) -> list[str]:
+    urls = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#") and line not in urls:
+            urls.append(line)
+    return urls
+
+
+def read_manifest(manifest: Path) -> list[dict]:
+    if not manifest.exists():
+        return []
+    records = []
+    for line in manifest.read_text(encoding="utf-8").splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            # A line cut short by an interrupted write; the URL is simply retried.
+            continue
+    return records
+
+
+def completed_urls(manifest: Path) -> set[str]:
+    return {record["url"] for record in read_manifest(manifest) if record.get("status") == "done"}
+
+
+def retry_threads(manifest: Path) -> dict[str, str]:
+    """The thread of the latest failed attempt of each URL, to resume it from its checkpoint."""
+    threads = {}
+    for record in read_manifest(manifest):
+        if record.get("status") == "failed" and record.get("thread_id"):
+            threads[record["url"]] = record["thread_id"]
+    return threads
+
+
+async def run_batch(urls: list[str], manifest: Path, max_in_flight: Optional[int] = None) -> dict:
+    done = completed_urls(manifest)
+    threads = retry_threads(manifest)
+    todo = [url for url in urls if url not in done]
+    logger.info(f"{len(urls)} URLs, {len(done & set(urls))} already done, {len(todo)} to convert")
+
+    semaphore = asyncio.Semaphore(max_in_flight or settings.pipeline.batch_max_in_flight)
+    started = time.perf_counter()
+    counts = {"done": 0, "failed": 0}
+
+    async def run(url):
+        async with semaphore:
+            run_started = time.perf_counter()
+            thread_id = threads.get(url) or uuid.uuid4().hex
+            try:
+                state = await convert(url, thread_id, resume=url in threads)
+                error = None if state.get("audio_file") else "pipeline produced no audio"
+            except Exception as e:
+                state, error = {}, f"{type(e).__name__}: {e}"
+            return {
+                "url": url,
+                "thread_id": thread_id,
+                "status": "failed" if error else "done",
+                "audio_file": state.get("audio_file"),
+                "preprocess": state.get("preprocess_stats") or None,
+                "error": error,
+                "seconds": round(time.perf_counter() - run_started, 3),
+                "finished_at": time.time(),
+            }
+
+    with manifest.open("a", encoding="utf-8") as f:
+        for finished in asyncio.as_completed([run(url) for url in todo]):
+            record = await finished
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            counts[record["status"]] += 1
+            elapsed = time.perf_counter() - started
+            completed = counts["done"] + counts["failed"]
+            logger.info(
+                f"[{completed}/{len(todo)}] {record['status']} {record['url']} "
+                f"({completed / elapsed * 60:.1f} posts/min)"
+            )
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        **counts,
+        "skipped": len(urls) - len(todo),
+        "seconds": round(elapsed, 3),
+        "posts_per_minute": round((counts["done"] + counts["failed"]) / elapsed * 60, 2) if elapsed else 0.0,
+    }
+    logger.info(f"Batch finished: {summary}")
+    logger.info(f"Connection pools: {pool_stats()}")
+    logger.info(f"Rate limits: {rate_limit_stats()}")
+    logger.info(f"Circuit breakers: {resilience_stats()}")
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert a list of blog posts to podcasts.")
+    parser.add_argument("urls", type=Path, help="File with one URL per line.")
+    parser.add_argument("--manifest", type=Path, help="JSONL manifest to resume from (default: <urls>.manifest.jsonl).")
+    parser.add_argument("--max-in-flight", type=int, help="Maximum number of URLs in progress at once.")
+    args = parser.parse_args()
+
+    manifest = args.manifest or args.urls.with_suffix(".manifest.jsonl")
+    configure_in_background()
+    start_warm_up()
+    start_metrics_server()
+    summary = asyncio.run(run_batch(read_urls(args.urls), manifest, args.max_in_flight))
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
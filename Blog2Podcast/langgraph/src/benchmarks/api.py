@@ -0,0 +1,157 @@
+"""Load-test the HTTP API offline against local provider stand-ins.
+
+Starts ``src.api`` in process on a free port, with the pipeline running on
+the fakes from ``src.clients.fakes``, and drives it like a client would:
+each run submits a URL, follows its event stream until the job is done and
+fetches the first kilobyte of the audio with a ``Range`` request. Reports
+throughput, submit, first-progress-event and end-to-end latency
+percentiles, and peak memory:
+
+    python -m src.benchmarks.api --runs 200 --concurrency 16
+    python -m src.benchmarks.api --runs 200 --rate 8 --json
+
+Provider behaviour is set with the FAKES__* settings, as for
+``src.benchmarks.load``. Rejected submissions (503 once the admission
+queue is full) count as failed runs.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+# Sets the same offline defaults as the pipeline load test before the settings are read.
+from src.benchmarks.load import closed_loop, open_loop, peak_rss_mb, percentiles
+
+import httpx  # noqa: E402
+from loguru import logger  # noqa: E402
+
+from src.api import serve  # noqa: E402
+
+
+async def server_sent_events(response: httpx.Response) -> AsyncIterator[tuple[str, dict]]:
+    event, data = "message", []
+    async for line in response.aiter_lines():
+        if line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+        elif not line and data:
+            yield event, json.loads("\n".join(data))
+            event, data = "message", []
+
+
+async def api_load_test(runs: int, concurrency: int = 8, rate: Optional[float] = None, warmup: int = 1) -> dict:
+    server = serve("127.0.0.1", 0)
+    submit: list[float] = []
+    first_event: list[float] = []
+    latencies: list[float] = []
+    errors: Counter = Counter()
+
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{server.server_address[1]}",
+        timeout=httpx.Timeout(10.0, read=None),
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=None),
+    ) as client:
+
+        async def run(url: str) -> None:
+            started = time.perf_counter()
+            try:
+                response = await client.post("/podcasts", json={"url": url})
+                if response.status_code != 202:
+                    errors[f"HTTP {response.status_code}"] += 1
+                    return
+                submit.append(time.perf_counter() - started)
+                progressed, final = False, None
+                async with client.stream("GET", response.json()["links"]["events"]) as events:
+                    async for event, data in server_sent_events(events):
+                        if not progressed and event != "status":
+                            progressed = True
+                            first_event.append(time.perf_counter() - started)
+                        if event in ("done", "failed"):
+                            final = (event, data)
+                            break
+                if final is None or final[0] != "done":
+                    errors["job failed" if final else "stream ended"] += 1
+                    return
+                latencies.append(time.perf_counter() - started)
+                audio = await client.get(final[1]["links"]["audio"], headers={"Range": "bytes=0-1023"})
+                if audio.status_code != 206:
+                    errors[f"audio HTTP {audio.status_code}"] += 1
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] += 1
+
+        # Prompts, the compiled graph and the clients are built on first use; keep that out of the numbers.
+        await closed_loop(run, [f"https://load-test.invalid/warmup-{i}" for i in range(warmup)], 1)
+        for samples in (submit, first_event, latencies):
+            samples.clear()
+        errors.clear()
+
+        urls = [f"https://load-test.invalid/post-{i}" for i in range(runs)]
+        started = time.perf_counter()
+        if rate:
+            await open_loop(run, urls, rate)
+        else:
+            await closed_loop(run, urls, concurrency)
+        seconds = time.perf_counter() - started
+    server.shutdown()
+
+    return {
+        "runs": runs,
+        "mode": f"rate {rate}/s" if rate else f"concurrency {concurrency}",
+        "failed": sum(errors.values()),
+        "errors": dict(errors),
+        "seconds": round(seconds, 3),
+        "runs_per_minute": round(len(latencies) / seconds * 60, 2) if seconds else 0.0,
+        "latency": {
+            "submit": percentiles(submit),
+            "first event": percentiles(first_event),
+            "end-to-end": percentiles(latencies),
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _print_report(report: dict) -> None:
+    print(f"{report['runs']} API runs at {report['mode']}: "
+          f"{report['runs_per_minute']} runs/min, {report['failed']} failed {report['errors'] or ''}")
+    print(f"{'':14}{'p50':>8}{'p95':>8}{'p99':>8}")
+    for name, stats in report["latency"].items():
+        values = "".join(f"{stats[q]:>8.3f}" if stats[q] is not None else f"{'-':>8}" for q in ("p50", "p95", "p99"))
+        print(f"{name:14}{values}")
+    print(f"peak RSS: {report['peak_rss_mb']} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=100, help="Number of conversions, each for a different URL.")
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=8, help="Clients with a conversion in flight at once (closed loop).")
+    load.add_argument("--rate", type=float, help="Conversions submitted per second, whatever is in flight (open loop).")
+    parser.add_argument("--warmup", type=int, default=1, help="Runs before measuring.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    cwd = Path.cwd()
+    with tempfile.TemporaryDirectory(prefix="blog2podcast-api-load-") as workdir:
+        # The job store and the audio files are created in the working directory.
+        os.chdir(workdir)
+        try:
+            report = asyncio.run(api_load_test(args.runs, args.concurrency, args.rate, args.warmup))
+        finally:
+            os.chdir(cwd)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare single-shot and map-reduce summarization latency.
+
+Runs against a simulated LLM whose latency is a time to first token, a
+prompt processing time per input token and a generation time per output
+token, on generated posts of a short and a long length:
+
+    python -m src.benchmarks.summarize --tokens 1500 20000 --prefill 4000 --decode 250
+"""
+import argparse
+import os
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("CACHE__ENABLED", "false")
+
+from src.agent.chunking import estimate_tokens  # noqa: E402
+from src.agent.prompt import get_map_prompt, get_reduce_prompt, get_summarization_prompt  # noqa: E402
+from src.agent.summarize import summarize, use_map_reduce  # noqa: E402
+from src.benchmarks.tts import SAMPLE_PARAGRAPH  # noqa: E402
+from src.config import settings  # noqa: E402
+
+
+class SimulatedChatModel:
+    def __init__(self, first_token: float, prefill: float, decode: float, max_tokens: int) -> None:
+        self.first_token = first_token
+        self.prefill = prefill
+        self.decode = decode
+        self.max_tokens = max_tokens
+
+    def bind(self, max_tokens: int):
+        return SimulatedChatModel(self.first_token, self.prefill, self.decode, max_tokens)
+
+    def invoke(self, prompt):
+        # The script (and each chunk's notes) is written to its full length whatever the input size.
+        time.sleep(self.first_token + estimate_tokens(prompt) / self.prefill + self.max_tokens / self.decode)
+        return SimpleNamespace(content="word " * self.max_tokens)
+
+
+def build_post(tokens: int) -> str:
+    sections = []
+    while estimate_tokens("\n\n".join(sections)) < tokens:
+        sections.append(f"## Section {len(sections) + 1}\n\n" + "\n\n".join([SAMPLE_PARAGRAPH] * 4))
+    return "\n\n".join(sections)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, nargs="+", default=[1500, 20000], help="Post lengths in tokens.")
+    parser.add_argument("--first-token", type=float, default=0.2, help="Simulated LLM time to first token in seconds.")
+    parser.add_argument("--prefill", type=float, default=4000, help="Simulated prompt processing speed in tokens per second.")
+    parser.add_argument("--decode", type=float, default=250, help="Simulated generation speed in tokens per second.")
+    args = parser.parse_args()
+
+    # Load the prompts up front so that their Opik sync is not timed.
+    get_summarization_prompt(), get_map_prompt(), get_reduce_prompt()
+    llm = SimulatedChatModel(args.first_token, args.prefill, args.decode, settings.groq.max_tokens)
+    for tokens in args.tokens:
+        post = build_post(tokens)
+        timings = {}
+        for mode in ("single", "map_reduce"):
+            started = time.perf_counter()
+            summarize(post, llm, mode=mode)
+            timings[mode] = time.perf_counter() - started
+        auto = "map_reduce" if use_map_reduce(post, "auto") else "single"
+        print(
+            f"~{estimate_tokens(post):>6} tokens: single {timings['single']:.2f}s, "
+            f"map-reduce {timings['map_reduce']:.2f}s, auto picks {auto}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from loguru import logger
+
+from src.cache.backends import CacheBackend, CacheEntry, create_backend
+from src.config import settings
+
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src", "igshid"}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of ``url`` so trivially different links share a cache entry."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def url_cache_key(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+
+class ScrapeCache:
+    """Caches scraped markdown per normalized URL.
+
+    Entries younger than ``fresh_for`` seconds are served straight from the
+    backend. Older entries are revalidated against the origin with a
+    conditional request using the stored ETag/Last-Modified validators and
+    only re-scraped when the page has changed.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        fresh_for: float,
+        revalidate: bool = True,
+        revalidate_timeout: float = 3.0,
+    ) -> None:
+        self.backend = backend
+        self.fresh_for = fresh_for
+        self.revalidate = revalidate
+        self.revalidate_timeout = revalidate_timeout
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "revalidated": 0, "stale": 0}
+
+    def get_or_scrape(self, url: str, scrape: Callable[[str], str]) -> str:
+        """The cached markdown of ``url``, or ``scrape(url)``.
+
+        On a miss the validators for the next revalidation are fetched while
+        the page is scraped, so they add no latency.
+        """
+        key = url_cache_key(url)
+        entry = self.backend.get(key)
+        if entry is not None:
+            if entry.age <= self.fresh_for:
+                self._count("hits")
+                return entry.value.decode("utf-8")
+            if self._not_modified(url, entry):
+                return self._revalidated(key, entry)
+            self._count("stale")
+        self._count("misses")
+        validators = _validator_executor().submit(self._validators, url) if self.revalidate else None
+        try:
+            markdown = scrape(url)
+        except BaseException:
+            if validators is not None:
+                validators.cancel()
+            raise
+        self._store(key, markdown, *(validators.result() if validators is not None else (None, None)))
+        return markdown
+
+    async def aget_or_scrape(self, url: str, scrape: Callable[[str], Awaitable[str]]) -> str:
+        """Async counterpart of :meth:`get_or_scrape`; origin requests and the backend run off the event loop."""
+        key = url_cache_key(url)
+        entry = await asyncio.to_thread(self.backend.get, key)
+        if entry is not None:
+            if entry.age <= self.fresh_for:
+                self._count("hits")
+                return entry.value.decode("utf-8")
+            if await asyncio.to_thread(self._not_modified, url, entry):
+                return await asyncio.to_thread(self._revalidated, key, entry)
+            self._count("stale")
+        self._count("misses")
+        validators = asyncio.ensure_future(asyncio.to_thread(self._validators, url)) if self.revalidate else None
+        try:
+            markdown = await scrape(url)
+        except BaseException:
+            if validators is not None:
+                validators.cancel()
+            raise
+        await asyncio.to_thread(
+            self._store, key, markdown, *(await validators if validators is not None else (None, None))
+        )
+        return markdown
+
+    def _revalidated(self, key: str, entry: CacheEntry) -> str:
+        self._count("revalidated")
+        self.backend.set(key, CacheEntry(entry.value, entry.etag, entry.last_modified))
+        return entry.value.decode("utf-8")
+
+    def _store(self, key: str, markdown: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        self.backend.set(key, CacheEntry(markdown.encode("utf-8"), etag, last_modified))
+
+    def invalidate(self, url: str) -> None:
+        self.backend.delete(url_cache_key(url))
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters["hits"] + counters["revalidated"] + counters["misses"]
+        counters["hit_rate"] = (counters["hits"] + counters["revalidated"]) / lookups if lookups else 0.0
+        counters["backend"] = self.backend.stats()
+        return counters
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _head(self, url: str, headers: dict) -> Optional[dict]:
+        request = urllib.request.Request(url, method="HEAD", headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.revalidate_timeout) as response:
+                return {"status": response.status, "headers": response.headers}
+        except urllib.error.HTTPError as e:
+            return {"status": e.code, "headers": e.headers}
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            logger.debug(f"HEAD {url} failed: {e}")
+            return None
+
+    def _validators(self, url: str) -> tuple[Optional[str], Optional[str]]:
+        if not self.revalidate:
+            return None, None
+        response = self._head(url, {})
+        if response is None or response["status"] >= 400:
+            return None, None
+        return response["headers"].get("ETag"), response["headers"].get("Last-Modified")
+
+    def _not_modified(self, url: str, entry: CacheEntry) -> bool:
+        if not self.revalidate or not (entry.etag or entry.last_modified):
+            return False
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        response = self._head(url, headers)
+        if response is None:
+            return False
+        if response["status"] == 304:
+            return True
+        # Some origins ignore conditional HEADs but still report unchanged validators.
+        if response["status"] < 300:
+            etag = response["headers"].get("ETag")
+            last_modified = response["headers"].get("Last-Modified")
+            if entry.etag:
+                return etag == entry.etag
+            return last_modified is not None and last_modified == entry.last_modified
+        return False
+
+
+@lru_cache(maxsize=1)
+def _validator_executor() -> ThreadPoolExecutor:
+    """Threads fetching validators next to synchronous scrapes; a HEAD takes at most the revalidate timeout."""
+    return ThreadPoolExecutor(max_workers=settings.pipeline.scrape_concurrency or 8, thread_name_prefix="scrape-validators")
+
+
+@lru_cache(maxsize=1)
+def get_scrape_cache() -> ScrapeCache:
+    backend = create_backend(
+        settings.cache.backend,
+        name="scrape",
+        directory=settings.cache.directory,
+        ttl=settings.cache.scrape_max_age_seconds,
+        max_entries=settings.cache.scrape_max_entries,
+        max_bytes=settings.cache.scrape_max_bytes,
+    )
+    return ScrapeCache(
+        backend,
+        fresh_for=settings.cache.scrape_ttl_seconds,
+        revalidate=settings.cache.revalidate,
+        revalidate_timeout=settings.cache.revalidate_timeout_seconds,
+    )
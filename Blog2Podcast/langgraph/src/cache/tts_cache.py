@@ -0,0 +1,71 @@
+import asyncio
+import hashlib
+import json
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from src.audio.segments import normalize_segment
+from src.cache.backends import CacheBackend, CacheEntry, create_backend
+from src.config import settings
+
+
+def tts_cache_key(text: str, voice_id: str, model_id: str, output_format: str) -> str:
+    payload = json.dumps(
+        {
+            "text": normalize_segment(text),
+            "voice_id": voice_id,
+            "model_id": model_id,
+            "output_format": output_format,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Synthesized audio per text segment and voice configuration."""
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self.backend.get(key)
+        return entry.value if entry is not None else None
+
+    def set(self, key: str, audio: bytes) -> None:
+        if audio:
+            self.backend.set(key, CacheEntry(audio))
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, bytes]:
+        """The cached audio of each of ``keys`` that has any."""
+        found = {}
+        for key in dict.fromkeys(keys):
+            audio = self.get(key)
+            if audio is not None:
+                found[key] = audio
+        return found
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        """:meth:`get` off the event loop, as the on-disk backend blocks."""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aget_many(self, keys: Iterable[str]) -> dict[str, bytes]:
+        return await asyncio.to_thread(self.get_many, list(keys))
+
+    async def aset(self, key: str, audio: bytes) -> None:
+        await asyncio.to_thread(self.set, key, audio)
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+
+@lru_cache(maxsize=1)
+def get_tts_cache() -> TTSCache:
+    backend = create_backend(
+        settings.cache.backend,
+        name="tts",
+        directory=settings.cache.directory,
+        ttl=settings.cache.tts_max_age_seconds,
+        max_bytes=settings.cache.tts_max_bytes,
+    )
+    return TTSCache(backend)
@@ -0,0 +1,245 @@
+"""Local stand-ins for Firecrawl, Groq and ElevenLabs.
+
+With ``FAKES__ENABLED=true`` the client factories in ``src.clients`` return
+these instead of the provider SDKs, so the pipeline runs without API keys or
+network access. Each fake sleeps for a latency drawn from a configurable
+distribution, returns payloads of a configurable size, streams the way the
+real provider does and fails at a configurable rate, which makes them the
+base of the load tests in ``src.benchmarks.load``. What the pipeline asked
+of them (calls, prompt and completion tokens, characters) is counted in
+:func:`fake_usage`.
+
+Latencies are given as ``fixed:SECONDS``, ``uniform:LOW,HIGH``,
+``exponential:MEAN`` or ``lognormal:MEDIAN,SIGMA``.
+"""
+import asyncio
+import math
+import random
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import AsyncIterator, Iterator, Optional
+
+from src.agent.chunking import estimate_tokens
+from src.config import settings
+
+_WORDS = (
+    "model latency token cache request pipeline budget queue stream audio script summary provider throughput "
+    "batch memory quality prompt context network server client retry window signal answer people team "
+    "product system data result cost speed scale design choice trade change problem idea reason example"
+).split()
+
+# One silent MPEG-2 Layer III frame, 32 kbit/s at 22.05 kHz mono like the default ElevenLabs format:
+# 104 bytes for 26 ms of audio.
+_MP3_FRAME = bytes([0xFF, 0xF3, 0x40, 0xC0]) + bytes(100)
+_FRAME_SECONDS = 576 / 22050
+_SPOKEN_CHARS_PER_SECOND = 15
+
+_rng_lock = threading.Lock()
+_rng = random.Random(settings.fakes.seed)
+_usage: Counter = Counter()
+
+
+def _random() -> float:
+    with _rng_lock:
+        return _rng.random()
+
+
+def _count(**amounts: int) -> None:
+    with _rng_lock:
+        _usage.update(amounts)
+
+
+def fake_usage(reset: bool = False) -> dict:
+    """Requests made to the fakes and their size, since the start or the last reset."""
+    with _rng_lock:
+        usage = dict(_usage)
+        if reset:
+            _usage.clear()
+    return usage
+
+
+class FakeProviderError(Exception):
+    """An error response from a fake provider, shaped like the SDK errors (``status_code``, ``headers``)."""
+
+    def __init__(self, provider: str, status_code: int) -> None:
+        super().__init__(f"{provider} (fake) answered {status_code}")
+        self.status_code = status_code
+        self.headers = {}
+
+
+class Latency:
+    """A latency distribution parsed from a ``KIND:PARAMS`` spec."""
+
+    def __init__(self, spec: str) -> None:
+        kind, _, params = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in params.split(",") if p.strip()]
+        expected = {"fixed": 1, "uniform": 2, "exponential": 1, "lognormal": 2}
+        if expected.get(self.kind) != len(self.params):
+            raise ValueError(f"Invalid latency {spec!r}; use fixed:S, uniform:LOW,HIGH, exponential:MEAN or lognormal:MEDIAN,SIGMA")
+
+    def sample(self) -> float:
+        with _rng_lock:
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "uniform":
+                return _rng.uniform(*self.params)
+            if self.kind == "exponential":
+                return _rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+            median, sigma = self.params
+            return _rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+
+def _maybe_fail(provider: str, error_rate: float) -> None:
+    if error_rate and _random() < error_rate:
+        raise FakeProviderError(provider, settings.fakes.error_status)
+
+
+def _sentences(seed: str, tokens: int) -> str:
+    """Prose of about ``tokens`` tokens, the same for the same ``seed``."""
+    rng = random.Random(seed)
+    sentences, length = [], 0
+    while length < tokens * 4:
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 18))]
+        sentence = " ".join(words).capitalize() + "."
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)
+
+
+def fake_page(url: str, tokens: Optional[int] = None) -> str:
+    """Markdown for ``url`` shaped like Firecrawl output: navigation, images and links around the article."""
+    tokens = settings.fakes.page_tokens if tokens is None else tokens
+    sections = max(tokens // 500, 1)
+    parts = ["* [Home](https://example.com/)\n* [Blog](https://example.com/blog)", f"# {url}"]
+    for i in range(1, sections + 1):
+        parts += [
+            f"## Section {i}",
+            f"![Figure {i}](https://example.com/figure-{i}.png)",
+            _sentences(f"{url}#{i}", tokens // sections - 20),
+        ]
+    parts.append("[Subscribe to our newsletter](https://example.com/newsletter)")
+    return "\n\n".join(parts)
+
+
+class FakeFirecrawl:
+    def scrape(self, url: str, **kwargs) -> SimpleNamespace:
+        _count(scrape_calls=1)
+        time.sleep(Latency(settings.fakes.scrape_latency).sample())
+        _maybe_fail("firecrawl", settings.fakes.scrape_error_rate)
+        return SimpleNamespace(markdown=fake_page(url), metadata={"sourceURL": url})
+
+
+class FakeAsyncFirecrawl:
+    async def scrape(self, url: str, **kwargs) -> SimpleNamespace:
+        _count(scrape_calls=1)
+        await asyncio.sleep(Latency(settings.fakes.scrape_latency).sample())
+        _maybe_fail("firecrawl", settings.fakes.scrape_error_rate)
+        return SimpleNamespace(markdown=fake_page(url), metadata={"sourceURL": url})
+
+
+def _prompt_text(prompt) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    if isinstance(prompt, dict):
+        return str(prompt.get("content", ""))
+    if isinstance(prompt, (list, tuple)):
+        return "\n".join(_prompt_text(message) for message in prompt)
+    return str(getattr(prompt, "content", prompt))
+
+
+class FakeChatModel:
+    """A Groq chat model with LangChain's ``invoke``/``stream``/``bind`` interface.
+
+    Time to first token, prompt processing and generation speed follow the
+    fake settings; the answer is ``script_tokens`` tokens of prose, capped at
+    ``max_tokens``.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None) -> None:
+        self.max_tokens = max_tokens or settings.groq.max_tokens
+
+    def bind(self, max_tokens: Optional[int] = None, **kwargs) -> "FakeChatModel":
+        return FakeChatModel(max_tokens or self.max_tokens)
+
+    def _answer(self, prompt) -> tuple[float, list[str]]:
+        text = _prompt_text(prompt)
+        first_token = Latency(settings.fakes.llm_first_token_latency).sample()
+        prefill = estimate_tokens(text) / settings.fakes.llm_prefill_tokens_per_second
+        answer = _sentences(text[-200:], min(settings.fakes.script_tokens, self.max_tokens))
+        _count(llm_calls=1, prompt_tokens=estimate_tokens(text), completion_tokens=estimate_tokens(answer))
+        # Tokens are about four characters; chunks carry llm_chunk_tokens of them.
+        size = max(settings.fakes.llm_chunk_tokens, 1) * 4
+        return first_token + prefill, [answer[i:i + size] for i in range(0, len(answer), size)]
+
+    def _chunk_seconds(self) -> float:
+        return settings.fakes.llm_chunk_tokens / settings.fakes.llm_tokens_per_second
+
+    def invoke(self, prompt, **kwargs) -> SimpleNamespace:
+        return SimpleNamespace(content="".join(chunk.content for chunk in self.stream(prompt)))
+
+    async def ainvoke(self, prompt, **kwargs) -> SimpleNamespace:
+        return SimpleNamespace(content="".join([chunk.content async for chunk in self.astream(prompt)]))
+
+    def stream(self, prompt, **kwargs) -> Iterator[SimpleNamespace]:
+        delay, chunks = self._answer(prompt)
+        time.sleep(delay)
+        _maybe_fail("groq", settings.fakes.llm_error_rate)
+        for chunk in chunks:
+            time.sleep(self._chunk_seconds())
+            yield SimpleNamespace(content=chunk)
+
+    async def astream(self, prompt, **kwargs) -> AsyncIterator[SimpleNamespace]:
+        delay, chunks = self._answer(prompt)
+        await asyncio.sleep(delay)
+        _maybe_fail("groq", settings.fakes.llm_error_rate)
+        for chunk in chunks:
+            await asyncio.sleep(self._chunk_seconds())
+            yield SimpleNamespace(content=chunk)
+
+
+def _audio_plan(text: str) -> tuple[float, list[bytes], float]:
+    """Time to first byte, MP3 chunks of ``text`` read aloud, and seconds between chunks."""
+    _count(tts_calls=1, tts_characters=len(text))
+    frames = max(math.ceil(len(text) / _SPOKEN_CHARS_PER_SECOND / _FRAME_SECONDS), 1)
+    audio = _MP3_FRAME * frames
+    size = max(settings.fakes.tts_chunk_bytes // len(_MP3_FRAME), 1) * len(_MP3_FRAME)
+    chunks = [audio[i:i + size] for i in range(0, len(audio), size)]
+    generation = len(text) / settings.fakes.tts_chars_per_second
+    return Latency(settings.fakes.tts_first_byte_latency).sample(), chunks, generation / len(chunks)
+
+
+class _FakeTextToSpeech:
+    def convert(self, voice_id: str, text: str, **kwargs) -> Iterator[bytes]:
+        first_byte, chunks, interval = _audio_plan(text)
+        time.sleep(first_byte)
+        _maybe_fail("elevenlabs", settings.fakes.tts_error_rate)
+        for chunk in chunks:
+            time.sleep(interval)
+            yield chunk
+
+
+class _FakeAsyncTextToSpeech:
+    async def _stream(self, text: str) -> AsyncIterator[bytes]:
+        first_byte, chunks, interval = _audio_plan(text)
+        await asyncio.sleep(first_byte)
+        _maybe_fail("elevenlabs", settings.fakes.tts_error_rate)
+        for chunk in chunks:
+            await asyncio.sleep(interval)
+            yield chunk
+
+    def convert(self, voice_id: str, text: str, **kwargs) -> AsyncIterator[bytes]:
+        # Like the SDK, convert is not awaited; it returns the async stream of audio chunks.
+        return self._stream(text)
+
+
+class FakeElevenLabs:
+    def __init__(self) -> None:
+        self.text_to_speech = _FakeTextToSpeech()
+
+
+class FakeAsyncElevenLabs:
+    def __init__(self) -> None:
+        self.text_to_speech = _FakeAsyncTextToSpeech()
@@ -0,0 +1,188 @@
+"""Shared HTTP connection pools for the provider SDKs.
+
+Every provider gets one ``httpx.Client`` for the whole process and one
+``httpx.AsyncClient`` per event loop, because async connections cannot be
+moved between loops. Idle connections are kept alive, so repeated requests
+to the same provider skip the TCP and TLS handshakes. Requests pass through
+the provider's rate limiter (``src.clients.ratelimit``) on their way out.
+"""
+import asyncio
+import threading
+import weakref
+from functools import wraps
+from typing import Callable, Iterable, Optional, TypeVar
+
+import httpx
+from loguru import logger
+
+from src.clients.ratelimit import AsyncRateLimitedTransport, RateLimitedTransport
+from src.config import settings
+
+T = TypeVar("T")
+
+PROVIDER_ORIGINS = {
+    "elevenlabs": "https://api.elevenlabs.io",
+    "groq": "https://api.groq.com",
+}
+
+
+class PoolStats:
+    """Counts the requests sent through one provider's pools and the connections they opened."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._connections = 0
+
+    def request_sent(self) -> None:
+        with self._lock:
+            self._requests += 1
+
+    def trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._connections += 1
+
+    async def atrace(self, event_name: str, info: dict) -> None:
+        self.trace(event_name, info)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "connections_opened": self._connections,
+                "connections_reused": max(self._requests - self._connections, 0),
+            }
+
+
+_lock = threading.Lock()
+_stats: dict[str, PoolStats] = {}
+_clients: dict[str, httpx.Client] = {}
+
+
+def _stats_for(name: str) -> PoolStats:
+    with _lock:
+        return _stats.setdefault(name, PoolStats())
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.clients.max_connections,
+        max_keepalive_connections=settings.clients.max_keepalive_connections,
+        keepalive_expiry=settings.clients.keepalive_expiry_seconds,
+    )
+
+
+def get_http_client(name: str) -> httpx.Client:
+    """The process-wide pooled client for provider ``name``."""
+    with _lock:
+        client = _clients.get(name)
+        if client is not None:
+            return client
+    stats = _stats_for(name)
+
+    def on_request(request: httpx.Request) -> None:
+        stats.request_sent()
+        request.extensions["trace"] = stats.trace
+
+    client = httpx.Client(
+        # The client ignores ``limits`` when given a transport, so the pool limits go on the transport.
+        transport=RateLimitedTransport(name, httpx.HTTPTransport(limits=_limits())),
+        timeout=settings.clients.timeout_seconds,
+        follow_redirects=True,
+        event_hooks={"request": [on_request]},
+    )
+    with _lock:
+        # Another thread may have won the race; keep its client and drop ours.
+        winner = _clients.setdefault(name, client)
+    if winner is not client:
+        client.close()
+    return winner
+
+
+def per_event_loop(factory: Callable[[], T]) -> Callable[[], T]:
+    """Cache ``factory()`` once per running event loop.
+
+    Async clients hold connections bound to the loop that opened them, so
+    each loop gets its own instance. Instances of closed loops are dropped.
+    """
+    instances: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    lock = threading.Lock()
+
+    @wraps(factory)
+    def get() -> T:
+        loop = asyncio.get_running_loop()
+        with lock:
+            for closed in [other for other in instances if other.is_closed()]:
+                del instances[closed]
+            if loop not in instances:
+                instances[loop] = factory()
+            return instances[loop]
+
+    get.cache_clear = instances.clear
+    return get
+
+
+def _async_http_client_factory(name: str) -> Callable[[], httpx.AsyncClient]:
+    def create() -> httpx.AsyncClient:
+        stats = _stats_for(name)
+
+        async def on_request(request: httpx.Request) -> None:
+            stats.request_sent()
+            request.extensions["trace"] = stats.atrace
+
+        return httpx.AsyncClient(
+            transport=AsyncRateLimitedTransport(name, httpx.AsyncHTTPTransport(limits=_limits())),
+            timeout=settings.clients.timeout_seconds,
+            follow_redirects=True,
+            event_hooks={"request": [on_request]},
+        )
+
+    return per_event_loop(create)
+
+
+_async_factories: dict[str, Callable[[], httpx.AsyncClient]] = {}
+
+
+def get_async_http_client(name: str) -> httpx.AsyncClient:
+    """The pooled async client for provider ``name`` on the running event loop."""
+    with _lock:
+        factory = _async_factories.get(name)
+        if factory is None:
+            factory = _async_factories[name] = _async_http_client_factory(name)
+    return factory()
+
+
+def pool_stats() -> dict[str, dict]:
+    """Requests sent and connections opened and reused, per provider."""
+    with _lock:
+        stats = dict(_stats)
+    return {name: provider_stats.snapshot() for name, provider_stats in stats.items()}
+
+
+def warm_up(providers: Optional[Iterable[str]] = None) -> None:
+    """Build the provider clients and open one pooled connection to each provider."""
+    from src.clients.elevenlabs import get_elevenlabs_client
+    from src.clients.grok import get_groq_client
+
+    get_elevenlabs_client()
+    get_groq_client()
+    for name in providers or PROVIDER_ORIGINS:
+        try:
+            get_http_client(name).head(PROVIDER_ORIGINS[name], timeout=settings.clients.timeout_seconds)
+        except httpx.HTTPError as e:
+            logger.warning(f"Warm-up request to {name} failed: {e}")
+    logger.info(f"Provider connection pools warmed up: {pool_stats()}")
+
+
+_warm_up_started = False
+
+
+def start_warm_up() -> None:
+    """Run :func:`warm_up` once per process on a background thread when enabled in the settings."""
+    global _warm_up_started
+    with _lock:
+        if not settings.clients.warm_up or _warm_up_started:
+            return
+        _warm_up_started = True
+    threading.Thread(target=warm_up, name="client-warm-up", daemon=True).start()
@@ -0,0 +1,329 @@
+"""Client-side rate limiting of the provider APIs.
+
+Every provider gets one :class:`ProviderLimiter` per process, shared by
+threads and event loops. Its token buckets (requests, LLM tokens or TTS
+characters per minute) make callers wait their turn before a request is
+sent, so a batch runs at the provider's quota instead of into it. When a
+429 gets through anyway, the whole provider backs off for the
+``Retry-After`` the server asked for (or an exponential delay), with
+jitter, and its rates are lowered until requests succeed again.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from loguru import logger
+
+from src.agent.chunking import estimate_tokens
+from src.config import settings
+
+T = TypeVar("T")
+
+# Rates drop by this factor on every 429 and recover by RECOVERY per successful request.
+DECREASE = 0.7
+RECOVERY = 0.02
+MIN_RATE_FACTOR = 0.2
+
+
+class TokenBucket:
+    """``per_minute`` units per minute with bursts of up to ``burst`` units.
+
+    ``reserve`` takes the units right away, going into debt when the bucket
+    is empty, and returns how long the caller has to wait for them; callers
+    are thereby served in arrival order without holding a lock while they
+    wait.
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None) -> None:
+        self.per_minute = per_minute
+        self.burst = burst or per_minute
+        self.factor = 1.0
+        self._level = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        """Current refill rate in units per second."""
+        return self.per_minute * self.factor / 60
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._level = min(self.burst, self._level + (now - self._updated) * self.rate)
+            self._updated = now
+            self._level -= amount
+            return max(-self._level / self.rate, 0.0)
+
+    def refund(self, amount: float) -> None:
+        """Return units reserved but not used (or take more, for a negative ``amount``)."""
+        with self._lock:
+            self._level = min(self.burst, self._level + amount)
+
+    def slow_down(self) -> None:
+        with self._lock:
+            self.factor = max(self.factor * DECREASE, MIN_RATE_FACTOR)
+
+    def recover(self) -> None:
+        with self._lock:
+            self.factor = min(self.factor + RECOVERY, 1.0)
+
+
+class ProviderLimiter:
+    def __init__(self, name: str, buckets: dict[str, TokenBucket]) -> None:
+        self.name = name
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+        self._backoff_attempt = 0
+        self._stats = {"requests": 0, "throttled": 0, "throttled_seconds": 0.0, "rate_limited": 0, "retries": 0}
+
+    def reserve(self, **amounts: float) -> float:
+        """Seconds to wait before sending a request costing ``amounts`` (e.g. ``requests=1, tokens=1200``)."""
+        wait = max(
+            [self.buckets[unit].reserve(amount) for unit, amount in amounts.items() if unit in self.buckets and amount]
+            or [0.0]
+        )
+        with self._lock:
+            wait = max(wait, self._blocked_until - time.monotonic())
+            self._stats["requests"] += 1
+            if wait > 0:
+                self._stats["throttled"] += 1
+                self._stats["throttled_seconds"] += wait
+        return max(wait, 0.0)
+
+    def acquire(self, **amounts: float) -> None:
+        wait = self.reserve(**amounts)
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self, **amounts: float) -> None:
+        wait = self.reserve(**amounts)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def refund(self, **amounts: float) -> None:
+        for unit, amount in amounts.items():
+            if unit in self.buckets and amount:
+                self.buckets[unit].refund(amount)
+
+    def rate_limited(self, retry_after: Optional[float]) -> float:
+        """Record a 429 and block the provider; returns the delay before the next attempt."""
+        with self._lock:
+            self._stats["rate_limited"] += 1
+            self._stats["retries"] += 1
+            self._backoff_attempt += 1
+            if retry_after is None:
+                # Full jitter on an exponential delay.
+                delay = random.uniform(0, min(
+                    settings.rate_limit.backoff_max_seconds,
+                    settings.rate_limit.backoff_base_seconds * 2 ** (self._backoff_attempt - 1),
+                ))
+            else:
+                # The server knows when the quota resets; jitter keeps the waiting callers from returning together.
+                delay = min(retry_after, settings.rate_limit.backoff_max_seconds) * random.uniform(1.0, 1.2)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        for bucket in self.buckets.values():
+            bucket.slow_down()
+        logger.warning(f"{self.name} rate limit hit, backing off for {delay:.1f}s")
+        return delay
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self._backoff_attempt = 0
+        for bucket in self.buckets.values():
+            bucket.recover()
+
+    def call(self, fn: Callable[[], T], **amounts: float) -> T:
+        """Run ``fn`` within the limits, retrying when it fails with a 429."""
+        for attempt in range(settings.rate_limit.max_retries + 1):
+            self.acquire(**amounts)
+            try:
+                result = fn()
+            except Exception as e:
+                retry_after = rate_limit_retry_after(e)
+                if retry_after is False or attempt == settings.rate_limit.max_retries:
+                    raise
+                time.sleep(self.rate_limited(retry_after))
+                continue
+            self.succeeded()
+            return result
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], **amounts: float) -> T:
+        for attempt in range(settings.rate_limit.max_retries + 1):
+            await self.aacquire(**amounts)
+            try:
+                result = await fn()
+            except Exception as e:
+                retry_after = rate_limit_retry_after(e)
+                if retry_after is False or attempt == settings.rate_limit.max_retries:
+                    raise
+                await asyncio.sleep(self.rate_limited(retry_after))
+                continue
+            self.succeeded()
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["backing_off_seconds"] = round(max(self._blocked_until - time.monotonic(), 0.0), 3)
+        stats["throttled_seconds"] = round(stats["throttled_seconds"], 3)
+        stats["rate_factor"] = round(min((b.factor for b in self.buckets.values()), default=1.0), 3)
+        return stats
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds from a ``Retry-After`` header, given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def rate_limit_retry_after(error: BaseException):
+    """``False`` if ``error`` is not a 429, else the ``Retry-After`` it carries (``None`` when absent).
+
+    Understands the errors of the Groq, ElevenLabs and Firecrawl SDKs, which
+    all expose the status code and either the response or its headers.
+    """
+    status = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    if status != 429:
+        return False
+    headers = getattr(response, "headers", None) or getattr(error, "headers", None) or {}
+    return parse_retry_after(headers.get("retry-after") or headers.get("Retry-After"))
+
+
+_PROVIDER_UNITS = {
+    "groq": lambda rl: {"requests": rl.groq_requests_per_minute, "tokens": rl.groq_tokens_per_minute},
+    "firecrawl": lambda rl: {"requests": rl.firecrawl_requests_per_minute},
+    "elevenlabs": lambda rl: {
+        "requests": rl.elevenlabs_requests_per_minute,
+        "characters": rl.elevenlabs_characters_per_minute,
+    },
+}
+
+_limiters_lock = threading.Lock()
+_limiters: dict[str, ProviderLimiter] = {}
+
+
+def get_rate_limiter(provider: str) -> ProviderLimiter:
+    """The process-wide limiter of ``provider``; units configured as 0 are not limited."""
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            units = _PROVIDER_UNITS[provider](settings.rate_limit) if settings.rate_limit.enabled else {}
+            buckets = {unit: TokenBucket(per_minute) for unit, per_minute in units.items() if per_minute > 0}
+            limiter = _limiters[provider] = ProviderLimiter(provider, buckets)
+        return limiter
+
+
+def rate_limit_stats() -> dict[str, dict]:
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+
+def _json(content: bytes) -> dict:
+    try:
+        body = json.loads(content) if content else {}
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else {}
+
+
+def request_cost(provider: str, request: httpx.Request) -> dict[str, float]:
+    """What ``request`` counts against the provider's quota: always one request, plus
+    prompt and completion tokens for Groq and the characters to speak for ElevenLabs."""
+    cost = {"requests": 1}
+    try:
+        body = _json(request.content)
+    except httpx.RequestNotRead:
+        return cost
+    if provider == "groq" and "messages" in body:
+        prompt = "".join(str(message.get("content", "")) for message in body["messages"])
+        cost["tokens"] = estimate_tokens(prompt) + (body.get("max_completion_tokens") or body.get("max_tokens") or 0)
+    elif provider == "elevenlabs" and isinstance(body.get("text"), str):
+        cost["characters"] = len(body["text"])
+    return cost
+
+
+def _settles_tokens(request: httpx.Request, response: httpx.Response, cost: dict) -> bool:
+    # The completion limit was reserved up front; a complete (not streamed) response reports what was used.
+    return bool(cost.get("tokens")) and response.status_code == 200 and not _json(request.content).get("stream")
+
+
+def _unused_tokens(response: httpx.Response, cost: dict) -> float:
+    usage = _json(response.content).get("usage") or {}
+    used = usage.get("total_tokens")
+    return cost["tokens"] - used if isinstance(used, (int, float)) else 0
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """Applies the provider's limiter to every request and retries the ones answered with 429."""
+
+    def __init__(self, provider: str, transport: httpx.BaseTransport) -> None:
+        self.provider = provider
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        limiter = get_rate_limiter(self.provider)
+        cost = request_cost(self.provider, request)
+        for attempt in range(settings.rate_limit.max_retries + 1):
+            limiter.acquire(**cost)
+            response = self.transport.handle_request(request)
+            if response.status_code != 429 or attempt == settings.rate_limit.max_retries:
+                break
+            response.close()
+            # A rejected request used none of the quota it reserved.
+            limiter.refund(**cost)
+            time.sleep(limiter.rate_limited(parse_retry_after(response.headers.get("retry-after"))))
+        if response.status_code != 429:
+            limiter.succeeded()
+        if _settles_tokens(request, response, cost):
+            response.read()
+            limiter.refund(tokens=_unused_tokens(response, cost))
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    def __init__(self, provider: str, transport: httpx.AsyncBaseTransport) -> None:
+        self.provider = provider
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        limiter = get_rate_limiter(self.provider)
+        cost = request_cost(self.provider, request)
+        for attempt in range(settings.rate_limit.max_retries + 1):
+            await limiter.aacquire(**cost)
+            response = await self.transport.handle_async_request(request)
+            if response.status_code != 429 or attempt == settings.rate_limit.max_retries:
+                break
+            await response.aclose()
+            limiter.refund(**cost)
+            await asyncio.sleep(limiter.rate_limited(parse_retry_after(response.headers.get("retry-after"))))
+        if response.status_code != 429:
+            limiter.succeeded()
+        if _settles_tokens(request, response, cost):
+            await response.aread()
+            limiter.refund(tokens=_unused_tokens(response, cost))
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -1,11 +1,20 @@
-import opik
+import hashlib
+
 from loguru import logger
 
+from src.config import settings
+
 class Prompt:
     def __init__(self, name: str, prompt: str) -> None:
         self.name = name
 
+        if settings.tracing.mode != "sdk":
+            # Syncing with Opik is a network call; outside of SDK mode prompts are versioned by their hash.
+            self.__prompt = prompt
+            return
         try:
+            import opik
+
             self.__prompt = opik.Prompt(name=name, prompt=prompt)
         except Exception:
             logger.warning(
@@ -16,11 +25,18 @@ class Prompt:
 
     @property
     def prompt(self) -> str:
-        if isinstance(self.__prompt, opik.Prompt):
+        if not isinstance(self.__prompt, str):
             return self.__prompt.prompt
         else:
             return self.__prompt
 
+    @property
+    def version(self) -> str:
+        """Opik commit of the prompt, or a hash of its text when Opik is unavailable."""
+        if not isinstance(self.__prompt, str) and self.__prompt.commit:
+            return self.__prompt.commit
+        return hashlib.sha256(self.prompt.encode("utf-8")).hexdigest()[:12]
+
     def __str__(self) -> str:
         return self.prompt
 
@@ -0,0 +1,291 @@
+"""Sampled trace export through a bounded in-memory queue.
+
+With ``TRACING__MODE=queue``, ``@track`` records spans here instead of
+calling the Opik SDK on the request path. Whether a run is traced is
+decided once, when its root span starts (``TRACING__SAMPLE_RATE``); the
+spans of unsampled runs are never built. Finished spans and traces go into
+a bounded queue, and a daemon thread sends them to Opik's REST API in
+batches. The request path never waits on the tracing backend:
+
+* when the queue is full, new spans are dropped and counted;
+* export failures trip the ``opik`` circuit breaker, and while it is open
+  batches are dropped without a network call;
+* nothing is sent during Opik configuration or prompt syncing, which this
+  mode skips (prompts are versioned by the hash of their text).
+
+``python -m src.observability.collector`` runs a local stand-in for the
+Opik API to point ``TRACING__URL`` at in tests.
+"""
+import atexit
+import contextvars
+import os
+import queue
+import random
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Callable, Optional
+
+import httpx
+from loguru import logger
+
+from src.clients.resilience import CircuitOpenError, get_circuit_breaker
+from src.config import settings
+from src.observability.metrics import get_metrics
+
+OPIK_CLOUD_URL = "https://www.comet.com/opik/api/"
+
+# Spans of a sampled-out run see this instead of a parent span.
+_UNSAMPLED = object()
+_current: contextvars.ContextVar = contextvars.ContextVar("blog2podcast_span", default=None)
+
+
+def _uuid7() -> str:
+    """A time-ordered UUID (version 7), the id format Opik expects."""
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76
+    value = value & ~(0x3 << 62) | 0x2 << 62
+    return str(uuid.UUID(int=value))
+
+
+def _timestamp(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent: Optional["Span"], metadata: dict) -> None:
+        self.id = _uuid7()
+        self.name = name
+        self.trace_id = trace_id
+        self.parent = parent
+        self.metadata = metadata
+        self.started = time.time()
+
+    def record(self, error: Optional[BaseException]) -> dict:
+        record = {
+            "id": self.id,
+            "trace_id": self.trace_id,
+            "parent_span_id": self.parent.id if self.parent is not None else None,
+            "project_name": _project_name(),
+            "name": self.name,
+            "type": "general",
+            "start_time": _timestamp(self.started),
+            "end_time": _timestamp(time.time()),
+            "metadata": self.metadata or None,
+            "tags": ["blog2podcast-agent"],
+        }
+        if error is not None:
+            record["error_info"] = {
+                "exception_type": type(error).__name__,
+                "message": str(error)[:1000],
+                "traceback": "".join(traceback.format_exception(error))[-4000:],
+            }
+        return record
+
+
+def _project_name() -> str:
+    return settings.opik.project_name or os.environ.get("OPIK_PROJECT_NAME") or "Default Project"
+
+
+def _sampled() -> bool:
+    rate = settings.tracing.sample_rate
+    return rate >= 1 or random.random() < rate
+
+
+@contextmanager
+def span(name: str, **metadata):
+    """Record the enclosed block as a span; outside of any span it starts a new, possibly sampled-out, trace."""
+    if settings.tracing.mode != "queue":
+        yield
+        return
+    parent = _current.get()
+    if parent is _UNSAMPLED or (parent is None and not _sampled()):
+        token = _current.set(_UNSAMPLED)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+        return
+    current = Span(name, parent.trace_id if parent is not None else _uuid7(), parent, metadata)
+    token = _current.set(current)
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current.reset(token)
+        exporter = get_trace_exporter()
+        record = current.record(error)
+        exporter.submit("spans", record)
+        if parent is None:
+            exporter.submit("traces", _trace_record(record))
+
+
+def _trace_record(root: dict) -> dict:
+    trace = {key: root[key] for key in ("project_name", "name", "start_time", "end_time", "metadata", "tags")}
+    trace["id"] = root["trace_id"]
+    if "error_info" in root:
+        trace["error_info"] = root["error_info"]
+    return trace
+
+
+class OpikRestSender:
+    """Posts batches to Opik's REST API, or to anything speaking it like the local collector."""
+
+    def __init__(self, url: str, api_key: str = "", workspace: str = "", timeout: float = 2.0) -> None:
+        headers = {}
+        if api_key:
+            headers["Authorization"] = api_key
+        if workspace:
+            headers["Comet-Workspace"] = workspace
+        self._client = httpx.Client(base_url=url.rstrip("/") + "/", headers=headers, timeout=timeout)
+
+    def __call__(self, kind: str, records: list[dict]) -> None:
+        response = self._client.post(f"v1/private/{kind}/batch", json={kind: records})
+        response.raise_for_status()
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class TraceExporter:
+    """A bounded queue of span and trace records, drained in batches by a daemon thread.
+
+    ``send(kind, records)`` delivers one batch of ``"spans"`` or ``"traces"``;
+    it runs under the ``opik`` circuit breaker, so a failing backend costs one
+    timed-out request per breaker reset instead of one per batch.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, list[dict]], None],
+        queue_size: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.send = send
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stats: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, kind: str, record: dict) -> bool:
+        """Queue ``record`` without blocking; ``False`` when the queue was full and it was dropped."""
+        self._start()
+        try:
+            self._queue.put_nowait((kind, record))
+        except queue.Full:
+            self._count(dropped_queue_full=1)
+            return False
+        self._count(queued=1)
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait up to ``timeout`` seconds for the queued records to be exported (or dropped)."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        for name in ("queued", "exported", "dropped_queue_full", "dropped_circuit_open", "dropped_export_failed", "batches"):
+            stats.setdefault(name, 0)
+        stats["queue_size"] = self._queue.qsize()
+        return stats
+
+    def _count(self, **amounts: int) -> None:
+        with self._lock:
+            self._stats.update(amounts)
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._export(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _export(self, batch: list[tuple[str, dict]]) -> None:
+        by_kind: dict[str, list[dict]] = {}
+        for kind, record in batch:
+            by_kind.setdefault(kind, []).append(record)
+        breaker = get_circuit_breaker("opik")
+        # Spans first: Opik accepts spans of a trace that arrives later, and the trace closes the run.
+        for kind in sorted(by_kind, key=lambda kind: kind != "spans"):
+            records = by_kind[kind]
+            try:
+                with breaker.guard():
+                    self.send(kind, records)
+            except CircuitOpenError:
+                self._count(dropped_circuit_open=len(records))
+            except Exception as e:
+                self._count(dropped_export_failed=len(records))
+                logger.debug(f"Dropped {len(records)} {kind} after a failed export: {e}")
+            else:
+                self._count(exported=len(records), batches=1)
+
+
+@lru_cache(maxsize=1)
+def get_trace_exporter() -> TraceExporter:
+    sender = OpikRestSender(
+        settings.tracing.url or os.environ.get("OPIK_URL_OVERRIDE") or OPIK_CLOUD_URL,
+        api_key=settings.opik.api_key,
+        workspace=settings.tracing.workspace or os.environ.get("OPIK_WORKSPACE", ""),
+        timeout=settings.tracing.export_timeout_seconds,
+    )
+    exporter = TraceExporter(
+        sender,
+        queue_size=settings.tracing.queue_size,
+        batch_size=settings.tracing.batch_size,
+        flush_interval=settings.tracing.flush_interval_seconds,
+    )
+    # What is still queued at exit gets a short grace period, not an unbounded wait.
+    atexit.register(exporter.flush, settings.tracing.shutdown_timeout_seconds)
+    get_metrics().register_collector(_exporter_samples)
+    return exporter
+
+
+def tracing_stats() -> dict:
+    """Records queued, exported and dropped by the export queue; empty until a span was recorded."""
+    if not get_trace_exporter.cache_info().currsize:
+        return {}
+    return get_trace_exporter().stats()
+
+
+def _exporter_samples():
+    stats = tracing_stats()
+    for reason in ("queue_full", "circuit_open", "export_failed"):
+        yield (
+            "trace_records_dropped_total", "counter", "Span and trace records dropped instead of exported.",
+            {"reason": reason}, stats.get(f"dropped_{reason}", 0),
+        )
+    yield "trace_records_exported_total", "counter", "Span and trace records exported.", {}, stats.get("exported", 0)
+    yield "trace_queue_size", "gauge", "Span and trace records waiting to be exported.", {}, stats.get("queue_size", 0)